@@ -18,6 +18,7 @@ from src.layouts.login_layout import create_login_layout
 from src.callbacks.sidebar_callbacks import register_sidebar_callbacks
 from src.callbacks.theme_callbacks import register_theme_callbacks
 from src.callbacks.auth_callbacks import register_auth_callbacks
+from src.utils.geo_assets import register_geojson_routes
 
 # Importar callbacks de mapas (usan decorador @callback)
 import src.callbacks.mapas_callbacks  # noqa: F401
@@ -69,6 +70,9 @@ app = dash.Dash(
 # Configuración del servidor
 server = app.server
 
+# Límites geográficos servidos como assets estáticos con huella (/geo/...)
+register_geojson_routes(server)
+
 # ============================================================================
 # LAYOUT PRINCIPAL CON AUTENTICACIÓN
 # ============================================================================
@@ -34,7 +34,9 @@ class Settings:
     DATA_DIR: Path = BASE_DIR / 'data'
     RAW_DATA_DIR: Path = DATA_DIR / 'raw'
     PROCESSED_DATA_DIR: Path = DATA_DIR / 'processed'
-    GEOGRAPHIC_DATA_DIR: Path = DATA_DIR / 'geographic'
+    # Límites territoriales generados por scripts/construir_geojson.py (la
+    # imagen Docker los genera fuera de data/, que docker-compose monta encima)
+    GEOGRAPHIC_DATA_DIR: Path = Path(os.getenv('GEOGRAPHIC_DATA_DIR', str(DATA_DIR / 'geographic')))
     REPORTS_DIR: Path = BASE_DIR / 'reports'
     REPORTS_OUTPUT_DIR: Path = REPORTS_DIR / 'output'
     REPORTS_TEMPLATES_DIR: Path = REPORTS_DIR / 'templates'
@@ -86,6 +88,34 @@ class Settings:
     REDIS_DB: int = int(os.getenv('REDIS_DB', 0))
     CACHE_TIMEOUT: int = int(os.getenv('CACHE_TIMEOUT', 3600))
     
+    # Cache de figuras Plotly serializadas (memory | filesystem | redis)
+    FIGURE_CACHE_ENABLED: bool = os.getenv('FIGURE_CACHE_ENABLED', 'True').lower() == 'true'
+    FIGURE_CACHE_BACKEND: str = os.getenv(
+        'FIGURE_CACHE_BACKEND', 'redis' if REDIS_ENABLED else 'memory'
+    ).lower()
+    FIGURE_CACHE_DIR: Path = Path(os.getenv('FIGURE_CACHE_DIR', str(DATA_DIR / 'cache' / 'figuras')))
+    FIGURE_CACHE_MAX_MB: int = int(os.getenv('FIGURE_CACHE_MAX_MB', 128))
+    FIGURE_CACHE_TTL_SECONDS: int = int(os.getenv('FIGURE_CACHE_TTL_SECONDS', CACHE_TIMEOUT))
+    
+    # ========================================================================
+    # CACHE DE DATOS LOCAL (data/processed)
+    # ========================================================================
+    DATA_RELOAD_ENABLED: bool = os.getenv('DATA_RELOAD_ENABLED', 'True').lower() == 'true'
+    DATA_RELOAD_INTERVAL_SECONDS: int = int(os.getenv('DATA_RELOAD_INTERVAL_SECONDS', 60))
+    
+    # Cache de KPIs, gráficos y tablas ya construidos (LRU por memoria + TTL)
+    RESULT_CACHE_ENABLED: bool = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() == 'true'
+    RESULT_CACHE_MAX_MB: int = int(os.getenv('RESULT_CACHE_MAX_MB', 64))
+    RESULT_CACHE_TTL_SECONDS: int = int(os.getenv('RESULT_CACHE_TTL_SECONDS', 900))
+    
+    # ========================================================================
+    # BACKEND ANALÍTICO (pandas | duckdb | polars)
+    # ========================================================================
+    ANALYTICS_BACKEND: str = os.getenv('ANALYTICS_BACKEND', 'pandas').lower()
+    DUCKDB_THREADS: int = int(os.getenv('DUCKDB_THREADS', 0))  # 0: todos los núcleos
+    # Copias Parquet de los CSV que consultan DuckDB y Polars (una por versión del archivo)
+    COLUMNAR_CACHE_DIR: Path = Path(os.getenv('COLUMNAR_CACHE_DIR', str(DATA_DIR / 'cache' / 'columnar')))
+    
     # ========================================================================
     # AUTENTICACIÓN
     # ========================================================================
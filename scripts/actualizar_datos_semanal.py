@@ -7,20 +7,38 @@ Flujo:
 1. Conecta a SQL Server MINEDUC (SIGE, Titulados, Financiero)
 2. Descarga datos de la semana anterior
 3. Procesa y limpia los datos
-4. Guarda en cache local (Parquet - formato optimizado)
+4. Guarda en cache local (Parquet comprimido + Arrow IPC para memory mapping)
+   dentro de un snapshot de staging (data/processed/snapshots/<fecha>.staging)
 5. Actualiza metadata con timestamp y estadísticas
-6. Envía notificación de éxito/error
+6. Publica el snapshot completo cambiando el enlace data/processed/current
+   de forma atómica y conserva solo los últimos snapshots
+7. Envía notificación de éxito/error
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
 import pyodbc
 import os
+import sys
 import json
+import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 import logging
 from dotenv import load_dotenv
 
+# Permitir importar módulos de la app (src.*) al ejecutar el script directamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.dimension_territorial import COLUMNAS_MINEDUC, agregar_jerarquia
+from src.data.geografia import RESOLUCIONES
+from src.data.indice_espacial import SIN_POLIGONO, indice_espacial_comunas
+from src.data.schema import aplicar_esquema
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -43,6 +61,31 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path('data/processed')
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Cada actualización se escribe completa en un snapshot propio y se publica
+# apuntando el enlace simbólico CURRENT_LINK a él. Los workers resuelven el
+# enlace una vez por snapshot, así nunca ven archivos de dos actualizaciones
+# distintas ni archivos a medio escribir.
+SNAPSHOTS_DIR = DATA_DIR / 'snapshots'
+CURRENT_LINK = DATA_DIR / 'current'
+SNAPSHOTS_A_CONSERVAR = int(os.getenv('DATA_SNAPSHOTS_KEEP', 3))
+
+# Filas por row group en los Parquet. Los datos vienen ordenados por Año/Región,
+# así cada row group cubre un rango acotado y las estadísticas min/max permiten
+# a CacheDataLoader saltarse los grupos que no coinciden con el filtro.
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+# Columnas de partición (estilo Hive: Año=2024/CodigoRegion=13/) para los
+# datasets por RBD. Dentro de cada partición los archivos van ordenados por
+# Comuna y RBD.
+PARTICIONES = ['Año', 'CodigoRegion']
+ORDEN_PARTICION = ['Comuna', 'RBD']
+
+# Distancia (grados) al borde de la comuna informada bajo la cual una diferencia
+# con los polígonos 'alta' no se considera discrepancia: el doble de su
+# tolerancia de simplificación más el redondeo de las coordenadas
+_tolerancia, _decimales = RESOLUCIONES['alta']
+TOLERANCIA_BORDE = 2 * (_tolerancia + 0.5 * 10 ** -_decimales)
+
 class ActualizadorDatosMineduc:
     """
     Clase para gestionar la actualización semanal de datos desde MINEDUC
@@ -56,6 +99,8 @@ class ActualizadorDatosMineduc:
             'registros_totales': 0,
             'errores': []
         }
+        # Directorio donde se escriben los archivos de la actualización en curso
+        self.snapshot_dir = DATA_DIR
     
     def _build_connection_string(self):
         """
@@ -72,6 +117,235 @@ class ActualizadorDatosMineduc:
             f"Connection Timeout=30;"
         )
     
+    def _guardar_cache(self, df: pd.DataFrame, nombre: str, particionado: bool = False) -> Path:
+        """
+        Guarda un dataset en cache como Parquet (snappy) y Arrow IPC (Feather v2)
+        
+        El archivo .arrow se escribe sin compresión y con el esquema compacto
+        (dimensiones como diccionario) para que CacheDataLoader lo abra con
+        memory mapping: todos los workers comparten las mismas páginas del
+        page cache sin decodificar una copia propia.
+        
+        Los archivos se escriben en el snapshot en curso (self.snapshot_dir),
+        que ningún worker lee hasta que se publica.
+        
+        Los datasets con CodigoComuna se completan con la jerarquía territorial
+        (CodigoProvincia, Provincia y, si falta, CodigoRegion), calculada
+        de forma vectorizada desde el código de comuna.
+        
+        Args:
+            df: Datos a guardar
+            nombre: Nombre del dataset (cache_<nombre>.*)
+            particionado: Si True, el Parquet se escribe como dataset Hive
+                particionado por Año/CodigoRegion en cache_<nombre>/
+        
+        Returns:
+            Ruta del archivo Parquet generado (o del directorio si es particionado)
+        """
+        df = aplicar_esquema(agregar_jerarquia(df, COLUMNAS_MINEDUC))
+        
+        output_file = self.snapshot_dir / f'cache_{nombre}.parquet'
+        if particionado:
+            self._guardar_particionado(df, output_file.with_suffix(''))
+        else:
+            df.to_parquet(output_file, index=False, compression='snappy', row_group_size=PARQUET_ROW_GROUP_SIZE)
+        
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(tabla, output_file.with_suffix('.arrow'), compression='uncompressed')
+        
+        return output_file.with_suffix('') if particionado else output_file
+    
+    def _validar_comunas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Contrasta CodigoComuna con las coordenadas de cada establecimiento
+        
+        Cada punto (Latitud/Longitud) se ubica en los polígonos comunales
+        locales de mayor resolución (índice espacial de grilla). Los códigos
+        y nombres oficiales de MINEDUC no se modifican: el resultado queda en
+        dos columnas adicionales,
+        
+            CodigoComunaCoordenadas  comuna del polígono que contiene el punto
+                                     (Int32, nulo sin coordenadas o fuera de todo polígono)
+            ComunaDiscrepante        True si esa comuna difiere de la informada
+        
+        y los RBD discrepantes se registran completos en la metadata. Los
+        polígonos están simplificados, por lo que un punto a menos de
+        TOLERANCIA_BORDE del borde de su comuna informada no se considera
+        discrepante.
+        """
+        try:
+            indice = indice_espacial_comunas('alta')
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo cargar el índice espacial de comunas, se omite la validación: {e}")
+            return df
+        
+        lat = pd.to_numeric(df['Latitud'], errors='coerce').to_numpy(dtype=np.float64)
+        lon = pd.to_numeric(df['Longitud'], errors='coerce').to_numpy(dtype=np.float64)
+        asignado = indice.asignar(lon, lat)
+        
+        informado = pd.to_numeric(df['CodigoComuna'], errors='coerce').to_numpy(dtype=np.float64)
+        con_poligono = asignado != SIN_POLIGONO
+        distinto = con_poligono & (asignado != informado)
+        en_borde = np.zeros(len(df), dtype=bool)
+        if distinto.any():
+            en_borde[distinto] = indice.distancia_borde(lon[distinto], lat[distinto], informado[distinto]) <= TOLERANCIA_BORDE
+        discrepante = distinto & ~en_borde
+        
+        rbd_discrepantes = df.loc[discrepante, 'RBD'].tolist()
+        self.metadata['validacion_comunas'] = {
+            'discrepantes': len(rbd_discrepantes),
+            'en_borde': int(en_borde.sum()),
+            'sin_poligono': int((~con_poligono).sum()),
+            'rbd_discrepantes': rbd_discrepantes
+        }
+        logger.info(
+            f"🧭 Comunas validadas por coordenadas: {int(con_poligono.sum())} ubicadas, "
+            f"{len(rbd_discrepantes)} discrepantes, {int(en_borde.sum())} en el borde, "
+            f"{int((~con_poligono).sum())} sin polígono"
+        )
+        if rbd_discrepantes:
+            logger.warning(
+                f"⚠️  {len(rbd_discrepantes)} establecimientos con coordenadas fuera de su comuna informada "
+                f"(ver validacion_comunas en cache_metadata.json)"
+            )
+        
+        return df.assign(
+            CodigoComunaCoordenadas=pd.arrays.IntegerArray(
+                np.where(con_poligono, asignado, 0).astype(np.int32), mask=~con_poligono
+            ),
+            ComunaDiscrepante=discrepante
+        )
+    
+    def _guardar_particionado(self, df: pd.DataFrame, directorio: Path):
+        """
+        Escribe un dataset Parquet particionado por Año y CodigoRegion
+        
+        La mayoría de las vistas consultan un año y una región, por lo que
+        CacheDataLoader solo abre los directorios de esa combinación y el
+        costo de carga escala con el tamaño del corte y no con la historia
+        nacional completa.
+        """
+        orden = PARTICIONES + [c for c in ORDEN_PARTICION if c in df.columns]
+        df = df.sort_values(orden, kind='stable')
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        
+        ds.write_dataset(
+            tabla,
+            directorio,
+            format='parquet',
+            partitioning=ds.partitioning(
+                tabla.select(PARTICIONES).schema, flavor='hive'
+            ),
+            file_options=ds.ParquetFileFormat().make_write_options(compression='snappy'),
+            max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+            existing_data_behavior='delete_matching'
+        )
+    
+    def _crear_staging(self) -> Path:
+        """
+        Crea el directorio de staging para el snapshot de esta actualización
+        """
+        nombre = datetime.now().strftime('%Y%m%d_%H%M%S')
+        staging = SNAPSHOTS_DIR / f'{nombre}.staging'
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        self.snapshot_dir = staging
+        logger.info(f"📂 Snapshot en preparación: {staging}")
+        return staging
+    
+    def _snapshot_publicado(self) -> Optional[Path]:
+        """
+        Retorna el snapshot publicado actualmente (None si aún no hay)
+        """
+        return CURRENT_LINK.resolve() if CURRENT_LINK.exists() else None
+    
+    def _heredar_fuentes(self):
+        """
+        Completa el snapshot en curso con las fuentes que fallaron en esta
+        ejecución, tomando sus archivos del snapshot publicado
+        
+        Así una consulta caída no deja al dashboard sin ese dataset; los
+        archivos se enlazan con hard links (sin copiar datos) cuando es posible.
+        """
+        anterior = self._snapshot_publicado()
+        if anterior is None:
+            return
+        
+        metadata_file = anterior / 'cache_metadata.json'
+        if not metadata_file.exists():
+            return
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata_anterior = json.load(f)
+        
+        actualizadas = {fuente['nombre'] for fuente in self.metadata['fuentes_actualizadas']}
+        for fuente in metadata_anterior.get('fuentes_actualizadas', []):
+            if fuente['nombre'] in actualizadas:
+                continue
+            for origen in anterior.glob(f"cache_{fuente['nombre']}*"):
+                destino = self.snapshot_dir / origen.name
+                # Descartar lo que la fuente alcanzó a escribir antes de fallar
+                if destino.is_dir():
+                    shutil.rmtree(destino)
+                elif destino.exists():
+                    destino.unlink()
+                if origen.is_dir():
+                    shutil.copytree(origen, destino, copy_function=_enlazar)
+                else:
+                    _enlazar(origen, destino)
+            self.metadata['fuentes_actualizadas'].append(dict(fuente, heredada=True))
+            logger.warning(f"⚠️  {fuente['nombre']}: se mantienen los datos del snapshot anterior")
+    
+    def _publicar_snapshot(self) -> Path:
+        """
+        Publica el snapshot en curso de forma atómica
+        
+        1. Renombra el staging a su nombre definitivo
+        2. Crea un enlace temporal y lo mueve sobre data/processed/current con
+           os.replace (rename atómico): cada lector ve el snapshot anterior o
+           el nuevo completo, nunca una mezcla
+        3. Elimina los snapshots más antiguos
+        """
+        staging = self.snapshot_dir
+        destino = staging.with_name(staging.name[:-len('.staging')])
+        os.replace(staging, destino)
+        self.snapshot_dir = destino
+        
+        tmp_link = CURRENT_LINK.with_name(CURRENT_LINK.name + '.tmp')
+        if tmp_link.is_symlink() or tmp_link.exists():
+            tmp_link.unlink()
+        os.symlink(os.path.relpath(destino, CURRENT_LINK.parent), tmp_link, target_is_directory=True)
+        os.replace(tmp_link, CURRENT_LINK)
+        logger.info(f"📢 Snapshot publicado: {CURRENT_LINK} → {destino}")
+        
+        self._limpiar_snapshots(destino)
+        return destino
+    
+    def _limpiar_snapshots(self, vigente: Path):
+        """
+        Conserva solo los últimos SNAPSHOTS_A_CONSERVAR snapshots publicados
+        
+        Los anteriores al vigente se mantienen un tiempo porque los workers
+        cambian de snapshot en su siguiente verificación, no al instante.
+        """
+        snapshots = sorted(
+            p for p in SNAPSHOTS_DIR.iterdir()
+            if p.is_dir() and not p.name.endswith('.staging')
+        )
+        for antiguo in snapshots[:-max(SNAPSHOTS_A_CONSERVAR, 1)]:
+            if antiguo == vigente:
+                continue
+            shutil.rmtree(antiguo, ignore_errors=True)
+            logger.info(f"🗑️  Snapshot eliminado: {antiguo.name}")
+    
+    def _descartar_staging(self):
+        """
+        Elimina un snapshot de staging que no llegó a publicarse
+        """
+        if self.snapshot_dir.name.endswith('.staging'):
+            shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+            logger.warning(f"🗑️  Snapshot de staging descartado: {self.snapshot_dir.name}")
+        self.snapshot_dir = DATA_DIR
+    
     def conectar(self):
         """
         Establece conexión con SQL Server MINEDUC
@@ -122,9 +396,11 @@ class ActualizadorDatosMineduc:
         try:
             df = pd.read_sql(query, conn)
             
-            # Guardar en Parquet (formato comprimido y rápido)
-            output_file = DATA_DIR / 'cache_establecimientos.parquet'
-            df.to_parquet(output_file, index=False, compression='snappy')
+            # Validar la comuna informada contra las coordenadas
+            df = self._validar_comunas(df)
+            
+            # Guardar en Parquet (formato comprimido y rápido) + Arrow IPC
+            output_file = self._guardar_cache(df, 'establecimientos')
             
             logger.info(f"✅ Establecimientos actualizados: {len(df)} registros")
             logger.info(f"   Guardado en: {output_file}")
@@ -132,7 +408,7 @@ class ActualizadorDatosMineduc:
             self.metadata['fuentes_actualizadas'].append({
                 'nombre': 'establecimientos',
                 'registros': len(df),
-                'archivo': str(output_file)
+                'archivo': output_file.name
             })
             
             return df
@@ -185,12 +461,10 @@ class ActualizadorDatosMineduc:
             df_agregado.rename(columns={'RBD': 'CantidadEstablecimientos'}, inplace=True)
             
             # Guardar datos completos
-            output_file = DATA_DIR / 'cache_matricula.parquet'
-            df.to_parquet(output_file, index=False, compression='snappy')
+            output_file = self._guardar_cache(df, 'matricula', particionado=True)
             
             # Guardar agregado para dashboards rápidos
-            output_agregado = DATA_DIR / 'cache_matricula_agregado.parquet'
-            df_agregado.to_parquet(output_agregado, index=False, compression='snappy')
+            self._guardar_cache(df_agregado, 'matricula_agregado')
             
             logger.info(f"✅ Matrícula actualizada: {len(df)} registros")
             logger.info(f"   Agregado generado: {len(df_agregado)} registros")
@@ -199,7 +473,7 @@ class ActualizadorDatosMineduc:
                 'nombre': 'matricula',
                 'registros': len(df),
                 'registros_agregados': len(df_agregado),
-                'archivo': str(output_file)
+                'archivo': output_file.name
             })
             
             return df
@@ -240,15 +514,14 @@ class ActualizadorDatosMineduc:
         try:
             df = pd.read_sql(query, conn)
             
-            output_file = DATA_DIR / 'cache_docentes.parquet'
-            df.to_parquet(output_file, index=False, compression='snappy')
+            output_file = self._guardar_cache(df, 'docentes')
             
             logger.info(f"✅ Docentes actualizados: {len(df)} registros")
             
             self.metadata['fuentes_actualizadas'].append({
                 'nombre': 'docentes',
                 'registros': len(df),
-                'archivo': str(output_file)
+                'archivo': output_file.name
             })
             
             return df
@@ -269,7 +542,9 @@ class ActualizadorDatosMineduc:
             t.RBD,
             t.Año,
             t.Region,
+            t.CodigoRegion,
             t.Comuna,
+            t.CodigoComuna,
             t.Especialidad,
             t.SectorEconomico,
             t.CantidadTitulados,
@@ -288,15 +563,14 @@ class ActualizadorDatosMineduc:
         try:
             df = pd.read_sql(query, conn)
             
-            output_file = DATA_DIR / 'cache_titulados.parquet'
-            df.to_parquet(output_file, index=False, compression='snappy')
+            output_file = self._guardar_cache(df, 'titulados', particionado=True)
             
             logger.info(f"✅ Titulados actualizados: {len(df)} registros")
             
             self.metadata['fuentes_actualizadas'].append({
                 'nombre': 'titulados',
                 'registros': len(df),
-                'archivo': str(output_file)
+                'archivo': output_file.name
             })
             
             return df
@@ -315,7 +589,7 @@ class ActualizadorDatosMineduc:
             f['registros'] for f in self.metadata['fuentes_actualizadas']
         )
         
-        metadata_file = DATA_DIR / 'cache_metadata.json'
+        metadata_file = self.snapshot_dir / 'cache_metadata.json'
         
         with open(metadata_file, 'w', encoding='utf-8') as f:
             json.dump(self.metadata, f, indent=2, ensure_ascii=False)
@@ -339,15 +613,26 @@ class ActualizadorDatosMineduc:
             return False
         
         try:
+            self._crear_staging()
+            
             # Actualizar cada fuente de datos
             self.actualizar_establecimientos(conn)
             self.actualizar_matricula(conn)
             self.actualizar_docentes(conn)
             self.actualizar_titulados(conn)
             
-            # Guardar metadata
+            if not self.metadata['fuentes_actualizadas']:
+                logger.error("❌ Ninguna fuente se actualizó. Se mantiene el snapshot publicado.")
+                self._descartar_staging()
+                return False
+            
+            # Completar con las fuentes que fallaron y guardar metadata
+            self._heredar_fuentes()
             self.guardar_metadata()
             
+            # Publicar el snapshot completo de una sola vez
+            self._publicar_snapshot()
+            
             logger.info("=" * 80)
             logger.info("✅ ACTUALIZACIÓN COMPLETADA EXITOSAMENTE")
             logger.info(f"📊 Total de registros actualizados: {self.metadata['registros_totales']:,}")
@@ -364,6 +649,7 @@ class ActualizadorDatosMineduc:
             
         except Exception as e:
             logger.error(f"❌ Error general en actualización: {e}")
+            self._descartar_staging()
             return False
             
         finally:
@@ -371,6 +657,17 @@ class ActualizadorDatosMineduc:
             logger.info("🔌 Conexión cerrada")
 
 
+def _enlazar(origen, destino):
+    """
+    Crea un hard link de origen en destino (copia si el sistema no lo permite)
+    """
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+    return destino
+
+
 def main():
     """
     Función principal
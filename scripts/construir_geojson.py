@@ -0,0 +1,357 @@
+"""
+Construcción de los GeoJSON Locales Multi-resolución (data/geographic)
+Ejecutar una vez, y de nuevo solo si cambia la fuente de los límites:
+    python scripts/construir_geojson.py
+    python scripts/construir_geojson.py --regiones Regional.geojson --comunas comunas.geojson
+
+Flujo:
+1. Lee los límites regionales y comunales de fcortes/Chile-GeoJSON (URL o
+   archivos ya descargados)
+2. Divide los anillos de los polígonos en arcos entre puntos de unión: un
+   borde compartido por dos regiones/comunas es un único arco
+3. Simplifica cada arco una sola vez con Douglas-Peucker (extremos fijos),
+   así los vecinos quedan con el mismo borde: sin huecos ni traslapes
+4. Cuantiza las coordenadas a una grilla por resolución (alta/media/baja)
+5. Escribe <nivel>_<resolucion>.geojson y manifest.json en data/geographic
+"""
+
+import sys
+import json
+import argparse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+import logging
+
+import numpy as np
+
+# Permitir importar módulos de la app (src.*) al ejecutar el script directamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.geografia import (
+    FUENTES, RESOLUCIONES, PROPIEDADES, GEOGRAPHIC_DIR, MANIFEST_PATH, ruta_geojson
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+Punto = Tuple[float, float]
+
+# Decimales con que se comparan los vértices de la fuente al detectar bordes compartidos
+DECIMALES_FUENTE = 7
+
+
+def leer_fuente(origen: str) -> Dict:
+    """
+    Lee un GeoJSON desde una URL o un archivo local
+    """
+    if origen.startswith(('http://', 'https://')):
+        logger.info(f"📥 Descargando {origen}")
+        with urllib.request.urlopen(origen) as response:
+            return json.loads(response.read().decode('utf-8'))
+    with open(origen, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def poligonos(geometria: Dict) -> List[List[List[Punto]]]:
+    """
+    Polígonos de una geometría como listas de anillos abiertos (sin repetir
+    el primer punto al final)
+    """
+    if geometria['type'] == 'Polygon':
+        partes = [geometria['coordinates']]
+    elif geometria['type'] == 'MultiPolygon':
+        partes = geometria['coordinates']
+    else:
+        return []
+
+    resultado = []
+    for parte in partes:
+        anillos = []
+        for anillo in parte:
+            puntos = [(round(c[0], DECIMALES_FUENTE), round(c[1], DECIMALES_FUENTE)) for c in anillo]
+            if len(puntos) > 1 and puntos[0] == puntos[-1]:
+                puntos = puntos[:-1]
+            if len(puntos) >= 3:
+                anillos.append(puntos)
+        if anillos:
+            resultado.append(anillos)
+    return resultado
+
+
+def puntos_de_union(anillos: List[List[Punto]]) -> set:
+    """
+    Vértices donde cambia la vecindad del borde
+
+    Un vértice interior de un borde compartido tiene los mismos vecinos en
+    los dos anillos que lo recorren; donde los vecinos difieren empieza o
+    termina un borde compartido (o se tocan tres o más polígonos).
+    """
+    vecinos = defaultdict(set)
+    for anillo in anillos:
+        n = len(anillo)
+        for i, punto in enumerate(anillo):
+            vecinos[punto].add(frozenset((anillo[i - 1], anillo[(i + 1) % n])))
+    return {punto for punto, pares in vecinos.items() if len(pares) > 1}
+
+
+def dividir_en_arcos(anillo: List[Punto], uniones: set) -> List[List[Punto]]:
+    """
+    Divide un anillo en arcos entre puntos de unión (cada arco incluye sus extremos)
+
+    Un anillo sin uniones (isla, polígono sin vecinos o enclave) es un solo
+    arco cerrado que parte en su vértice menor: así el hueco de un polígono y
+    la isla que lo rellena, que recorren los mismos vértices desde puntos de
+    partida distintos, tienen la misma clave y se simplifican una sola vez.
+    """
+    posiciones = [i for i, punto in enumerate(anillo) if punto in uniones]
+    if not posiciones:
+        inicio = anillo.index(min(anillo))
+        rotado = anillo[inicio:] + anillo[:inicio]
+        return [rotado + [rotado[0]]]
+
+    rotado = anillo[posiciones[0]:] + anillo[:posiciones[0]]
+    cortes = [i - posiciones[0] for i in posiciones] + [len(anillo)]
+    rotado.append(rotado[0])
+    return [rotado[a:b + 1] for a, b in zip(cortes[:-1], cortes[1:])]
+
+
+def _distancias(puntos: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Distancia de cada punto al segmento a-b (al punto a si el segmento es nulo)
+    """
+    ab = b - a
+    largo = float(ab @ ab)
+    if largo == 0.0:
+        return np.hypot(*(puntos - a).T)
+    t = np.clip(((puntos - a) @ ab) / largo, 0.0, 1.0)
+    proyeccion = a + t[:, None] * ab
+    return np.hypot(*(puntos - proyeccion).T)
+
+
+def douglas_peucker(puntos: np.ndarray, tolerancia: float, minimo_interior: int = 0) -> np.ndarray:
+    """
+    Máscara de los puntos que conserva Douglas-Peucker (extremos siempre)
+
+    Args:
+        puntos: Arco (n × 2)
+        tolerancia: Distancia máxima entre el arco original y el simplificado
+        minimo_interior: Puntos interiores que se conservan aunque estén
+            dentro de la tolerancia (los más lejanos), para que ningún
+            anillo colapse a una línea
+    """
+    n = len(puntos)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, -1]] = True
+
+    pendientes = [(0, n - 1)]
+    while pendientes:
+        i, j = pendientes.pop()
+        if j <= i + 1:
+            continue
+        d = _distancias(puntos[i + 1:j], puntos[i], puntos[j])
+        k = int(d.argmax())
+        if d[k] > tolerancia:
+            conservar[i + 1 + k] = True
+            pendientes.extend([(i, i + 1 + k), (i + 1 + k, j)])
+
+    while conservar[1:-1].sum() < min(minimo_interior, n - 2):
+        indices = np.flatnonzero(conservar)
+        mejor, mejor_d = None, -1.0
+        for i, j in zip(indices[:-1], indices[1:]):
+            if j > i + 1:
+                d = _distancias(puntos[i + 1:j], puntos[i], puntos[j])
+                k = int(d.argmax())
+                if d[k] > mejor_d:
+                    mejor, mejor_d = i + 1 + k, d[k]
+        conservar[mejor] = True
+
+    return conservar
+
+
+class SimplificadorTopologico:
+    """
+    Simplifica todos los polígonos de un nivel territorial compartiendo arcos
+    """
+
+    def __init__(self, features: List[Dict]):
+        self.features = features
+        self.geometrias = [poligonos(f.get('geometry') or {}) for f in features]
+        anillos = [a for geometria in self.geometrias for parte in geometria for a in parte]
+        self.uniones = puntos_de_union(anillos)
+        self.vertices = sum(len(a) for a in anillos)
+        logger.info(
+            f"🔗 {len(features)} features, {len(anillos)} anillos, "
+            f"{self.vertices:,} vértices, {len(self.uniones):,} puntos de unión"
+        )
+
+    @staticmethod
+    def _canonico(arco: List[Punto]) -> Tuple[tuple, bool]:
+        """
+        Clave del arco independiente del sentido en que se recorre
+        """
+        directo, inverso = tuple(arco), tuple(reversed(arco))
+        return (directo, False) if directo <= inverso else (inverso, True)
+
+    def simplificar(self, tolerancia: float, decimales: int) -> List[Dict]:
+        """
+        Features simplificadas y cuantizadas para una resolución
+        """
+        arcos_por_anillo = [
+            [[dividir_en_arcos(a, self.uniones) for a in parte] for parte in geometria]
+            for geometria in self.geometrias
+        ]
+
+        # Primera pasada: arcos que dejarían un anillo con menos de 3 vértices
+        protegidos = set()
+        simplificados = {}
+        for geometria in arcos_por_anillo:
+            for parte in geometria:
+                for arcos in parte:
+                    anillo = self._armar(arcos, simplificados, protegidos, tolerancia, decimales)
+                    if len(anillo) < 4:
+                        protegidos.update(self._canonico(arco)[0] for arco in arcos)
+
+        # Segunda pasada con los arcos protegidos recalculados
+        for clave in protegidos:
+            simplificados.pop(clave, None)
+
+        resultado = []
+        for feature, geometria in zip(self.features, arcos_por_anillo):
+            partes = []
+            for parte in geometria:
+                exterior, *huecos = [
+                    self._armar(arcos, simplificados, protegidos, tolerancia, decimales)
+                    for arcos in parte
+                ]
+                # Un anillo que colapsa al cuantizar queda bajo la resolución del mapa
+                if len(exterior) >= 4:
+                    partes.append([exterior] + [h for h in huecos if len(h) >= 4])
+            if not partes:
+                logger.warning(f"⚠️  Feature sin geometría tras simplificar: {feature.get('properties')}")
+            resultado.append(self._feature(feature, partes))
+        return resultado
+
+    def _armar(self, arcos, simplificados, protegidos, tolerancia, decimales) -> List[List[float]]:
+        """
+        Reconstruye un anillo cerrado a partir de sus arcos simplificados
+        """
+        anillo = []
+        for arco in arcos:
+            clave, invertido = self._canonico(arco)
+            if clave not in simplificados:
+                puntos = np.asarray(clave, dtype=float)
+                cerrado = clave[0] == clave[-1]
+                minimo = 2 if cerrado else (1 if clave in protegidos else 0)
+                puntos = puntos[douglas_peucker(puntos, tolerancia, minimo)]
+                puntos = np.round(puntos, decimales)
+                repetidos = np.r_[False, (np.diff(puntos, axis=0) == 0).all(axis=1)]
+                simplificados[clave] = puntos[~repetidos].tolist()
+            tramo = simplificados[clave]
+            if invertido:
+                tramo = tramo[::-1]
+            anillo.extend(tramo if not anillo else tramo[1:])
+        return anillo
+
+    @staticmethod
+    def _feature(feature: Dict, partes: List) -> Dict:
+        if len(partes) == 1:
+            geometria = {'type': 'Polygon', 'coordinates': partes[0]}
+        else:
+            geometria = {'type': 'MultiPolygon', 'coordinates': partes}
+        return {'type': 'Feature', 'properties': feature.get('properties', {}), 'geometry': geometria}
+
+
+def filtrar_propiedades(features: List[Dict], nivel: str) -> List[Dict]:
+    """
+    Deja en cada feature solo las propiedades que usan los mapas
+    """
+    columnas = PROPIEDADES[nivel]
+    for feature in features:
+        propiedades = feature.get('properties') or {}
+        feature['properties'] = {c: propiedades[c] for c in columnas if c in propiedades}
+    return features
+
+
+def contar_vertices(features: List[Dict]) -> int:
+    total = 0
+    for feature in features:
+        geometria = feature['geometry']
+        partes = [geometria['coordinates']] if geometria['type'] == 'Polygon' else geometria['coordinates']
+        total += sum(len(anillo) for parte in partes for anillo in parte)
+    return total
+
+
+def construir(fuentes: Dict[str, str], destino: Path) -> Dict:
+    """
+    Genera todos los niveles y resoluciones y retorna el manifest
+    """
+    destino.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        'generado': datetime.now().isoformat(),
+        'fuentes': fuentes,
+        'resoluciones': {
+            nombre: {'tolerancia': tolerancia, 'decimales': decimales}
+            for nombre, (tolerancia, decimales) in RESOLUCIONES.items()
+        },
+        'archivos': {}
+    }
+
+    for nivel, origen in fuentes.items():
+        logger.info(f"\n{'='*70}\n🗺️  {nivel}\n{'='*70}")
+        fuente = leer_fuente(origen)
+        features = filtrar_propiedades(fuente['features'], nivel)
+        simplificador = SimplificadorTopologico(features)
+
+        for resolucion, (tolerancia, decimales) in RESOLUCIONES.items():
+            simplificadas = simplificador.simplificar(tolerancia, decimales)
+            path = destino / ruta_geojson(nivel, resolucion).name
+            contenido = json.dumps(
+                {'type': 'FeatureCollection', 'features': simplificadas},
+                ensure_ascii=False, separators=(',', ':')
+            )
+            path.write_text(contenido, encoding='utf-8')
+
+            vertices = contar_vertices(simplificadas)
+            manifest['archivos'][path.name] = {
+                'nivel': nivel,
+                'resolucion': resolucion,
+                'features': len(simplificadas),
+                'vertices': vertices,
+                'vertices_fuente': simplificador.vertices,
+                'bytes': len(contenido.encode('utf-8'))
+            }
+            logger.info(
+                f"✅ {path.name}: {vertices:,} vértices "
+                f"({vertices / simplificador.vertices:.1%} de la fuente), "
+                f"{len(contenido.encode('utf-8')) / 1e6:.2f} MB"
+            )
+
+    manifest_path = destino / MANIFEST_PATH.name
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    logger.info(f"📝 Manifest escrito en {manifest_path}")
+    return manifest
+
+
+def main():
+    """
+    Función principal
+    """
+    parser = argparse.ArgumentParser(description="Genera los GeoJSON locales multi-resolución")
+    parser.add_argument('--regiones', default=FUENTES['regiones'], help="URL o archivo del GeoJSON regional")
+    parser.add_argument('--comunas', default=FUENTES['comunas'], help="URL o archivo del GeoJSON comunal")
+    parser.add_argument('--destino', default=str(GEOGRAPHIC_DIR), help="Directorio de salida")
+    args = parser.parse_args()
+
+    try:
+        construir({'regiones': args.regiones, 'comunas': args.comunas}, Path(args.destino))
+    except Exception as e:
+        logger.error(f"❌ Error construyendo los GeoJSON: {e}")
+        sys.exit(1)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Verificación del Cache de Figuras
+Ejercita los tres almacenamientos del cache de figuras (memoria, directorio
+y Redis) con una figura de prueba: primer acceso construye, segundo acceso
+se sirve desde el cache con el mismo JSON que recibiría el navegador, un
+cambio de versión de datos invalida, no_update no se guarda y las entradas
+expiran según su TTL.
+
+Redis se prueba con un sustituto local en memoria (mismos métodos que el
+cliente redis-py), así que no requiere un servidor. Para probar contra un
+Redis real:
+    python scripts/verificar_cache_figuras.py --redis-real
+
+Código de salida 0 si todas las verificaciones pasan, 1 si no.
+"""
+
+import sys
+import json
+import time
+import fnmatch
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import plotly.express as px
+import plotly.utils
+from dash import no_update
+
+# Permitir importar módulos de la app (src.*) al ejecutar el script directamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.figure_cache import (
+    FigureCache, MemoryFigureStore, FileFigureStore, RedisFigureStore, crear_store
+)
+
+
+class RedisLocal:
+    """
+    Sustituto en memoria de un cliente Redis (get/setex/delete/scan_iter)
+    """
+
+    def __init__(self):
+        self._datos = {}
+
+    def get(self, clave):
+        valor = self._datos.get(clave)
+        if valor is None:
+            return None
+        payload, expira = valor
+        if expira <= time.time():
+            del self._datos[clave]
+            return None
+        return payload.encode('utf-8')
+
+    def setex(self, clave, segundos, valor):
+        self._datos[clave] = (valor, time.time() + segundos)
+
+    def delete(self, clave):
+        self._datos.pop(clave, None)
+
+    def scan_iter(self, match='*'):
+        return [c for c in list(self._datos) if fnmatch.fnmatch(c, match)]
+
+
+def figura_prueba(n=20000):
+    """
+    Figura de prueba de tamaño similar a un choropleth comunal
+    """
+    rng = np.random.default_rng(0)
+    return px.scatter(x=rng.random(n), y=rng.random(n), color=rng.random(n))
+
+
+def json_navegador(figura):
+    """JSON que Dash enviaría al navegador para la figura"""
+    return json.dumps(figura, cls=plotly.utils.PlotlyJSONEncoder, sort_keys=True)
+
+
+def verificar(nombre, store):
+    """
+    Ejecuta las verificaciones sobre un almacenamiento
+
+    Returns:
+        Lista de fallas (vacía si todo pasa)
+    """
+    print(f"\n{'='*70}")
+    print(f"🗄️  Verificando almacenamiento: {nombre}")
+    print(f"{'='*70}")
+
+    fallas = []
+    cache = FigureCache(store, ttl_seconds=60)
+    construcciones = []
+
+    def construir():
+        construcciones.append(1)
+        return figura_prueba()
+
+    inicio = time.perf_counter()
+    primera = cache.get_or_build('prueba', {'n': 20000}, construir, version=1)
+    t_construir = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    segunda = cache.get_or_build('prueba', {'n': 20000}, construir, version=1)
+    t_cache = time.perf_counter() - inicio
+
+    if len(construcciones) != 1:
+        fallas.append("el segundo acceso volvió a construir la figura")
+    if json_navegador(primera) != json_navegador(figura_prueba()):
+        fallas.append("la figura entregada difiere del JSON de la figura original")
+    if json_navegador(primera) != json_navegador(segunda):
+        fallas.append("el acierto no entrega el mismo JSON que la construcción")
+    print(f"  ⏱️  Construir + serializar: {t_construir * 1000:.1f} ms | desde cache: {t_cache * 1000:.1f} ms")
+
+    cache.get_or_build('prueba', {'n': 20000}, construir, version=2)
+    if len(construcciones) != 2:
+        fallas.append("un cambio de versión de datos no invalidó la figura")
+
+    salidas = cache.get_or_build('callback', 'inactivo', lambda: [no_update] * 3)
+    otra = cache.get_or_build('callback', 'inactivo', lambda: ['construido'])
+    if salidas[0] is not no_update or otra != ['construido']:
+        fallas.append("se guardó una salida con no_update")
+
+    corto = FigureCache(store, ttl_seconds=1)
+    corto.get_or_build('efimera', None, lambda: {'data': [], 'layout': {}})
+    time.sleep(1.2)
+    reconstruida = []
+    corto.get_or_build('efimera', None, lambda: reconstruida.append(1) or {'data': [], 'layout': {}})
+    if not reconstruida:
+        fallas.append("la entrada no expiró según su TTL")
+
+    cache.clear()
+    cache.get_or_build('prueba', {'n': 20000}, construir, version=1)
+    if len(construcciones) != 3:
+        fallas.append("clear() no vació el almacenamiento")
+
+    for falla in fallas:
+        print(f"  ❌ {falla}")
+    if not fallas:
+        print(f"  ✅ OK ({cache.stats()})")
+    return fallas
+
+
+def main():
+    """
+    Función principal
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        stores = [
+            ('memory', MemoryFigureStore(64 * 1024 * 1024)),
+            ('filesystem', FileFigureStore(Path(directorio))),
+        ]
+        if '--redis-real' in sys.argv:
+            store = crear_store('redis')
+            if not isinstance(store, RedisFigureStore):
+                print("❌ No se pudo conectar a Redis (ver REDIS_* en .env)")
+                sys.exit(1)
+            stores.append(('redis', store))
+        else:
+            stores.append(('redis (sustituto local)', RedisFigureStore(RedisLocal())))
+
+        fallas = []
+        for nombre, store in stores:
+            fallas.extend(verificar(nombre, store))
+
+    if fallas:
+        print(f"\n❌ Verificaciones fallidas: {len(fallas)}")
+        sys.exit(1)
+
+    print("\n✅ Cache de figuras verificado en todos los almacenamientos")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
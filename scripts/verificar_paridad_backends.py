@@ -0,0 +1,131 @@
+"""
+Verificación de Paridad entre el Backend pandas y los Backends Alternativos
+Construye cada KPI, gráfico y tabla de las secciones con pandas y con cada
+backend alternativo (DuckDB, Polars) para una grilla de filtros y compara el
+JSON que se enviaría al navegador.
+
+Ejecutar desde la raíz del proyecto (requiere pip install duckdb / polars):
+    python scripts/verificar_paridad_backends.py                    # todos los instalados
+    python scripts/verificar_paridad_backends.py polars             # solo uno
+    python scripts/verificar_paridad_backends.py --backend polars   # ídem
+
+El JSON se compara exacto: los promedios se calculan en todos los motores
+como suma escalada exacta y conteo (ver src/data/backend_archivos.py), así
+que no dependen del orden de suma de cada motor.
+
+Código de salida 0 si todos los resultados son idénticos, 1 si no.
+"""
+
+import sys
+import json
+import argparse
+import itertools
+from pathlib import Path
+
+import plotly.utils
+
+# Permitir importar módulos de la app (src.*) al ejecutar el script directamente
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.layouts.real_data_content import (
+    QueryContext, QUERY_CONTEXTS, SIMULATED_FILES,
+    build_real_kpi_cards, build_real_figure, build_real_table
+)
+
+# Grilla de filtros: sin filtros, cada filtro por separado y combinaciones
+FILTROS = [
+    None,
+    {'years': [2018, 2022]},
+    {'years': [2030, 2035]},
+    {'region': 'Maule'},
+    {'region': 'Todas las regiones', 'especialidad': 'Todas las especialidades'},
+    {'especialidad': ['Electricidad', 'Construcción']},
+    {'dependencia': 'Municipal', 'zona': 'Rural'},
+    {'genero': 'Femenino'},
+    {'years': [2016, 2020], 'region': 'Biobío', 'especialidad': 'Gastronomía',
+     'dependencia': 'Particular Subvencionado', 'genero': 'ambos', 'zona': 'Urbana'},
+    {'years': [2016, 2020], 'region': 'Biobío', 'especialidad': 'Gastronomía'},
+]
+
+TIPOS_GRAFICO = ['line', 'bar', 'pie']
+
+
+def serializar(componente):
+    crudo = json.loads(json.dumps(componente, cls=plotly.utils.PlotlyJSONEncoder))
+    return json.dumps(crudo, sort_keys=True)
+
+
+def widgets(contexto, dataset):
+    """
+    Construye todos los widgets de un dataset con el contexto dado
+    """
+    yield 'kpi', build_real_kpi_cards(dataset, contexto)
+    yield 'tabla', build_real_table(dataset, contexto)
+    for tipo in TIPOS_GRAFICO:
+        yield f'grafico {tipo}', build_real_figure(dataset, tipo, 'Paridad', contexto)
+
+
+def verificar(nombre, contexto_backend):
+    """
+    Compara todos los widgets de pandas contra un backend alternativo
+
+    Returns:
+        (widgets comparados, lista de diferencias)
+    """
+    print(f"\n{'='*70}")
+    print(f"🔎 Verificando paridad pandas vs {nombre}")
+    print(f"{'='*70}")
+
+    comparados, diferencias = 0, []
+    for dataset, filtros in itertools.product(SIMULATED_FILES, FILTROS):
+        pandas_ctx = QueryContext(filtros)
+        backend_ctx = contexto_backend(filtros)
+        for (widget, esperado), (_, obtenido) in zip(
+            widgets(pandas_ctx, dataset), widgets(backend_ctx, dataset)
+        ):
+            comparados += 1
+            if serializar(esperado) != serializar(obtenido):
+                diferencias.append((dataset, widget, filtros))
+
+    for dataset, widget, filtros in diferencias:
+        print(f"  ❌ {dataset} / {widget} / filtros={filtros}")
+
+    print(f"📊 Widgets comparados: {comparados}")
+    return comparados, diferencias
+
+
+def main():
+    """
+    Función principal
+    """
+    parser = argparse.ArgumentParser(description='Paridad de widgets entre pandas y los backends alternativos')
+    parser.add_argument('backend', nargs='?', help=f"{', '.join(QUERY_CONTEXTS)} o todos (por defecto)")
+    parser.add_argument('--backend', dest='backend_opcion', help='Igual que el argumento posicional')
+    args = parser.parse_args()
+    pedido = args.backend_opcion or args.backend or 'todos'
+    if pedido != 'todos' and pedido not in QUERY_CONTEXTS:
+        print(f"❌ Backend desconocido: {pedido} (opciones: {', '.join(QUERY_CONTEXTS)}, todos)")
+        sys.exit(1)
+
+    nombres = list(QUERY_CONTEXTS) if pedido == 'todos' else [pedido]
+    instalados = [n for n in nombres if QUERY_CONTEXTS[n].backend.disponible()]
+    for nombre in set(nombres) - set(instalados):
+        print(f"⚠️  {nombre} no está instalado (pip install {nombre})")
+    if not instalados or (pedido != 'todos' and pedido not in instalados):
+        sys.exit(1)
+
+    total_diferencias = 0
+    for nombre in instalados:
+        _, diferencias = verificar(nombre, QUERY_CONTEXTS[nombre])
+        total_diferencias += len(diferencias)
+
+    if total_diferencias:
+        print(f"\n❌ Diferencias: {total_diferencias}")
+        sys.exit(1)
+
+    print(f"\n✅ Resultados idénticos en todos los backends verificados ({', '.join(instalados)})")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@
 CALLBACKS - INDICADORES MDS
 ============================================================================
 Callbacks para los indicadores del Ministerio de Desarrollo Social
+Las salidas de cada indicador (KPIs y figuras) se sirven desde el cache de
+figuras (src/utils/figure_cache.py); no_update no se cachea
 """
 
 from dash import Input, Output, State, callback, no_update
@@ -12,6 +14,8 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from src.utils.figure_cache import figure_cache
+
 
 def register_indicadores_mds_callbacks(app):
     """Registra todos los callbacks de Indicadores MDS"""
@@ -31,6 +35,7 @@ def register_indicadores_mds_callbacks(app):
          Output('mds-prop1-especialidad', 'figure')],
         [Input('mds-tabs', 'active_tab')]
     )
+    @figure_cache.memoize('mds_prop1_ingreso_es')
     def update_prop1_ingreso_es(active_tab):
         """Actualiza indicador de ingreso a educación superior"""
         
@@ -143,6 +148,7 @@ def register_indicadores_mds_callbacks(app):
          Output('mds-prop2-region', 'figure')],
         [Input('mds-tabs', 'active_tab')]
     )
+    @figure_cache.memoize('mds_prop2_competencias_docentes')
     def update_prop2_competencias_docentes(active_tab):
         """Actualiza indicador de competencias docentes"""
         
@@ -236,6 +242,7 @@ def register_indicadores_mds_callbacks(app):
          Output('mds-comp1-region', 'figure')],
         [Input('mds-tabs', 'active_tab')]
     )
+    @figure_cache.memoize('mds_comp1_equipamiento')
     def update_comp1_equipamiento(active_tab):
         """Actualiza indicador de mejora de equipamiento"""
         
@@ -344,6 +351,7 @@ def register_indicadores_mds_callbacks(app):
          Output('mds-comp2-competencias', 'figure')],
         [Input('mds-tabs', 'active_tab')]
     )
+    @figure_cache.memoize('mds_comp2_slep')
     def update_comp2_slep(active_tab):
         """Actualiza indicador de SLEP con UAT-TP"""
         
@@ -427,6 +435,7 @@ def register_indicadores_mds_callbacks(app):
          Output('mds-comp3-frecuencia', 'figure')],
         [Input('mds-tabs', 'active_tab')]
     )
+    @figure_cache.memoize('mds_comp3_redes')
     def update_comp3_redes(active_tab):
         """Actualiza indicador de participación en redes"""
         
@@ -2,17 +2,19 @@
 ============================================================================
 CALLBACKS PARA MAPAS GEOGRÁFICOS
 ============================================================================
-Maneja la interacción con los mapas de Chile (regional y comunal)
+Maneja la interacción con los mapas de Chile (regional, provincial y comunal)
+y la búsqueda de establecimientos por cercanía
 """
 
-from dash import Input, Output, State, callback
+from dash import Input, Output, Patch, State, callback, no_update
+from src.data.busqueda_cercania import busqueda_cercania, centroides_comunas
 from src.layouts.mapas import (
-    create_chile_map, 
-    create_establecimientos_map,
-    create_chile_comunas_map,
-    create_establecimientos_comunas_map,
-    create_tabla_resumen_matricula,
-    create_tabla_resumen_establecimientos
+    mapas_bundle,
+    create_establecimientos_puntos_map,
+    traza_establecimientos,
+    viewport_desde_relayout,
+    create_cercania_map,
+    create_tabla_cercania
 )
 from src.utils.audit import audit_logger
 
@@ -24,25 +26,28 @@ from src.utils.audit import audit_logger
         Output('mapa-num-territorios', 'children'),
         Output('mapa-label-territorios', 'children'),
         Output('tabla-resumen-matricula', 'children'),
-        Output('tabla-resumen-establecimientos', 'children')
+        Output('tabla-resumen-establecimientos', 'children'),
+        Output('mapa-estado', 'data')
     ],
     [
         Input('mapa-granularidad', 'value')
     ],
     [
-        State('session-store', 'data')
+        State('session-store', 'data'),
+        State('mapa-estado', 'data')
     ]
 )
-def update_mapas_granularidad(granularidad, session_data):
+def update_mapas_granularidad(granularidad, session_data, estado):
     """
-    Actualiza los mapas y tablas según la granularidad seleccionada (regional o comunal)
+    Actualiza los mapas y tablas según la granularidad seleccionada (regional, provincial o comunal)
     
     Args:
-        granularidad: 'regional' o 'comunal'
+        granularidad: 'regional', 'provincial' o 'comunal'
         session_data: Datos de sesión del usuario
+        estado: Granularidad y versión de datos que muestra el cliente
         
     Returns:
-        tuple: (fig_matricula, fig_establecimientos, num_territorios, label_territorios, tabla_mat, tabla_est)
+        tuple: (fig_matricula, fig_establecimientos, num_territorios, label_territorios, tabla_mat, tabla_est, estado)
     """
     print(f"🗺️  Callback de mapas ejecutado con granularidad: {granularidad}")
     
@@ -56,27 +61,113 @@ def update_mapas_granularidad(granularidad, session_data):
         )
         print(f"📝 Auditoría: {username} visualizó mapas ({granularidad})")
     
-    if granularidad == 'comunal':
-        # Mapas comunales
-        print("Generando mapas comunales...")
-        fig_matricula = create_chile_comunas_map()
-        fig_establecimientos = create_establecimientos_comunas_map()
-        num_territorios = "345"
-        label_territorios = "Comunas"
-        print("✓ Mapas comunales generados")
-    else:
-        # Mapas regionales (default)
-        print("Generando mapas regionales...")
-        fig_matricula = create_chile_map()
-        fig_establecimientos = create_establecimientos_map()
-        num_territorios = "16"
-        label_territorios = "Regiones"
-        print("✓ Mapas regionales generados")
+    # Figuras, tablas y KPI precalculados por versión de datos; si el cliente ya
+    # muestra la misma geometría las figuras llegan como Patch (solo valores)
+    return mapas_bundle.actualizacion(granularidad, estado)
+
+
+@callback(
+    Output('mapa-establecimientos-puntos', 'figure'),
+    Input('mapa-establecimientos-puntos', 'relayoutData')
+)
+def update_mapa_establecimientos_puntos(relayout):
+    """
+    Entrega los marcadores de establecimientos del viewport al hacer zoom o desplazar el mapa
+    
+    Args:
+        relayout: relayoutData del mapa (None en la carga inicial)
+        
+    Returns:
+        Figura completa en la carga inicial; después un Patch que reemplaza
+        solo la traza (agrupada en el servidor según el zoom)
+    """
+    if relayout is None:
+        return create_establecimientos_puntos_map()
+    
+    viewport = viewport_desde_relayout(relayout)
+    if viewport is None:
+        return no_update
     
-    # Generar tablas
-    print("Generando tablas resumen...")
-    tabla_matricula = create_tabla_resumen_matricula(granularidad)
-    tabla_establecimientos = create_tabla_resumen_establecimientos(granularidad)
-    print("✓ Tablas generadas")
+    zoom, bbox = viewport
+    parche = Patch()
+    parche['data'][0] = traza_establecimientos(zoom, bbox)
+    return parche
+
+
+@callback(
+    [
+        Output('cercania-comuna', 'options'),
+        Output('cercania-especialidad', 'options'),
+        Output('cercania-dependencia', 'options')
+    ],
+    Input('tabs-mapas', 'active_tab')
+)
+def update_opciones_cercania(active_tab):
+    """
+    Carga las opciones de la búsqueda por cercanía al abrir su pestaña
+    """
+    if active_tab != 'tab-cercania':
+        return no_update, no_update, no_update
+    
+    comunas = centroides_comunas()
+    return (
+        [{'label': comuna, 'value': int(codigo)} for codigo, comuna in zip(comunas['cod_comuna'], comunas['Comuna'])],
+        [{'label': especialidad, 'value': especialidad} for especialidad in busqueda_cercania.especialidades()],
+        [{'label': dependencia, 'value': dependencia} for dependencia in busqueda_cercania.dependencias()]
+    )
+
+
+@callback(
+    [
+        Output('mapa-cercania', 'figure'),
+        Output('tabla-cercania', 'children'),
+        Output('cercania-resumen', 'children')
+    ],
+    Input('cercania-buscar', 'n_clicks'),
+    [
+        State('cercania-comuna', 'value'),
+        State('cercania-especialidad', 'value'),
+        State('cercania-dependencia', 'value'),
+        State('cercania-radio', 'value'),
+        State('cercania-k', 'value')
+    ]
+)
+def buscar_cercania(n_clicks, cod_comuna, especialidad, dependencia, radio_km, k):
+    """
+    Busca los establecimientos cercanos al centro de la comuna seleccionada
+    
+    Args:
+        n_clicks: Clics en Buscar
+        cod_comuna: Código de la comuna de origen
+        especialidad: Especialidad que debe impartir el establecimiento (opcional)
+        dependencia: Dependencia del establecimiento (opcional)
+        radio_km: Radio de búsqueda (vacío: los k más cercanos)
+        k: Máximo de resultados
+        
+    Returns:
+        tuple: (figura, tabla, resumen)
+    """
+    if not n_clicks or cod_comuna is None:
+        return create_cercania_map(), create_tabla_cercania(None), "Establecimientos cercanos"
+    
+    comunas = centroides_comunas()
+    fila = comunas.loc[comunas['cod_comuna'] == int(cod_comuna)]
+    if fila.empty:
+        return create_cercania_map(), create_tabla_cercania(None), "Comuna sin límites geográficos"
+    origen = fila.iloc[0].to_dict()
+    
+    k = int(k) if k else 20
+    if radio_km:
+        resultados = busqueda_cercania.en_radio(
+            origen['lat'], origen['lon'], float(radio_km), especialidad, dependencia, limite=k
+        )
+        resumen = f"{len(resultados)} establecimientos a menos de {float(radio_km):g} km de {origen['Comuna']}"
+    else:
+        resultados = busqueda_cercania.cercanos(origen['lat'], origen['lon'], k, especialidad, dependencia)
+        resumen = f"{len(resultados)} establecimientos más cercanos a {origen['Comuna']}"
     
-    return fig_matricula, fig_establecimientos, num_territorios, label_territorios, tabla_matricula, tabla_establecimientos
+    return (
+        create_cercania_map(origen, resultados, float(radio_km) if radio_km else None),
+        create_tabla_cercania(resultados),
+        resumen
+    )
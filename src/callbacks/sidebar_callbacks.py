@@ -6,12 +6,11 @@ CALLBACKS PARA LAYOUT CON SIDEBAR Y DATOS REALES
 
 from dash import Input, Output, State, callback_context, html, callback
 import dash_bootstrap_components as dbc
-from src.layouts.real_data_content import create_real_kpi_cards, create_real_chart, create_real_table
+from src.layouts.real_data_content import create_real_kpi_cards, create_real_chart, create_real_table, query_context
 from src.layouts.mapas import create_mapas_layout
 from src.utils.helpers import format_chilean
 from src.utils.audit import audit_logger
-import pandas as pd
-import os
+from src.data.territorio import indice_comunas
 
 
 def create_breadcrumb(items):
@@ -760,6 +759,9 @@ def create_inicio_content():
 def create_matricula_content(subtab='evolucion', filters=None):
     """Crea contenido para la sección de matrícula"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     subtab_config = {
         'evolucion': {
             'title': html.Span([html.I(className="fas fa-chart-area me-2"), "Evolución Anual de la Matrícula EMTP"]),
@@ -798,7 +800,7 @@ def create_matricula_content(subtab='evolucion', filters=None):
         html.H2(config['title'], className="mb-4 text-primary-custom"),
         
         # KPIs
-        create_real_kpi_cards('matricula', filters),
+        create_real_kpi_cards('matricula', filters, context=ctx),
         
         html.Hr(className="my-4"),
         
@@ -806,11 +808,11 @@ def create_matricula_content(subtab='evolucion', filters=None):
         dbc.Row([
             dbc.Col([
                 create_real_chart('matricula', config['charts'][0]['type'], 
-                                config['charts'][0]['title'], filters)
+                                config['charts'][0]['title'], filters, context=ctx)
             ], md=6),
             dbc.Col([
                 create_real_chart('matricula', config['charts'][1]['type'], 
-                                config['charts'][1]['title'], filters)
+                                config['charts'][1]['title'], filters, context=ctx)
             ], md=6)
         ]),
         
@@ -819,7 +821,7 @@ def create_matricula_content(subtab='evolucion', filters=None):
             html.I(className="fas fa-table me-2", style={"color": "var(--primary-color)"}),
             "Datos Detallados"
         ], className="mt-4 mb-3"),
-        create_real_table('matricula', filters),
+        create_real_table('matricula', filters, context=ctx),
         
         # Botones de exportación
         create_export_buttons('matricula', subtab)
@@ -829,22 +831,25 @@ def create_matricula_content(subtab='evolucion', filters=None):
 def create_egresados_content(subtab='transicion', filters=None):
     """Crea contenido para la sección de egresados"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     return html.Div([
         html.H2([
             html.I(className="fas fa-graduation-cap me-2"),
             "Egresados EMTP en Educación Superior"
         ], className="mb-4 text-secondary-custom"),
         
-        create_real_kpi_cards('egresados', filters),
+        create_real_kpi_cards('egresados', filters, context=ctx),
         
         html.Hr(className="my-4"),
         
         dbc.Row([
             dbc.Col([
-                create_real_chart('egresados', 'line', 'Evolución Tasa de Transición', filters)
+                create_real_chart('egresados', 'line', 'Evolución Tasa de Transición', filters, context=ctx)
             ], md=6),
             dbc.Col([
-                create_real_chart('egresados', 'bar', 'Transición por Especialidad', filters)
+                create_real_chart('egresados', 'bar', 'Transición por Especialidad', filters, context=ctx)
             ], md=6)
         ]),
         
@@ -852,7 +857,7 @@ def create_egresados_content(subtab='transicion', filters=None):
             html.I(className="fas fa-table me-2", style={"color": "var(--primary-color)"}),
             "Datos Detallados"
         ], className="mt-4 mb-3"),
-        create_real_table('egresados', filters),
+        create_real_table('egresados', filters, context=ctx),
         
         # Botones de exportación
         create_export_buttons('egresados', subtab)
@@ -862,6 +867,9 @@ def create_egresados_content(subtab='transicion', filters=None):
 def create_titulacion_content(subtab='evolucion', filters=None):
     """Crea contenido para la sección de titulación"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     return html.Div([
         html.H2([
             html.Span([
@@ -870,16 +878,16 @@ def create_titulacion_content(subtab='evolucion', filters=None):
             ])
         ], className="mb-4 text-green"),
         
-        create_real_kpi_cards('titulacion', filters),
+        create_real_kpi_cards('titulacion', filters, context=ctx),
         
         html.Hr(className="my-4"),
         
         dbc.Row([
             dbc.Col([
-                create_real_chart('titulacion', 'line', 'Evolución de Titulados por Año', filters)
+                create_real_chart('titulacion', 'line', 'Evolución de Titulados por Año', filters, context=ctx)
             ], md=6),
             dbc.Col([
-                create_real_chart('titulacion', 'bar', 'Tasa de Titulación por Especialidad', filters)
+                create_real_chart('titulacion', 'bar', 'Tasa de Titulación por Especialidad', filters, context=ctx)
             ], md=6)
         ]),
         
@@ -887,7 +895,7 @@ def create_titulacion_content(subtab='evolucion', filters=None):
             html.I(className="fas fa-table me-2", style={"color": "var(--primary-color)"}),
             "Datos Detallados"
         ], className="mt-4 mb-3"),
-        create_real_table('titulacion', filters),
+        create_real_table('titulacion', filters, context=ctx),
         
         # Botones de exportación
         create_export_buttons('titulacion', subtab)
@@ -897,22 +905,25 @@ def create_titulacion_content(subtab='evolucion', filters=None):
 def create_establecimientos_content(subtab='geografia', filters=None):
     """Crea contenido para la sección de establecimientos"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     return html.Div([
         html.H2([
             html.I(className="fas fa-school me-2"),
             "Establecimientos EMTP Nacional"
         ], className="mb-4 text-orange"),
         
-        create_real_kpi_cards('establecimientos', filters),
+        create_real_kpi_cards('establecimientos', filters, context=ctx),
         
         html.Hr(className="my-4"),
         
         dbc.Row([
             dbc.Col([
-                create_real_chart('establecimientos', 'bar', 'Establecimientos por Región', filters)
+                create_real_chart('establecimientos', 'bar', 'Establecimientos por Región', filters, context=ctx)
             ], md=6),
             dbc.Col([
-                create_real_chart('establecimientos', 'pie', 'Distribución por Dependencia', filters)
+                create_real_chart('establecimientos', 'pie', 'Distribución por Dependencia', filters, context=ctx)
             ], md=6)
         ]),
         
@@ -920,7 +931,7 @@ def create_establecimientos_content(subtab='geografia', filters=None):
             html.I(className="fas fa-table me-2", style={"color": "var(--primary-color)"}),
             "Datos Detallados"
         ], className="mt-4 mb-3"),
-        create_real_table('establecimientos', filters),
+        create_real_table('establecimientos', filters, context=ctx),
         
         # Botones de exportación
         create_export_buttons('establecimientos', subtab)
@@ -930,22 +941,25 @@ def create_establecimientos_content(subtab='geografia', filters=None):
 def create_docentes_content(subtab='distribucion', filters=None):
     """Crea contenido para la sección de docentes"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     return html.Div([
         html.H2([
             html.I(className="fas fa-chalkboard-teacher me-2"),
             "Docentes de Especialidad EMTP"
         ], className="mb-4 text-purple"),
         
-        create_real_kpi_cards('docentes', filters),
+        create_real_kpi_cards('docentes', filters, context=ctx),
         
         html.Hr(className="my-4"),
         
         dbc.Row([
             dbc.Col([
-                create_real_chart('docentes', 'bar', 'Docentes por Especialidad', filters)
+                create_real_chart('docentes', 'bar', 'Docentes por Especialidad', filters, context=ctx)
             ], md=6),
             dbc.Col([
-                create_real_chart('docentes', 'pie', 'Distribución por Género', filters)
+                create_real_chart('docentes', 'pie', 'Distribución por Género', filters, context=ctx)
             ], md=6)
         ]),
         
@@ -953,7 +967,7 @@ def create_docentes_content(subtab='distribucion', filters=None):
             html.I(className="fas fa-table me-2", style={"color": "var(--primary-color)"}),
             "Datos Detallados"
         ], className="mt-4 mb-3"),
-        create_real_table('docentes', filters),
+        create_real_table('docentes', filters, context=ctx),
         
         # Botones de exportación
         create_export_buttons('docentes', subtab)
@@ -963,6 +977,9 @@ def create_docentes_content(subtab='distribucion', filters=None):
 def create_proyectos_content(subtab='administrativa', filters=None):
     """Crea contenido para la sección de monitoreo y seguimiento de proyectos con sub-subpestañas"""
     
+    # Un solo contexto por render: cada dataset se filtra una vez para todos los widgets
+    ctx = query_context(filters)
+    
     # Definir contenido según subtab principal
     if subtab == 'administrativa':
         # Gestión Administrativa y Financiera con sub-tabs
@@ -975,7 +992,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
             html.P("Seguimiento de convenios, rendiciones y gestión financiera", className="text-gray-dark mb-4"),
             
             # KPIs
-            create_real_kpi_cards('proyectos', filters),
+            create_real_kpi_cards('proyectos', filters, context=ctx),
             
             html.Hr(className="my-4"),
             
@@ -994,7 +1011,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Estado de Convenios por Región", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Convenios por Estado', filters)
+                                        create_real_chart('proyectos', 'bar', 'Convenios por Estado', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1002,7 +1019,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Vigencia de Convenios", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Distribución por Vigencia', filters)
+                                        create_real_chart('proyectos', 'pie', 'Distribución por Vigencia', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1013,7 +1030,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Timeline de Convenios", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'line', 'Evolución Temporal de Convenios', filters)
+                                        create_real_chart('proyectos', 'line', 'Evolución Temporal de Convenios', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=12)
@@ -1023,7 +1040,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle de Convenios"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Convenios Activos", tab_id="tab-convenios",
                    label_style={"color": "#5A6E79"}, 
@@ -1042,7 +1059,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Estado de Rendiciones", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Aprobadas vs Pendientes', filters)
+                                        create_real_chart('proyectos', 'pie', 'Aprobadas vs Pendientes', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1050,7 +1067,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Montos Rendidos por Región", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Montos Rendidos', filters)
+                                        create_real_chart('proyectos', 'bar', 'Montos Rendidos', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1061,7 +1078,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Cumplimiento de Plazos", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'line', 'Rendiciones en el Tiempo', filters)
+                                        create_real_chart('proyectos', 'line', 'Rendiciones en el Tiempo', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=12)
@@ -1071,7 +1088,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle de Rendiciones"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Rendiciones", tab_id="tab-rendiciones",
                    label_style={"color": "#5A6E79"}, 
@@ -1093,7 +1110,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
             html.P("Indicadores técnicos: Equipamiento, RFT, Apoyo SLEP", className="text-gray-dark mb-4"),
             
             # KPIs
-            create_real_kpi_cards('proyectos', filters),
+            create_real_kpi_cards('proyectos', filters, context=ctx),
             
             html.Hr(className="my-4"),
             
@@ -1112,7 +1129,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Equipamiento Regular por Región", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Distribución Regional', filters)
+                                        create_real_chart('proyectos', 'bar', 'Distribución Regional', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1120,7 +1137,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Tipo de Equipamiento", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Categorías', filters)
+                                        create_real_chart('proyectos', 'pie', 'Categorías', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1131,7 +1148,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Avance de Entrega", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'line', 'Evolución Temporal', filters)
+                                        create_real_chart('proyectos', 'line', 'Evolución Temporal', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=12)
@@ -1141,7 +1158,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle de Equipamiento Regular"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Equipamiento Regular", tab_id="tab-equipamiento-regular",
                    label_style={"color": "#5A6E79"}, 
@@ -1160,7 +1177,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Equipamiento SLEP por Región", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Distribución por SLEP', filters)
+                                        create_real_chart('proyectos', 'bar', 'Distribución por SLEP', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1168,7 +1185,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Estado de Implementación", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Avance por Estado', filters)
+                                        create_real_chart('proyectos', 'pie', 'Avance por Estado', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1179,7 +1196,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Timeline de Implementación", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'line', 'Cronograma', filters)
+                                        create_real_chart('proyectos', 'line', 'Cronograma', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=12)
@@ -1189,7 +1206,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle de Equipamiento SLEP"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Equipamiento SLEP", tab_id="tab-equipamiento-slep",
                    label_style={"color": "#5A6E79"}, 
@@ -1211,7 +1228,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Avance RFT por Región", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Porcentaje de Avance', filters)
+                                        create_real_chart('proyectos', 'bar', 'Porcentaje de Avance', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1219,7 +1236,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Establecimientos Participantes", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Cobertura', filters)
+                                        create_real_chart('proyectos', 'pie', 'Cobertura', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1230,7 +1247,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Evolución Temporal RFT", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'line', 'Progreso en el Tiempo', filters)
+                                        create_real_chart('proyectos', 'line', 'Progreso en el Tiempo', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=12)
@@ -1240,7 +1257,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle Red Futuro Técnico"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Red Futuro Técnico", tab_id="tab-rft",
                    label_style={"color": "#5A6E79"}, 
@@ -1259,7 +1276,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Distribución por SLEP", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'pie', 'Apoyo por SLEP', filters)
+                                        create_real_chart('proyectos', 'pie', 'Apoyo por SLEP', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6),
@@ -1267,7 +1284,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                                 dbc.Card([
                                     dbc.CardHeader("Tipo de Apoyo", className="bg-light-custom border-0 fw-bold"),
                                     dbc.CardBody([
-                                        create_real_chart('proyectos', 'bar', 'Categorías de Apoyo', filters)
+                                        create_real_chart('proyectos', 'bar', 'Categorías de Apoyo', filters, context=ctx)
                                     ])
                                 ], className="border-accent-custom shadow-sm mb-4")
                             ], md=6)
@@ -1277,7 +1294,7 @@ def create_proyectos_content(subtab='administrativa', filters=None):
                             html.I(className="fas fa-table me-2"),
                             "Detalle Apoyo SLEP"
                         ], className="mt-3 mb-3"),
-                        create_real_table('proyectos', filters)
+                        create_real_table('proyectos', filters, context=ctx)
                     ], className="p-3")
                 ], label="Apoyo SLEP", tab_id="tab-slep",
                    label_style={"color": "#5A6E79"}, 
@@ -1428,27 +1445,9 @@ def update_comunas_dropdown(region_seleccionada):
     Returns:
         tuple: (opciones_comunas, valor_por_defecto)
     """
-    data_path = "data/processed/matricula_comunal_simulada.csv"
-    
-    if not os.path.exists(data_path):
-        return [{'label': 'Todas las comunas', 'value': 'Todas las comunas'}], 'Todas las comunas'
-    
     try:
-        df = pd.read_csv(data_path)
-        
-        # Si se selecciona "Todas las regiones", mostrar todas las comunas
-        if region_seleccionada == 'Todas las regiones' or not region_seleccionada:
-            comunas = sorted(df['comuna'].unique())
-        else:
-            # Filtrar comunas por región
-            df_region = df[df['region'] == region_seleccionada]
-            comunas = sorted(df_region['comuna'].unique())
-        
-        # Crear opciones
-        opciones = [{'label': 'Todas las comunas', 'value': 'Todas las comunas'}]
-        opciones.extend([{'label': comuna, 'value': comuna} for comuna in comunas])
-        
-        return opciones, 'Todas las comunas'
+        # Opciones precalculadas por región (índice en memoria)
+        return indice_comunas.get_opciones(region_seleccionada), 'Todas las comunas'
         
     except Exception as e:
         print(f"⚠️ Error actualizando comunas: {e}")
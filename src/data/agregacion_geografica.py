@@ -0,0 +1,126 @@
+"""
+Agregación geográfica compartida de la matrícula comunal
+
+Los mapas y las tablas resumen de la sección de mapas leían cada uno
+matricula_comunal_simulada.csv y agrupaban por su cuenta a nivel de región
+o comuna (seis lecturas y seis groupby por vista). Aquí se hace una sola
+pasada vectorizada sobre las filas, por versión de datos:
+
+    filas ──groupby(cod_comuna)──▶ comunas ──▶ provincias
+                                          └──▶ regiones
+
+El nivel comunal trae la jerarquía territorial (codregion, codprovincia,
+provincia; ver src/data/dimension_territorial.py) y la estimación de
+establecimientos por comuna; provincias y regiones se obtienen sumando las
+comunas (unos cientos de filas). Los DataFrames entregados se comparten
+entre llamadas y no deben modificarse.
+"""
+
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.dimension_territorial import agregar_jerarquia
+from src.data.territorio import COMUNAL_DATA_PATH, cargar_matricula_comunal
+
+logger = logging.getLogger(__name__)
+
+# Estudiantes por establecimiento (estimación mientras no hay datos de establecimientos)
+ESTUDIANTES_POR_ESTABLECIMIENTO = 100
+
+
+def estimar_establecimientos(matricula) -> np.ndarray:
+    """
+    Establecimientos estimados para una matrícula (al menos 1)
+    """
+    return np.maximum(1, np.asarray(matricula, dtype=np.int64) // ESTUDIANTES_POR_ESTABLECIMIENTO)
+
+
+class AgregacionGeografica:
+    """
+    Medidas de matrícula por comuna, provincia y región en una sola pasada
+    """
+
+    def __init__(self, data_path: Path = COMUNAL_DATA_PATH):
+        self.data_path = Path(data_path)
+        self._version = None
+        self._niveles: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _version_datos(self) -> Optional[List[int]]:
+        """
+        Versión de los datos de origen: [mtime_ns, tamaño] del CSV
+        """
+        try:
+            stat = os.stat(self.data_path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @staticmethod
+    def _sumar(comunas: pd.DataFrame, clave: str, nombres: List[str]) -> pd.DataFrame:
+        """
+        Suma las medidas comunales por ``clave`` conservando los nombres del nivel
+        """
+        nivel = comunas.groupby(clave, sort=True).agg(
+            **{nombre: (nombre, 'first') for nombre in nombres},
+            matricula_total=('matricula_total', 'sum'),
+            establecimientos=('establecimientos', 'sum'),
+            comunas=('cod_comuna', 'size')
+        )
+        return nivel.reset_index()
+
+    def _construir(self) -> Dict[str, pd.DataFrame]:
+        """
+        Calcula los tres niveles desde las filas del CSV comunal
+        """
+        df = cargar_matricula_comunal()
+        if df is None:
+            raise FileNotFoundError(self.data_path)
+
+        comunas = df.groupby('cod_comuna', sort=True).agg(
+            comuna=('comuna', 'first'),
+            region=('region', 'first'),
+            matricula_total=('matricula_total', 'sum')
+        ).reset_index()
+        comunas = comunas.astype({
+            'cod_comuna': 'int64', 'comuna': str, 'region': str, 'matricula_total': 'int64'
+        })
+        comunas = agregar_jerarquia(comunas)
+        comunas['provincia'] = comunas['provincia'].cat.add_categories('Sin provincia').fillna('Sin provincia').astype(str)
+        comunas['establecimientos'] = estimar_establecimientos(comunas['matricula_total'])
+
+        return {
+            'comunas': comunas,
+            'provincias': self._sumar(comunas, 'codprovincia', ['provincia', 'region', 'codregion']),
+            'regiones': self._sumar(comunas, 'codregion', ['region']),
+        }
+
+    def get(self, nivel: str) -> pd.DataFrame:
+        """
+        Medidas de un nivel territorial ('comunas', 'provincias' o 'regiones')
+
+        Columnas: código y nombres del nivel, matricula_total, establecimientos
+        (suma de las estimaciones comunales) y, en provincias y regiones, el
+        número de comunas.
+        """
+        version = self._version_datos()
+        if version is None or version != self._version:
+            with self._lock:
+                if version is None or version != self._version:
+                    self._niveles = self._construir()
+                    self._version = version
+                    logger.info(
+                        f"🗺️  Agregación geográfica: {len(self._niveles['comunas'])} comunas, "
+                        f"{len(self._niveles['provincias'])} provincias, {len(self._niveles['regiones'])} regiones"
+                    )
+        return self._niveles[nivel]
+
+
+# Instancia global para usar en toda la app
+agregacion_geografica = AgregacionGeografica()
@@ -0,0 +1,334 @@
+"""
+Base común de los backends analíticos que leen directamente los archivos
+
+DuckDB y Polars (src/data/duckdb_backend.py, src/data/polars_backend.py)
+reciben los mismos predicados del dashboard y las mismas medidas, y solo
+entregan a pandas los grupos ya agregados. Las medidas se declaran como
+
+    {nombre: (operación, columna[, valor])}
+
+con las operaciones de OPERACIONES, que reproducen las reducciones de pandas
+que usaban las secciones:
+
+    suma       df[col].sum()              (enteros para columnas enteras o booleanas)
+    promedio   suma exacta / conteo       (ver promedio_exacto)
+    conteo     df[col].count()            (valores no nulos)
+    filas      len(df)
+    distintos  df[col].nunique()
+    iguales    (df[col] == valor).sum()
+    suma_escalada  escalar(df[col]).sum()
+
+resumir_pandas evalúa las mismas medidas sobre un DataFrame ya cargado, de
+modo que el backend pandas y los backends de archivos comparten la
+definición de cada KPI, gráfico y tabla.
+
+Los promedios no usan el mean/AVG de cada motor: cada uno suma los valores
+en su propio orden y el resultado puede diferir en el último bit, lo que
+basta para que un valor en el empate de redondeo (17,65 meses) se muestre
+como 17,6 en un backend y 17,7 en otro. Cada motor entrega en su lugar la
+suma de los valores escalados a enteros (suma_escalada, en unidades de
+1/ESCALA_PROMEDIO) y el conteo; sumar enteros en float64 es exacto en
+cualquier orden mientras el total no supere 2**53 unidades (unos 9e9 en
+la unidad de la columna), y la división se hace aquí, igual para todos.
+
+Los CSV no se consultan directamente: parsear el texto completo en cada
+consulta cuesta más que la agregación misma. Cada backend escribe una vez
+por versión del archivo (mtime, tamaño) una copia Parquet en
+COLUMNAR_CACHE_DIR, en streaming con su propio motor, y consulta esa copia
+(lectura columnar, solo las columnas usadas y estadísticas por row group).
+"""
+
+import os
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Rango de años (mín, máx) y {columna: valores aceptados}
+Predicados = Tuple[Optional[Tuple[int, int]], Dict[str, List]]
+
+# (operación, columna[, valor])
+Medida = Tuple[Any, ...]
+
+OPERACIONES = ('suma', 'promedio', 'conteo', 'filas', 'distintos', 'iguales', 'suma_escalada')
+
+# Tipo de cada columna según el backend: entero, decimal, booleano u otro
+ENTERO, DECIMAL, BOOLEANO, OTRO = 'entero', 'decimal', 'booleano', 'otro'
+
+# Unidades por unidad de la columna en las sumas de los promedios: los
+# valores se redondean a 6 decimales (las fuentes traen a lo más 4)
+ESCALA_PROMEDIO = 10 ** 6
+
+
+def escalar(serie: pd.Series) -> pd.Series:
+    """
+    Valores como enteros en unidades de 1/ESCALA_PROMEDIO (float64, NaN se mantiene)
+
+    floor(x * ESCALA + 0.5) se evalúa igual en pandas, DuckDB y Polars.
+    """
+    return np.floor(serie.astype('float64') * ESCALA_PROMEDIO + 0.5)
+
+
+def promedio_exacto(suma_escalada, n):
+    """
+    Promedio desde la suma escalada y el conteo (NaN si no hay valores)
+    """
+    return suma_escalada / ESCALA_PROMEDIO / n.where(n > 0)
+
+
+def _expandir(medidas: Mapping[str, Medida]) -> Dict[str, Medida]:
+    """
+    Reemplaza cada promedio por su suma escalada y su conteo
+    """
+    expandidas: Dict[str, Medida] = {}
+    for nombre, medida in medidas.items():
+        if medida[0] == 'promedio':
+            expandidas[f'__{nombre}_suma'] = ('suma_escalada', medida[1])
+            expandidas[f'__{nombre}_n'] = ('conteo', medida[1])
+        else:
+            expandidas[nombre] = medida
+    return expandidas
+
+
+def _combinar(resultado: pd.DataFrame, por: Sequence[str], medidas: Mapping[str, Medida]) -> pd.DataFrame:
+    """
+    Divide las sumas escaladas por sus conteos y deja las columnas en el orden de ``medidas``
+    """
+    for nombre, medida in medidas.items():
+        if medida[0] == 'promedio':
+            resultado[nombre] = promedio_exacto(resultado[f'__{nombre}_suma'], resultado[f'__{nombre}_n'])
+    return resultado[list(por) + list(medidas)]
+
+
+def clave_archivo(path) -> str:
+    """
+    Ruta resuelta con la firma del archivo (mtime, tamaño)
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return str(path)
+    return f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _reducir(df: pd.DataFrame, medida: Medida):
+    """
+    Valor de una medida sobre todas las filas de ``df``
+    """
+    operacion, columna = medida[0], medida[1]
+    if operacion == 'suma':
+        return df[columna].sum()
+    if operacion == 'suma_escalada':
+        return escalar(df[columna]).sum()
+    if operacion == 'conteo':
+        return df[columna].count()
+    if operacion == 'filas':
+        return len(df)
+    if operacion == 'distintos':
+        return df[columna].nunique()
+    if operacion == 'iguales':
+        return (df[columna] == medida[2]).sum()
+    raise ValueError(f"Operación desconocida: {operacion}")
+
+
+def resumir_pandas(df: pd.DataFrame, por: Sequence[str], medidas: Mapping[str, Medida]) -> pd.DataFrame:
+    """
+    Evalúa las medidas sobre un DataFrame en memoria (backend pandas)
+
+    Returns:
+        Una fila por grupo de ``por`` (ordenados), o una sola fila sin ``por``
+    """
+    expandidas = _expandir(medidas)
+    if not por:
+        resultado = pd.DataFrame({nombre: [_reducir(df, medida)] for nombre, medida in expandidas.items()})
+        return _combinar(resultado, por, medidas)
+
+    # Las medidas 'iguales' y 'suma_escalada' se agregan como suma de una columna auxiliar
+    auxiliares = {}
+    for nombre, medida in expandidas.items():
+        if medida[0] == 'iguales':
+            auxiliares[f'__{nombre}'] = df[medida[1]] == medida[2]
+        elif medida[0] == 'suma_escalada':
+            auxiliares[f'__{nombre}'] = escalar(df[medida[1]])
+    base = df.assign(**auxiliares) if auxiliares else df
+    grupos = base.groupby(list(por), observed=True)
+
+    funciones = {'suma': 'sum', 'conteo': 'count', 'distintos': 'nunique'}
+    agregaciones = {}
+    for nombre, medida in expandidas.items():
+        if medida[0] in ('iguales', 'suma_escalada'):
+            agregaciones[nombre] = (f'__{nombre}', 'sum')
+        elif medida[0] != 'filas':
+            agregaciones[nombre] = (medida[1], funciones[medida[0]])
+
+    agregado = grupos.agg(**agregaciones) if agregaciones else None
+    tamanos = grupos.size() if any(m[0] == 'filas' for m in expandidas.values()) else None
+    resultado = pd.DataFrame({
+        nombre: tamanos if medida[0] == 'filas' else agregado[nombre]
+        for nombre, medida in expandidas.items()
+    })
+    return _combinar(resultado.reset_index(), por, medidas)
+
+
+class BackendArchivos(ABC):
+    """
+    Consultas sobre archivos de datos: columnas, existencia, filas y agregaciones
+
+    Las subclases implementan disponible, _escribir_parquet, _leer_tipos,
+    _tiene_filas, _filas y _resumir; los métodos de archivo reciben siempre
+    el archivo a consultar (la copia Parquet si el original es un CSV).
+    """
+
+    # Subdirectorio de las copias Parquet de este backend
+    nombre = 'archivos'
+
+    def __init__(self, directorio_columnar: Optional[Path] = None):
+        """
+        Args:
+            directorio_columnar: Directorio de las copias Parquet (por defecto COLUMNAR_CACHE_DIR)
+        """
+        self.directorio_columnar = Path(directorio_columnar or settings.COLUMNAR_CACHE_DIR) / self.nombre
+        self._tipos: Dict[str, Dict[str, str]] = {}
+        self._copias: Dict[str, Path] = {}
+        self._lock_copias = threading.Lock()
+
+    @staticmethod
+    @abstractmethod
+    def disponible() -> bool:
+        """True si la dependencia del backend está instalada"""
+
+    @abstractmethod
+    def _escribir_parquet(self, csv: Path, destino: Path):
+        """Escribe ``csv`` como Parquet en ``destino`` sin cargarlo completo"""
+
+    @abstractmethod
+    def _leer_tipos(self, path) -> Dict[str, str]:
+        """{columna: ENTERO | DECIMAL | BOOLEANO | OTRO} leído del archivo"""
+
+    @abstractmethod
+    def _tiene_filas(self, path) -> bool:
+        """True si el archivo tiene al menos una fila"""
+
+    @abstractmethod
+    def _filas(self, path, predicados: Predicados) -> pd.DataFrame:
+        """Filas del archivo que cumplen los predicados, en el orden del archivo"""
+
+    @abstractmethod
+    def _resumir(self, path, predicados: Predicados, por: Sequence[str],
+                 medidas: Mapping[str, Medida], tipos: Dict[str, str]) -> pd.DataFrame:
+        """Medidas (ya expandidas, ver _expandir) agrupadas por ``por``"""
+
+    def origen(self, path) -> Path:
+        """
+        Archivo que se consulta: el mismo, o su copia Parquet si es un CSV
+
+        Si la copia no se puede escribir se consulta el CSV.
+        """
+        path = Path(path)
+        if path.suffix != '.csv' or not path.exists():
+            return path
+
+        clave = clave_archivo(path)
+        copia = self._copias.get(clave)
+        if copia is not None and copia.exists():
+            return copia
+
+        with self._lock_copias:
+            stat = path.stat()
+            copia = self.directorio_columnar / f"{path.stem}.{stat.st_mtime_ns}-{stat.st_size}.parquet"
+            if not copia.exists():
+                temporal = copia.with_name(f"{copia.name}.{os.getpid()}.tmp")
+                try:
+                    copia.parent.mkdir(parents=True, exist_ok=True)
+                    self._escribir_parquet(path, temporal)
+                    os.replace(temporal, copia)
+                except Exception as e:
+                    logger.warning(f"⚠️  No se pudo escribir la copia Parquet de {path.name}: {e}")
+                    temporal.unlink(missing_ok=True)
+                    return path
+                # Copias de versiones anteriores del mismo CSV
+                for anterior in copia.parent.glob(f"{path.stem}.*.parquet"):
+                    if anterior != copia:
+                        anterior.unlink(missing_ok=True)
+                logger.info(f"🗂️  Copia Parquet de {path.name} para {self.nombre}: {copia}")
+            self._copias[clave] = copia
+        return copia
+
+    def tipos(self, path) -> Dict[str, str]:
+        """
+        Tipo de cada columna del archivo (leído una vez por ruta y firma)
+        """
+        origen = self.origen(path)
+        clave = clave_archivo(origen)
+        if clave not in self._tipos:
+            self._tipos[clave] = self._leer_tipos(origen)
+        return self._tipos[clave]
+
+    def columnas(self, path) -> List[str]:
+        """
+        Columnas del archivo
+        """
+        return list(self.tipos(path))
+
+    def tiene_datos(self, path) -> bool:
+        """
+        True si el archivo existe y tiene al menos una fila
+        """
+        return Path(path).exists() and self._tiene_filas(self.origen(path))
+
+    def filas(self, path, predicados: Predicados) -> pd.DataFrame:
+        """
+        Filas del archivo filtrado, materializadas en pandas
+
+        Para los usos que necesitan los registros; los widgets piden
+        solo agregados con resumir.
+        """
+        return self._filas(self.origen(path), predicados)
+
+    def resumir(
+        self,
+        path,
+        predicados: Predicados,
+        por: Sequence[str],
+        medidas: Mapping[str, Medida]
+    ) -> pd.DataFrame:
+        """
+        Evalúa las medidas sobre el archivo filtrado, agrupando por ``por``
+
+        Returns:
+            Una fila por grupo (ordenados por ``por``), o una sola fila sin ``por``
+        """
+        origen = self.origen(path)
+        resultado = self._resumir(origen, predicados, tuple(por), _expandir(medidas), self.tipos(path))
+        return _combinar(resultado, tuple(por), medidas)
+
+    def agregar(
+        self,
+        path,
+        predicados: Predicados,
+        por: Sequence[str],
+        sumas: Sequence[str],
+        promedios: Sequence[str] = ()
+    ) -> pd.DataFrame:
+        """
+        Agrega el archivo filtrado en las mismas medidas que CuboAgregado
+
+        Las sumas se devuelven como enteros; cada promedio como numerador
+        (<col>_suma, suma escalada) y denominador (<col>_n); registros cuenta
+        las filas de cada grupo.
+        """
+        medidas: Dict[str, Medida] = {m: ('suma', m) for m in sumas}
+        for p in promedios:
+            medidas[f'{p}_suma'] = ('suma_escalada', p)
+            medidas[f'{p}_n'] = ('conteo', p)
+        medidas['registros'] = ('filas', None)
+        return self.resumir(path, predicados, por, medidas)
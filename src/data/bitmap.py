@@ -0,0 +1,108 @@
+"""
+Índice de bitmaps para los filtros del dashboard
+
+Por cada dimensión de filtro (región, especialidad, dependencia, género,
+zona) y por cada año se guarda un bitset empaquetado (np.packbits) con las
+filas que tienen ese valor. Un filtro se resuelve como OR de los bitsets de
+los valores elegidos dentro de cada dimensión y AND entre dimensiones; al
+final se desempaquetan las posiciones y se hace un solo ``take``.
+
+No se comparan columnas completas ni se generan copias intermedias, y el
+costo es el mismo con uno o con todos los filtros activos (n/8 bytes por
+bitset). El índice se construye una vez por versión del dataset (ver
+DatasetRegistry.derivado).
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columnas indexadas (las ausentes en el dataset se omiten)
+COLUMNAS_INDEXADAS = ['año', 'region', 'especialidad', 'dependencia', 'genero', 'zona']
+
+
+class BitmapIndex:
+    """
+    Bitsets empaquetados por valor de cada dimensión de un dataset
+    """
+
+    def __init__(self, df: pd.DataFrame, columnas: Sequence[str] = COLUMNAS_INDEXADAS):
+        self.n = len(df)
+        self._bitsets: Dict[str, Dict] = {}
+        for columna in columnas:
+            if columna in df.columns:
+                self._bitsets[columna] = self._indexar(df[columna])
+
+        total = sum(len(b) for b in self._bitsets.values())
+        logger.info(f"🧮 Índice bitmap construido: {self.n:,} filas, {total} bitsets")
+
+    @staticmethod
+    def _indexar(serie: pd.Series) -> Dict:
+        """
+        Un bitset empaquetado por cada valor presente en la columna
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            valores = serie.cat.categories
+        else:
+            codigos, valores = pd.factorize(serie)
+
+        bitsets = {}
+        for i, valor in enumerate(valores):
+            filas = codigos == i
+            if filas.any():
+                bitsets[valor] = np.packbits(filas)
+        return bitsets
+
+    def columnas(self) -> Iterable[str]:
+        return self._bitsets.keys()
+
+    def _union(self, columna: str, valores: Iterable) -> np.ndarray:
+        """
+        OR de los bitsets de ``valores`` en una columna
+        """
+        bitsets = self._bitsets[columna]
+        resultado = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for valor in valores:
+            bits = bitsets.get(valor)
+            if bits is not None:
+                np.bitwise_or(resultado, bits, out=resultado)
+        return resultado
+
+    def seleccionar(
+        self,
+        igualdades: Dict[str, Sequence],
+        rango: Optional[Tuple[str, int, int]] = None
+    ) -> np.ndarray:
+        """
+        Posiciones de las filas que cumplen todos los predicados
+
+        Args:
+            igualdades: {columna: valores aceptados} (OR dentro, AND entre columnas)
+            rango: (columna, mínimo, máximo) inclusivo, p. ej. ('año', 2018, 2022)
+
+        Returns:
+            Posiciones ordenadas (para DataFrame.take)
+        """
+        resultado = None
+        predicados = [(columna, valores) for columna, valores in igualdades.items()]
+        if rango is not None:
+            columna, minimo, maximo = rango
+            predicados.append(
+                (columna, [v for v in self._bitsets[columna] if minimo <= v <= maximo])
+            )
+
+        for columna, valores in predicados:
+            bits = self._union(columna, valores)
+            if resultado is None:
+                resultado = bits
+            else:
+                np.bitwise_and(resultado, bits, out=resultado)
+
+        if resultado is None:
+            return np.arange(self.n)
+        return np.flatnonzero(np.unpackbits(resultado, count=self.n))
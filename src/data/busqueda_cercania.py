@@ -0,0 +1,357 @@
+"""
+Búsqueda de establecimientos por cercanía (árbol KD)
+
+Responde preguntas del tipo "¿qué liceos EMTP que imparten Electricidad
+están a menos de 20 km de la comuna X?" sin recorrer la lista nacional en
+cada consulta. Sobre las coordenadas de cargar_establecimientos se construye,
+una vez por versión de datos, un árbol KD en coordenadas cartesianas de la
+esfera unitaria: la distancia de cuerda es monótona con la distancia
+geodésica (haversine), así que k vecinos y radio se resuelven con podas
+euclidianas exactas y la cuerda se convierte a km al final.
+
+Los filtros por especialidad y dependencia son máscaras booleanas
+precalculadas que el recorrido del árbol aplica hoja a hoja. La especialidad
+que imparte cada establecimiento se toma del año más reciente de
+cache_docentes (RBD × Especialidad).
+
+El árbol está implementado sobre arreglos numpy (sin scipy): nodos en
+arreglos planos, hojas de TAMANO_HOJA puntos evaluadas de forma vectorizada.
+"""
+
+import heapq
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.cluster_establecimientos import cargar_establecimientos_georreferenciados
+from src.data.indice_espacial import indice_espacial_comunas
+from src.data.loaders import data_loader
+
+logger = logging.getLogger(__name__)
+
+RADIO_TIERRA_KM = 6371.0088
+
+# Puntos por hoja del árbol
+TAMANO_HOJA = 32
+
+
+def a_esfera(lat, lon) -> np.ndarray:
+    """
+    Coordenadas (lat, lon) en grados → puntos (x, y, z) de la esfera unitaria
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    coseno = np.cos(lat)
+    return np.column_stack([coseno * np.cos(lon), coseno * np.sin(lon), np.sin(lat)])
+
+
+def cuerda_a_km(cuerda) -> np.ndarray:
+    """Distancia de cuerda en la esfera unitaria → distancia geodésica en km"""
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.clip(np.asarray(cuerda) / 2, 0, 1))
+
+
+def km_a_cuerda(km: float) -> float:
+    """Distancia geodésica en km → distancia de cuerda en la esfera unitaria"""
+    return 2 * np.sin(min(km / RADIO_TIERRA_KM, np.pi) / 2)
+
+
+class ArbolKD:
+    """
+    Árbol KD estático sobre arreglos (nodos planos, hojas de TAMANO_HOJA puntos)
+    """
+
+    def __init__(self, puntos: np.ndarray, tamano_hoja: int = TAMANO_HOJA):
+        """
+        Args:
+            puntos: Arreglo (n, d) de coordenadas
+            tamano_hoja: Máximo de puntos por hoja
+        """
+        self.puntos = np.asarray(puntos, dtype=np.float64)
+        self.indices = np.arange(len(self.puntos))
+
+        inicio, fin, izquierdo, derecho, minimos, maximos = [], [], [], [], [], []
+
+        def nuevo(a, b):
+            bloque = self.puntos[self.indices[a:b]]
+            inicio.append(a)
+            fin.append(b)
+            izquierdo.append(-1)
+            derecho.append(-1)
+            minimos.append(bloque.min(axis=0))
+            maximos.append(bloque.max(axis=0))
+            return len(inicio) - 1
+
+        # Partición por la mediana de la dimensión más extendida de cada nodo
+        pendientes = [nuevo(0, len(self.puntos))] if len(self.puntos) else []
+        while pendientes:
+            nodo = pendientes.pop()
+            a, b = inicio[nodo], fin[nodo]
+            if b - a <= tamano_hoja:
+                continue
+            dimension = int(np.argmax(maximos[nodo] - minimos[nodo]))
+            mitad = (a + b) // 2
+            segmento = self.indices[a:b]
+            self.indices[a:b] = segmento[np.argpartition(self.puntos[segmento, dimension], mitad - a)]
+            izquierdo[nodo] = nuevo(a, mitad)
+            derecho[nodo] = nuevo(mitad, b)
+            pendientes.extend([izquierdo[nodo], derecho[nodo]])
+
+        self._inicio = np.asarray(inicio, dtype=np.int64)
+        self._fin = np.asarray(fin, dtype=np.int64)
+        self._izquierdo = np.asarray(izquierdo, dtype=np.int64)
+        self._derecho = np.asarray(derecho, dtype=np.int64)
+        self._minimos = np.asarray(minimos, dtype=np.float64).reshape(-1, self.puntos.shape[1])
+        self._maximos = np.asarray(maximos, dtype=np.float64).reshape(-1, self.puntos.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.puntos)
+
+    def _distancia_caja(self, nodo: int, q: np.ndarray) -> float:
+        """Distancia² mínima de q a la caja del nodo"""
+        exceso = np.maximum(self._minimos[nodo] - q, 0) + np.maximum(q - self._maximos[nodo], 0)
+        return float(exceso @ exceso)
+
+    def _hoja(self, nodo: int, q: np.ndarray, mascara: Optional[np.ndarray]):
+        """Índices y distancias² de los puntos (filtrados) de una hoja"""
+        indices = self.indices[self._inicio[nodo]:self._fin[nodo]]
+        if mascara is not None:
+            indices = indices[mascara[indices]]
+        diferencia = self.puntos[indices] - q
+        return indices, np.einsum('ij,ij->i', diferencia, diferencia)
+
+    def vecinos(self, q, k: int, mascara: Optional[np.ndarray] = None):
+        """
+        Los k puntos más cercanos a q (que cumplen la máscara)
+
+        Returns:
+            (índices, distancias) ordenados por distancia
+        """
+        q = np.asarray(q, dtype=np.float64)
+        mejores_i = np.empty(0, dtype=np.int64)
+        mejores_d2 = np.empty(0)
+        if not len(self) or k <= 0:
+            return mejores_i, mejores_d2
+
+        # Recorrido best-first: se visitan los nodos por distancia a su caja
+        cola = [(0.0, 0)]
+        while cola:
+            d2, nodo = heapq.heappop(cola)
+            if len(mejores_d2) == k and d2 > mejores_d2.max():
+                break
+            if self._izquierdo[nodo] == -1:
+                indices, distancias = self._hoja(nodo, q, mascara)
+                if not len(indices):
+                    continue
+                mejores_i = np.concatenate([mejores_i, indices])
+                mejores_d2 = np.concatenate([mejores_d2, distancias])
+                if len(mejores_d2) > k:
+                    seleccion = np.argpartition(mejores_d2, k - 1)[:k]
+                    mejores_i, mejores_d2 = mejores_i[seleccion], mejores_d2[seleccion]
+            else:
+                for hijo in (self._izquierdo[nodo], self._derecho[nodo]):
+                    heapq.heappush(cola, (self._distancia_caja(hijo, q), hijo))
+
+        orden = np.argsort(mejores_d2, kind='stable')
+        return mejores_i[orden], np.sqrt(mejores_d2[orden])
+
+    def en_radio(self, q, radio: float, mascara: Optional[np.ndarray] = None):
+        """
+        Puntos a distancia ≤ radio de q (que cumplen la máscara)
+
+        Returns:
+            (índices, distancias) ordenados por distancia
+        """
+        q = np.asarray(q, dtype=np.float64)
+        radio2 = radio * radio
+        encontrados_i, encontrados_d2 = [], []
+        pendientes = [0] if len(self) else []
+        while pendientes:
+            nodo = pendientes.pop()
+            if self._distancia_caja(nodo, q) > radio2:
+                continue
+            if self._izquierdo[nodo] == -1:
+                indices, distancias = self._hoja(nodo, q, mascara)
+                dentro = distancias <= radio2
+                encontrados_i.append(indices[dentro])
+                encontrados_d2.append(distancias[dentro])
+            else:
+                pendientes.extend([self._izquierdo[nodo], self._derecho[nodo]])
+
+        if not encontrados_i:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        indices = np.concatenate(encontrados_i)
+        distancias2 = np.concatenate(encontrados_d2)
+        orden = np.argsort(distancias2, kind='stable')
+        return indices[orden], np.sqrt(distancias2[orden])
+
+
+def cargar_especialidades_por_rbd() -> pd.DataFrame:
+    """
+    Especialidades que imparte cada establecimiento (RBD, Especialidad),
+    según el año más reciente de cache_docentes
+    """
+    df = data_loader.cargar_docentes(columns=['RBD', 'Año', 'Especialidad'])
+    if df.empty or 'Especialidad' not in df.columns:
+        return pd.DataFrame(columns=['RBD', 'Especialidad'])
+    df = df.loc[df['Año'] == df['Año'].max(), ['RBD', 'Especialidad']]
+    return df.astype({'Especialidad': str}).drop_duplicates()
+
+
+def centroides_comunas(resolucion: str = 'media') -> pd.DataFrame:
+    """
+    Centroide de cada comuna desde los polígonos locales (cod_comuna, Comuna, lat, lon)
+    """
+    indice = indice_espacial_comunas(resolucion)
+    return pd.DataFrame({
+        'cod_comuna': indice.codigos,
+        'Comuna': [str(p.get('Comuna', codigo)) for p, codigo in zip(indice.propiedades, indice.codigos)],
+        'lat': indice.centroides[:, 1],
+        'lon': indice.centroides[:, 0],
+    }).sort_values('Comuna').reset_index(drop=True)
+
+
+class BusquedaCercania:
+    """
+    Árbol KD de establecimientos y máscaras de filtro, por versión de datos
+    """
+
+    COLUMNAS = ['RBD', 'NombreEstablecimiento', 'Comuna', 'Dependencia', 'MatriculaEMTP', 'Latitud', 'Longitud']
+
+    def __init__(
+        self,
+        cargar: Callable[[], pd.DataFrame] = cargar_establecimientos_georreferenciados,
+        cargar_especialidades: Callable[[], pd.DataFrame] = cargar_especialidades_por_rbd,
+        version: Callable[[], str] = lambda: data_loader.version
+    ):
+        """
+        Args:
+            cargar: Función que retorna los establecimientos georreferenciados
+            cargar_especialidades: Función que retorna los pares (RBD, Especialidad)
+            version: Función que retorna la versión vigente de los datos
+        """
+        self._cargar = cargar
+        self._cargar_especialidades = cargar_especialidades
+        self._version_actual = version
+        self._version = None
+        self._arbol: Optional[ArbolKD] = None
+        self._establecimientos = pd.DataFrame(columns=self.COLUMNAS)
+        self._por_especialidad: Dict[str, np.ndarray] = {}
+        self._por_dependencia: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _construir(self):
+        """
+        Construye el árbol y las máscaras de especialidad y dependencia
+        """
+        df = self._cargar()[self.COLUMNAS].reset_index(drop=True)
+        rbd = df['RBD'].to_numpy()
+
+        especialidades = self._cargar_especialidades()
+        por_especialidad = {
+            str(especialidad): np.isin(rbd, grupo['RBD'].to_numpy())
+            for especialidad, grupo in especialidades.groupby('Especialidad')
+        }
+        dependencia = df['Dependencia'].astype(str).to_numpy()
+        por_dependencia = {valor: dependencia == valor for valor in np.unique(dependencia)}
+
+        self._arbol = ArbolKD(a_esfera(df['Latitud'], df['Longitud']))
+        self._establecimientos = df
+        self._por_especialidad = por_especialidad
+        self._por_dependencia = por_dependencia
+        logger.info(
+            f"📍 Árbol KD de establecimientos: {len(df)} puntos, "
+            f"{len(por_especialidad)} especialidades, {len(por_dependencia)} dependencias"
+        )
+
+    def _asegurar_vigente(self):
+        """
+        Reconstruye el árbol si cambió la versión de los datos
+        """
+        version = self._version_actual()
+        if version == self._version and self._arbol is not None:
+            return
+        with self._lock:
+            if version == self._version and self._arbol is not None:
+                return
+            self._construir()
+            self._version = version
+
+    def especialidades(self) -> List[str]:
+        """Especialidades disponibles para filtrar"""
+        self._asegurar_vigente()
+        return sorted(self._por_especialidad)
+
+    def dependencias(self) -> List[str]:
+        """Dependencias disponibles para filtrar"""
+        self._asegurar_vigente()
+        return sorted(self._por_dependencia)
+
+    def _mascara(self, especialidad: Optional[str], dependencia: Optional[str]) -> Optional[np.ndarray]:
+        """
+        Máscara de establecimientos que cumplen los filtros (None: sin filtros)
+        """
+        mascara = None
+        for valor, mascaras in ((especialidad, self._por_especialidad), (dependencia, self._por_dependencia)):
+            if not valor:
+                continue
+            filtro = mascaras.get(valor, np.zeros(len(self._establecimientos), dtype=bool))
+            mascara = filtro if mascara is None else mascara & filtro
+        return mascara
+
+    def _resultado(self, indices: np.ndarray, cuerdas: np.ndarray) -> pd.DataFrame:
+        resultado = self._establecimientos.iloc[indices].reset_index(drop=True)
+        resultado['distancia_km'] = cuerda_a_km(cuerdas).round(2)
+        return resultado
+
+    def cercanos(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 10,
+        especialidad: Optional[str] = None,
+        dependencia: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Los k establecimientos más cercanos a un punto
+
+        Returns:
+            Establecimientos (COLUMNAS) con distancia_km, del más cercano al más lejano
+        """
+        self._asegurar_vigente()
+        indices, cuerdas = self._arbol.vecinos(
+            a_esfera(lat, lon)[0], k, self._mascara(especialidad, dependencia)
+        )
+        return self._resultado(indices, cuerdas)
+
+    def en_radio(
+        self,
+        lat: float,
+        lon: float,
+        radio_km: float,
+        especialidad: Optional[str] = None,
+        dependencia: Optional[str] = None,
+        limite: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Establecimientos a menos de radio_km de un punto
+
+        Args:
+            limite: Máximo de resultados (los más cercanos)
+
+        Returns:
+            Establecimientos (COLUMNAS) con distancia_km, del más cercano al más lejano
+        """
+        self._asegurar_vigente()
+        indices, cuerdas = self._arbol.en_radio(
+            a_esfera(lat, lon)[0], km_a_cuerda(radio_km), self._mascara(especialidad, dependencia)
+        )
+        if limite is not None:
+            indices, cuerdas = indices[:limite], cuerdas[:limite]
+        return self._resultado(indices, cuerdas)
+
+
+# Instancia global para usar en toda la app
+busqueda_cercania = BusquedaCercania()
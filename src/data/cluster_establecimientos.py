@@ -0,0 +1,196 @@
+"""
+Capa de puntos de establecimientos con agrupamiento en el servidor
+
+cache_establecimientos trae Latitud/Longitud por RBD. Enviar todos los
+establecimientos a cada cliente no escala, así que se agrupan en una grilla
+sobre la proyección Web Mercator (la del mapa) que depende del zoom:
+
+    celda (ix, iy) en zoom z = floor(x · 2^z · CELDAS_POR_TESELA), igual para y
+
+Con CELDAS_POR_TESELA = 8 cada celda mide 32 px en pantalla a cualquier
+zoom, por lo que un viewport tiene a lo más unos cientos de celdas. Los
+agregados por celda (cantidad, centroide, matrícula) se precalculan para
+cada zoom entero una vez por versión de datos; a partir de ZOOM_PUNTOS se
+entregan los establecimientos individuales del viewport, obtenidos con el
+índice de grilla de src/data/indice_espacial.py (sin recorrer todos los puntos).
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data.indice_espacial import BBox, IndicePuntos
+from src.data.loaders import data_loader
+
+logger = logging.getLogger(__name__)
+
+# Celdas de la grilla por tesela de 256 px (8 → celdas de 32 px)
+CELDAS_POR_TESELA = 8
+
+# Zoom desde el que se muestran establecimientos individuales
+ZOOM_PUNTOS = 12
+
+# Tope de marcadores por respuesta (si se excede se sube de nivel de agrupamiento)
+MAX_MARCADORES = 3000
+
+COLUMNAS = ['RBD', 'NombreEstablecimiento', 'Comuna', 'Dependencia', 'MatriculaEMTP', 'Latitud', 'Longitud']
+
+
+def mercator(lon, lat) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordenadas Web Mercator normalizadas a [0, 1) (x hacia el este, y hacia el sur)
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -85.0511, 85.0511)
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(np.radians(lat)) + 1.0 / np.cos(np.radians(lat))) / np.pi) / 2.0
+    return x, y
+
+
+def cargar_establecimientos_georreferenciados() -> pd.DataFrame:
+    """
+    Establecimientos con coordenadas válidas desde el cache (columnas de COLUMNAS)
+    """
+    df = data_loader.cargar_establecimientos(columns=COLUMNAS)
+    if df.empty or 'Latitud' not in df.columns or 'Longitud' not in df.columns:
+        return pd.DataFrame(columns=COLUMNAS)
+
+    lat = pd.to_numeric(df['Latitud'], errors='coerce')
+    lon = pd.to_numeric(df['Longitud'], errors='coerce')
+    validos = lat.between(-90, 90) & lon.between(-180, 180) & ~((lat == 0) & (lon == 0))
+    return df.loc[validos].assign(Latitud=lat[validos], Longitud=lon[validos]).reset_index(drop=True)
+
+
+class ClusterEstablecimientos:
+    """
+    Agregados de establecimientos por celda de grilla para cada zoom, por versión de datos
+    """
+
+    def __init__(
+        self,
+        cargar: Callable[[], pd.DataFrame] = cargar_establecimientos_georreferenciados,
+        version: Callable[[], str] = lambda: data_loader.version
+    ):
+        """
+        Args:
+            cargar: Función que retorna los establecimientos (columnas de COLUMNAS)
+            version: Función que retorna la versión vigente de los datos
+        """
+        self._cargar = cargar
+        self._version_actual = version
+        self._version = None
+        self._puntos: Optional[pd.DataFrame] = None
+        self._indice: Optional[IndicePuntos] = None
+        self._niveles: Dict[int, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _construir(self):
+        """
+        Precalcula los agregados de todos los zooms de agrupamiento
+        """
+        df = self._cargar()
+        x, y = mercator(df['Longitud'], df['Latitud'])
+        puntos = pd.DataFrame({
+            'lat': df['Latitud'].to_numpy(dtype=np.float64),
+            'lon': df['Longitud'].to_numpy(dtype=np.float64),
+            'x': x,
+            'y': y,
+            'nombre': df['NombreEstablecimiento'].astype(str).to_numpy(),
+            'comuna': df['Comuna'].astype(str).to_numpy(),
+            'matricula': pd.to_numeric(df['MatriculaEMTP'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+        })
+
+        niveles = {}
+        for zoom in range(ZOOM_PUNTOS):
+            celdas = float(2 ** zoom * CELDAS_POR_TESELA)
+            clave = (np.floor(puntos['y'] * celdas).astype(np.int64) * int(celdas)
+                     + np.floor(puntos['x'] * celdas).astype(np.int64))
+            nivel = puntos.groupby(clave.to_numpy(), sort=False).agg(
+                lat=('lat', 'mean'),
+                lon=('lon', 'mean'),
+                n=('lat', 'size'),
+                matricula=('matricula', 'sum'),
+                nombre=('nombre', 'first'),
+                comuna=('comuna', 'first')
+            )
+            niveles[zoom] = nivel.reset_index(drop=True)
+
+        self._puntos = puntos.assign(n=1)
+        self._indice = IndicePuntos(puntos['lon'], puntos['lat'])
+        self._niveles = niveles
+        logger.info(
+            f"📍 Agrupamiento de establecimientos: {len(puntos)} puntos, "
+            f"{len(niveles[0])} a {len(niveles[ZOOM_PUNTOS - 1])} celdas por zoom"
+        )
+
+    def _asegurar_vigente(self):
+        """
+        Recalcula los agregados si cambió la versión de los datos
+        """
+        version = self._version_actual()
+        if version == self._version and self._puntos is not None:
+            return
+        with self._lock:
+            if version == self._version and self._puntos is not None:
+                return
+            self._construir()
+            self._version = version
+
+    @property
+    def total(self) -> int:
+        """Número de establecimientos georreferenciados"""
+        self._asegurar_vigente()
+        return len(self._puntos)
+
+    @staticmethod
+    def _en_bbox(df: pd.DataFrame, bbox: Optional[BBox]) -> pd.DataFrame:
+        if bbox is None:
+            return df
+        lon_min, lat_min, lon_max, lat_max = bbox
+        dentro = df['lat'].between(lat_min, lat_max) & df['lon'].between(lon_min, lon_max)
+        return df.loc[dentro]
+
+    def en_viewport(self, bbox: Optional[BBox] = None) -> pd.DataFrame:
+        """
+        Establecimientos individuales dentro del bbox (consulta al índice espacial)
+        """
+        self._asegurar_vigente()
+        if bbox is None:
+            return self._puntos
+        return self._puntos.iloc[self._indice.consultar(bbox)]
+
+    def marcadores(self, zoom: float, bbox: Optional[BBox] = None) -> pd.DataFrame:
+        """
+        Marcadores para un zoom y viewport
+
+        Args:
+            zoom: Zoom del mapa (mapbox)
+            bbox: (lon_min, lat_min, lon_max, lat_max) del viewport (None: todo)
+
+        Returns:
+            DataFrame con lat, lon, n (establecimientos del marcador; 1 si es
+            un establecimiento individual), matricula, nombre y comuna;
+            a lo más MAX_MARCADORES filas
+        """
+        self._asegurar_vigente()
+        nivel = min(max(int(zoom), 0), ZOOM_PUNTOS)
+
+        if nivel >= ZOOM_PUNTOS:
+            puntos = self.en_viewport(bbox)
+            if len(puntos) <= MAX_MARCADORES:
+                return puntos
+            nivel = ZOOM_PUNTOS - 1
+
+        # Si el viewport aún tiene demasiadas celdas se usa un nivel más grueso
+        while True:
+            celdas = self._en_bbox(self._niveles[nivel], bbox)
+            if len(celdas) <= MAX_MARCADORES or nivel == 0:
+                return celdas.nlargest(MAX_MARCADORES, 'n') if len(celdas) > MAX_MARCADORES else celdas
+            nivel -= 1
+
+
+# Instancia global para usar en toda la app
+cluster_establecimientos = ClusterEstablecimientos()
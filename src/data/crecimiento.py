@@ -0,0 +1,120 @@
+"""
+Motor vectorizado de crecimiento anual
+
+Trabaja sobre una matriz año × grupo (una columna por región, especialidad,
+comuna, ...) y calcula para todos los grupos a la vez:
+- CAGR entre el primer y el último año con datos de cada grupo
+- Variación interanual (YoY) en %
+- Media móvil
+
+Un año sin registros para un grupo queda como NaN en la matriz y no cuenta
+como primer/último año, igual que un groupby por año sobre las filas del
+grupo. Así la tabla puede mostrar el crecimiento de todas sus filas con una
+sola agregación y la tarjeta KPI reutiliza la misma matriz (columna total).
+
+Uso:
+    anual = matriz_anual(df, 'matricula_total', grupo='especialidad')
+    resumen_crecimiento(anual)              # cagr, yoy y media móvil por grupo
+    cagr(total_anual(anual))['total']       # crecimiento nacional
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Ventana por defecto de la media móvil (años)
+VENTANA_MEDIA_MOVIL = 3
+
+
+def matriz_anual(
+    df: pd.DataFrame,
+    valor: str,
+    grupo: Optional[str] = None,
+    col_año: str = 'año'
+) -> pd.DataFrame:
+    """
+    Suma ``valor`` por año y grupo en una matriz año × grupo
+
+    Args:
+        df: Datos con la columna de año (filas originales o celdas del cubo)
+        valor: Medida aditiva a sumar
+        grupo: Dimensión de las columnas; None para una única columna 'total'
+        col_año: Columna de año
+
+    Returns:
+        DataFrame indexado por año (ascendente), NaN donde el grupo no tiene filas
+    """
+    if grupo is None:
+        return df.groupby(col_año)[valor].sum().sort_index().to_frame('total')
+    return (
+        df.groupby([col_año, grupo], observed=True)[valor].sum()
+        .unstack(grupo)
+        .sort_index()
+    )
+
+
+def total_anual(matriz: pd.DataFrame) -> pd.DataFrame:
+    """
+    Suma los grupos de una matriz anual en una columna 'total'
+    """
+    return matriz.sum(axis=1, min_count=1).to_frame('total')
+
+
+def cagr(matriz: pd.DataFrame) -> pd.Series:
+    """
+    Tasa de crecimiento anual compuesta (%) de cada columna
+
+    ((último / primero) ** (1 / años) - 1) * 100 entre el primer y el último
+    año con datos; 0 si hay menos de dos años o el valor inicial no es positivo.
+    """
+    valores = matriz.to_numpy(dtype='float64')
+    if valores.size == 0:
+        return pd.Series(0.0, index=matriz.columns)
+
+    años = matriz.index.to_numpy(dtype='float64')
+    presentes = ~np.isnan(valores)
+    columnas = np.arange(valores.shape[1])
+
+    primero = presentes.argmax(axis=0)
+    ultimo = len(años) - 1 - presentes[::-1].argmax(axis=0)
+    inicial = valores[primero, columnas]
+    final = valores[ultimo, columnas]
+    periodo = años[ultimo] - años[primero]
+
+    validos = presentes.any(axis=0) & (inicial > 0) & (periodo > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tasa = ((final / inicial) ** (1 / periodo) - 1) * 100
+    return pd.Series(np.where(validos, tasa, 0.0), index=matriz.columns)
+
+
+def variacion_anual(matriz: pd.DataFrame) -> pd.DataFrame:
+    """
+    Variación interanual (%) de cada columna; NaN si falta el año anterior
+    """
+    return matriz.pct_change(fill_method=None) * 100
+
+
+def media_movil(matriz: pd.DataFrame, ventana: int = VENTANA_MEDIA_MOVIL) -> pd.DataFrame:
+    """
+    Media móvil de cada columna sobre los años con datos
+    """
+    return matriz.rolling(ventana, min_periods=1).mean()
+
+
+def resumen_crecimiento(matriz: pd.DataFrame, ventana: int = VENTANA_MEDIA_MOVIL) -> pd.DataFrame:
+    """
+    Indicadores de crecimiento del último año por grupo
+
+    Returns:
+        DataFrame indexado por grupo con columnas cagr, variacion_anual
+        (último año vs. el anterior) y media_movil (último año)
+    """
+    if matriz.empty:
+        return pd.DataFrame(columns=['cagr', 'variacion_anual', 'media_movil'])
+
+    return pd.DataFrame({
+        'cagr': cagr(matriz),
+        'variacion_anual': variacion_anual(matriz).iloc[-1],
+        'media_movil': media_movil(matriz, ventana).iloc[-1]
+    })
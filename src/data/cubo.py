@@ -0,0 +1,248 @@
+"""
+Cubo agregado de matrícula para KPIs, gráficos y tablas
+
+Las vistas de matrícula filtraban el dataset completo y luego cada widget
+corría su propio groupby. El cubo precalcula, una vez por versión de datos,
+las medidas aditivas agrupadas por todas las dimensiones de filtro
+(año × región × especialidad × dependencia × género × zona). Cualquier
+combinación de filtros se responde filtrando las celdas del cubo y
+sumándolas, así el costo depende del número de celdas y no de los registros
+originales (por RBD cuando se usen datos MINEDUC).
+
+Medidas:
+- Sumas: se agregan directamente (matricula_total, hombres, mujeres)
+- Promedios: se guardan como numerador (<col>_suma) y denominador (<col>_n)
+  y se recalculan al consultar; el resultado es el promedio simple de los
+  registros originales. El numerador es la suma escalada a enteros de
+  src/data/backend_archivos.py, exacta en cualquier orden, por lo que los
+  rollups, las diferencias de prefijos y los backends DuckDB/Polars dan el
+  mismo promedio al último bit
+- registros: número de filas originales de cada celda
+
+Sumas prefijo por año: para cada combinación de las demás dimensiones se
+guarda el acumulado año a año de cada medida. El total de una ventana
+[año_min, año_max] (el slider de años) es la diferencia de dos columnas de
+prefijos, sin recorrer los años intermedios ni las filas originales.
+
+Uso:
+    cubo = cubo_matricula.get()
+    corte = apply_filters(cubo, filters)
+    cubo_matricula.rollup(corte, por=['especialidad'])
+
+    ventana = cubo_matricula.ventana(2018, 2022)   # totales sin la dimensión año
+    cubo_matricula.rollup(ventana, por=['dependencia'])
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data.backend_archivos import escalar, promedio_exacto
+from src.data.registry import dataset_registry
+from src.data.schema import aplicar_esquema
+
+logger = logging.getLogger(__name__)
+
+MATRICULA_DATA_PATH = Path('data/processed/matricula_simulada.csv')
+
+# Dimensiones de filtro del dashboard (las ausentes en el dataset se omiten)
+DIMENSIONES_CUBO = ['año', 'region', 'especialidad', 'dependencia', 'genero', 'zona']
+
+
+class CuboAgregado:
+    """
+    Cubo de medidas aditivas sobre las dimensiones de filtro de un dataset
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        data_path: Path,
+        sumas: Sequence[str],
+        promedios: Sequence[str] = (),
+        dimensiones: Sequence[str] = DIMENSIONES_CUBO
+    ):
+        self.nombre = nombre
+        self.data_path = Path(data_path)
+        self.sumas = list(sumas)
+        self.promedios = list(promedios)
+        self.dimensiones = list(dimensiones)
+        # (firma del archivo, celdas del cubo, sumas prefijo por año)
+        self._estado = None
+        self._lock = threading.Lock()
+
+    def _cargar(self) -> Optional[pd.DataFrame]:
+        return dataset_registry.get(
+            self.data_path,
+            reader=lambda path: aplicar_esquema(pd.read_csv(path), self.nombre)
+        )
+
+    def _construir(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrupa el dataset por todas las dimensiones presentes
+        """
+        dimensiones = [d for d in self.dimensiones if d in df.columns]
+        columnas = {m: df[m].astype('int64') for m in self.sumas}
+        for p in self.promedios:
+            columnas[f'{p}_suma'] = escalar(df[p])
+            columnas[f'{p}_n'] = df[p].notna().astype('int64')
+        columnas['registros'] = 1
+
+        medidas = pd.DataFrame(columnas, index=df.index)
+        medidas[dimensiones] = df[dimensiones]
+        cubo = medidas.groupby(dimensiones, observed=True).sum().reset_index()
+
+        logger.info(
+            f"🧊 Cubo {self.nombre} construido: {len(df):,} registros → {len(cubo):,} celdas"
+        )
+        return cubo
+
+    def _construir_prefijos(self, cubo: pd.DataFrame) -> Optional[Dict]:
+        """
+        Sumas acumuladas por año de cada medida, por combinación de dimensiones
+
+        Returns:
+            {'celdas': {dimensión: valores por combinación (sin año)},
+             'años': años ordenados,
+             'medidas': {columna: matriz combinaciones × (años + 1)}}; la
+            primera columna de cada matriz es 0 para restar sin casos borde
+        """
+        if 'año' not in cubo.columns:
+            return None
+
+        otras = [d for d in self.dimensiones if d in cubo.columns and d != 'año']
+        grupos = cubo.groupby(otras, observed=True)
+        combinacion = grupos.ngroup().to_numpy()
+        celdas = grupos.size().reset_index()
+
+        años = np.sort(cubo['año'].unique())
+        posicion = np.searchsorted(años, cubo['año'].to_numpy())
+
+        medidas = {}
+        for columna in self.columnas_medida():
+            valores = cubo[columna].to_numpy()
+            densa = np.zeros((len(celdas), len(años)), dtype=valores.dtype)
+            densa[combinacion, posicion] = valores
+            prefijo = np.zeros((len(celdas), len(años) + 1), dtype=valores.dtype)
+            np.cumsum(densa, axis=1, out=prefijo[:, 1:])
+            medidas[columna] = prefijo
+
+        return {
+            'celdas': {d: celdas[d].array for d in otras},
+            'años': años,
+            'medidas': medidas
+        }
+
+    def _vigente(self):
+        """
+        Retorna (cubo, prefijos) de la versión actual de los datos, o None
+
+        Ambos se reconstruyen solo cuando cambia la firma del archivo de origen.
+        """
+        df = self._cargar()
+        if df is None:
+            return None
+
+        firma = dataset_registry.firma(self.data_path)
+        estado = self._estado
+        if estado is None or estado[0] != firma:
+            with self._lock:
+                estado = self._estado
+                if estado is None or estado[0] != firma:
+                    cubo = self._construir(df)
+                    estado = (firma, cubo, self._construir_prefijos(cubo))
+                    self._estado = estado  # Asignación atómica
+        return estado[1], estado[2]
+
+    def get(self) -> Optional[pd.DataFrame]:
+        """
+        Retorna las celdas del cubo (None si no hay datos)
+        """
+        vigente = self._vigente()
+        if vigente is None:
+            return None
+        return vigente[0].copy(deep=False)
+
+    def ventana(self, año_min=None, año_max=None) -> Optional[pd.DataFrame]:
+        """
+        Totales de cada combinación de dimensiones (sin año) en [año_min, año_max]
+
+        Cada medida se obtiene como prefijo[año_max] - prefijo[año_min - 1].
+        Las combinaciones sin registros en la ventana se omiten, igual que un
+        groupby sobre las celdas filtradas.
+
+        Args:
+            año_min, año_max: Rango inclusivo; None para no acotar ese extremo
+
+        Returns:
+            DataFrame con las dimensiones y las medidas (compatible con
+            rollup), o None si no hay datos o el dataset no tiene año
+        """
+        vigente = self._vigente()
+        if vigente is None or vigente[1] is None:
+            return None
+        prefijos = vigente[1]
+
+        años = prefijos['años']
+        desde = 0 if año_min is None else int(np.searchsorted(años, año_min, side='left'))
+        hasta = len(años) if año_max is None else int(np.searchsorted(años, año_max, side='right'))
+        hasta = max(hasta, desde)
+
+        totales = {
+            columna: prefijo[:, hasta] - prefijo[:, desde]
+            for columna, prefijo in prefijos['medidas'].items()
+        }
+        con_datos = totales['registros'] > 0
+
+        columnas = {d: valores[con_datos] for d, valores in prefijos['celdas'].items()}
+        columnas.update((columna, total[con_datos]) for columna, total in totales.items())
+        return pd.DataFrame(columnas, copy=False)
+
+    def rollup(self, corte: pd.DataFrame, por: Sequence[str] = ()) -> pd.DataFrame:
+        """
+        Suma las celdas de un corte del cubo agrupando por ``por``
+
+        Args:
+            corte: Celdas del cubo (ya filtradas)
+            por: Dimensiones de salida; vacío para un total de una fila
+
+        Returns:
+            DataFrame con las sumas, los registros y los promedios recalculados
+        """
+        medidas = self.columnas_medida()
+        if por:
+            resultado = corte.groupby(list(por), observed=True)[medidas].sum().reset_index()
+        else:
+            resultado = pd.DataFrame({m: [corte[m].sum()] for m in medidas})
+        return self.con_promedios(resultado)
+
+    def con_promedios(self, agregado: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrega los promedios (suma / n, 0 sin datos) a un resultado ya agrupado
+        """
+        for p in self.promedios:
+            n = agregado[f'{p}_n']
+            agregado[p] = promedio_exacto(agregado[f'{p}_suma'], n).fillna(0.0)
+        return agregado
+
+    def columnas_medida(self) -> List[str]:
+        """
+        Columnas aditivas del cubo
+        """
+        columnas = list(self.sumas)
+        for p in self.promedios:
+            columnas += [f'{p}_suma', f'{p}_n']
+        return columnas + ['registros']
+
+
+# Instancia global para usar en toda la app
+cubo_matricula = CuboAgregado(
+    'matricula',
+    MATRICULA_DATA_PATH,
+    sumas=['matricula_total', 'matricula_hombres', 'matricula_mujeres'],
+    promedios=['tasa_retencion']
+)
@@ -0,0 +1,196 @@
+"""
+Dimensión territorial canónica: comuna → provincia → región
+
+El código único territorial (CUT) de una comuna codifica su jerarquía:
+RRPCC (o RPCC en las regiones 1 a 9), con la provincia en los primeros
+dígitos. Así región y provincia se obtienen con aritmética entera sobre
+columnas completas, sin llamadas Python por fila:
+
+    codigo_region    = cod_comuna // 1000      # 13101 → 13
+    codigo_provincia = cod_comuna // 100       # 13101 → 131
+
+Los nombres se resuelven con arreglos de búsqueda indexados por código y se
+entregan como pd.Categorical (categorías ordenadas alfabéticamente, igual
+que el esquema compacto). Este módulo es la única fuente de los códigos y
+nombres de regiones y provincias; src/data/schema.py toma de aquí
+CODIGOS_REGION.
+"""
+
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Código de región → nombre (como aparece en los datos del dashboard)
+REGIONES_POR_CODIGO: Dict[int, str] = {
+    1: "Tarapacá", 2: "Antofagasta", 3: "Atacama", 4: "Coquimbo",
+    5: "Valparaíso", 6: "O'Higgins", 7: "Maule", 8: "Biobío",
+    9: "La Araucanía", 10: "Los Lagos", 11: "Aysén", 12: "Magallanes",
+    13: "Metropolitana", 14: "Los Ríos", 15: "Arica y Parinacota", 16: "Ñuble",
+}
+
+# Variantes de nombre presentes en las fuentes
+ALIAS_REGION: Dict[str, int] = {
+    "Araucanía": 9,
+}
+
+# Código de provincia → nombre (CUT vigente, con la Región de Ñuble)
+PROVINCIAS_POR_CODIGO: Dict[int, str] = {
+    11: "Iquique", 14: "Tamarugal",
+    21: "Antofagasta", 22: "El Loa", 23: "Tocopilla",
+    31: "Copiapó", 32: "Chañaral", 33: "Huasco",
+    41: "Elqui", 42: "Choapa", 43: "Limarí",
+    51: "Valparaíso", 52: "Isla de Pascua", 53: "Los Andes", 54: "Petorca",
+    55: "Quillota", 56: "San Antonio", 57: "San Felipe de Aconcagua", 58: "Marga Marga",
+    61: "Cachapoal", 62: "Cardenal Caro", 63: "Colchagua",
+    71: "Talca", 72: "Cauquenes", 73: "Curicó", 74: "Linares",
+    81: "Concepción", 82: "Arauco", 83: "Biobío",
+    91: "Cautín", 92: "Malleco",
+    101: "Llanquihue", 102: "Chiloé", 103: "Osorno", 104: "Palena",
+    111: "Coyhaique", 112: "Aysén", 113: "Capitán Prat", 114: "General Carrera",
+    121: "Magallanes", 122: "Antártica Chilena", 123: "Tierra del Fuego", 124: "Última Esperanza",
+    131: "Santiago", 132: "Cordillera", 133: "Chacabuco", 134: "Maipo",
+    135: "Melipilla", 136: "Talagante",
+    141: "Valdivia", 142: "Ranco",
+    151: "Arica", 152: "Parinacota",
+    161: "Diguillín", 162: "Itata", 163: "Punilla",
+}
+
+# Nombre (y alias) de región → código
+CODIGOS_REGION: Dict[str, int] = {
+    **{nombre: codigo for codigo, nombre in REGIONES_POR_CODIGO.items()},
+    **ALIAS_REGION,
+}
+
+# Categorías (orden alfabético) de los nombres
+CATEGORIAS_REGION = sorted(REGIONES_POR_CODIGO.values())
+CATEGORIAS_PROVINCIA = sorted(set(PROVINCIAS_POR_CODIGO.values()))
+
+
+def _tabla_posiciones(nombres_por_codigo: Dict[int, str], categorias) -> np.ndarray:
+    """
+    Arreglo código → posición de su nombre en ``categorias`` (-1 si no existe)
+    """
+    posiciones = {nombre: i for i, nombre in enumerate(categorias)}
+    tabla = np.full(max(nombres_por_codigo) + 1, -1, dtype=np.int16)
+    for codigo, nombre in nombres_por_codigo.items():
+        tabla[codigo] = posiciones[nombre]
+    return tabla
+
+
+_POSICION_REGION = _tabla_posiciones(REGIONES_POR_CODIGO, CATEGORIAS_REGION)
+_POSICION_PROVINCIA = _tabla_posiciones(PROVINCIAS_POR_CODIGO, CATEGORIAS_PROVINCIA)
+
+# Columnas de la jerarquía según el origen de los datos
+COLUMNAS_SIMULADAS = {
+    'comuna': 'cod_comuna', 'region': 'codregion',
+    'provincia': 'codprovincia', 'nombre_provincia': 'provincia',
+}
+COLUMNAS_MINEDUC = {
+    'comuna': 'CodigoComuna', 'region': 'CodigoRegion',
+    'provincia': 'CodigoProvincia', 'nombre_provincia': 'Provincia',
+}
+
+
+def _enteros(codigos) -> np.ndarray:
+    return np.asarray(codigos, dtype=np.int64)
+
+
+def region_de_comuna(cod_comuna) -> np.ndarray:
+    """
+    Código de región de cada comuna (vectorizado)
+    """
+    return (_enteros(cod_comuna) // 1000).astype(np.int32)
+
+
+def provincia_de_comuna(cod_comuna) -> np.ndarray:
+    """
+    Código de provincia de cada comuna (vectorizado)
+    """
+    return (_enteros(cod_comuna) // 100).astype(np.int32)
+
+
+def region_de_provincia(cod_provincia) -> np.ndarray:
+    """
+    Código de región de cada provincia (vectorizado)
+    """
+    return (_enteros(cod_provincia) // 10).astype(np.int32)
+
+
+def _nombres(codigos, tabla: np.ndarray, categorias) -> pd.Categorical:
+    codigos = _enteros(codigos)
+    validos = (codigos >= 0) & (codigos < len(tabla))
+    posiciones = np.full(len(codigos), -1, dtype=np.int16)
+    posiciones[validos] = tabla[codigos[validos]]
+    return pd.Categorical.from_codes(posiciones, categories=categorias)
+
+
+def nombre_region(codigos_region) -> pd.Categorical:
+    """
+    Nombre de cada código de región (NaN si el código no existe)
+    """
+    return _nombres(codigos_region, _POSICION_REGION, CATEGORIAS_REGION)
+
+
+def nombre_provincia(codigos_provincia) -> pd.Categorical:
+    """
+    Nombre de cada código de provincia (NaN si el código no existe)
+    """
+    return _nombres(codigos_provincia, _POSICION_PROVINCIA, CATEGORIAS_PROVINCIA)
+
+
+def codigo_de_region(region) -> Optional[int]:
+    """
+    Código de una región (acepta nombre, alias o código)
+    """
+    if isinstance(region, (int, np.integer)):
+        return int(region)
+    if isinstance(region, str) and region.isdigit():
+        return int(region)
+    return CODIGOS_REGION.get(region)
+
+
+def agregar_jerarquia(df: pd.DataFrame, columnas: Dict[str, str] = COLUMNAS_SIMULADAS) -> pd.DataFrame:
+    """
+    Agrega código de región, código y nombre de provincia desde el código de comuna
+
+    Las columnas que ya existen en ``df`` se respetan (p. ej. CodigoRegion de
+    la fuente MINEDUC). Sin columna de código de comuna se retorna ``df`` sin
+    cambios. Las filas sin código de comuna (o con un código no numérico)
+    quedan con códigos nulos (Int32) y nombre NaN; el resto se deriva igual.
+
+    Args:
+        df: Datos con la columna de código de comuna
+        columnas: Nombres de las columnas (COLUMNAS_SIMULADAS o COLUMNAS_MINEDUC)
+    """
+    origen = columnas['comuna']
+    if origen not in df.columns:
+        return df
+
+    codigos = pd.to_numeric(df[origen], errors='coerce')
+    nulos = codigos.isna().to_numpy()
+    if nulos.any():
+        logger.warning(
+            f"⚠️  {int(nulos.sum())} de {len(df)} filas sin {origen} válido: "
+            f"quedan sin región ni provincia derivadas"
+        )
+    cod_comuna = codigos.fillna(0).to_numpy()
+
+    def _codigos(valores: np.ndarray):
+        # Con filas sin código se usa Int32 nullable para no inventar un código 0
+        if not nulos.any():
+            return valores
+        return pd.arrays.IntegerArray(valores.astype(np.int32), mask=nulos.copy())
+
+    nuevas = {}
+    if columnas['region'] not in df.columns:
+        nuevas[columnas['region']] = _codigos(region_de_comuna(cod_comuna))
+    if columnas['provincia'] not in df.columns:
+        nuevas[columnas['provincia']] = _codigos(provincia_de_comuna(cod_comuna))
+    if columnas['nombre_provincia'] not in df.columns:
+        # El código 0 de las filas sin comuna no existe: su nombre queda NaN
+        nuevas[columnas['nombre_provincia']] = nombre_provincia(provincia_de_comuna(cod_comuna))
+    return df.assign(**nuevas) if nuevas else df
@@ -0,0 +1,213 @@
+"""
+Backend analítico opcional con DuckDB
+
+Ejecuta los filtros y agregaciones de las secciones como SQL directamente
+sobre los archivos de datos (CSV simulados o Parquet del cache MINEDUC), sin
+cargar el dataset completo en memoria: DuckDB escanea en paralelo, empuja
+los predicados al lector y agrega en streaming; a pandas solo llegan los
+grupos ya agregados. Las medidas de cada KPI, gráfico y tabla se declaran
+en src/data/backend_archivos.py y se traducen a un SELECT ... GROUP BY.
+
+Se activa con ANALYTICS_BACKEND=duckdb (ver config/settings.py). Si el
+paquete duckdb no está instalado la app sigue con el backend pandas.
+
+La paridad con el backend pandas se verifica con
+scripts/verificar_paridad_backends.py.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+import pandas as pd
+
+from config.settings import settings
+from src.data.backend_archivos import (
+    BOOLEANO, DECIMAL, ENTERO, ESCALA_PROMEDIO, OTRO, BackendArchivos, Medida, Predicados
+)
+
+try:
+    import duckdb
+except ImportError:  # Dependencia opcional
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# Prefijos de tipos DuckDB → tipo de columna del backend
+_TIPOS_DUCKDB = (
+    (('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT',
+      'UINTEGER', 'UBIGINT'), ENTERO),
+    (('FLOAT', 'DOUBLE', 'DECIMAL', 'REAL'), DECIMAL),
+    (('BOOLEAN',), BOOLEANO),
+)
+
+
+def _identificador(columna: str) -> str:
+    """Columna entre comillas dobles (admite 'año' y nombres con espacios)"""
+    return '"' + columna.replace('"', '""') + '"'
+
+
+def _literal(texto: str) -> str:
+    """String SQL entre comillas simples"""
+    return "'" + texto.replace("'", "''") + "'"
+
+
+def _tipo(tipo_duckdb: str) -> str:
+    for prefijos, tipo in _TIPOS_DUCKDB:
+        if tipo_duckdb.upper().startswith(prefijos):
+            return tipo
+    return OTRO
+
+
+class DuckDBBackend(BackendArchivos):
+    """
+    Consultas SQL sobre archivos de datos con una conexión DuckDB embebida
+    """
+
+    nombre = 'duckdb'
+
+    def __init__(self, threads: int = 0):
+        """
+        Args:
+            threads: Hilos de DuckDB (0: todos los núcleos)
+        """
+        super().__init__()
+        self.threads = threads
+        self._conexion = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def disponible() -> bool:
+        """True si el paquete duckdb está instalado"""
+        return duckdb is not None
+
+    def _cursor(self):
+        """
+        Cursor propio del hilo actual sobre la conexión compartida
+
+        Las conexiones DuckDB no deben compartirse entre hilos; cada worker
+        thread de Dash obtiene su cursor con .cursor().
+        """
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            with self._lock:
+                if self._conexion is None:
+                    self._conexion = duckdb.connect(database=':memory:')
+                    if self.threads:
+                        self._conexion.execute(f"SET threads = {int(self.threads)}")
+                    logger.info("🦆 Conexión DuckDB iniciada")
+                cursor = self._conexion.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    @staticmethod
+    def fuente(path) -> str:
+        """
+        Expresión SQL que lee el archivo (o directorio Parquet particionado)
+        """
+        path = Path(path)
+        if path.is_dir():
+            patron = _literal(str(path / '**' / '*.parquet'))
+            return f"read_parquet({patron}, hive_partitioning = true)"
+        if path.suffix == '.parquet':
+            return f"read_parquet({_literal(str(path))})"
+        return f"read_csv({_literal(str(path))}, header = true)"
+
+    def _escribir_parquet(self, csv: Path, destino: Path):
+        self._cursor().execute(
+            f"COPY (SELECT * FROM {self.fuente(csv)}) TO {_literal(str(destino))} (FORMAT parquet)"
+        )
+
+    def _leer_tipos(self, path) -> Dict[str, str]:
+        descripcion = self._cursor().execute(f"DESCRIBE SELECT * FROM {self.fuente(path)}").fetchall()
+        return {fila[0]: _tipo(fila[1]) for fila in descripcion}
+
+    def _tiene_filas(self, path) -> bool:
+        fila = self._cursor().execute(f"SELECT 1 FROM {self.fuente(path)} LIMIT 1").fetchone()
+        return fila is not None
+
+    @staticmethod
+    def _where(predicados: Predicados) -> Tuple[str, List]:
+        """
+        Cláusula WHERE parametrizada para los predicados del dashboard
+        """
+        years, values = predicados
+        condiciones, parametros = [], []
+
+        if years is not None:
+            condiciones.append(f"{_identificador('año')} BETWEEN ? AND ?")
+            parametros.extend(years)
+
+        for columna, aceptados in values.items():
+            marcas = ', '.join('?' for _ in aceptados)
+            condiciones.append(f"{_identificador(columna)} IN ({marcas})")
+            parametros.extend(aceptados)
+
+        if not condiciones:
+            return '', []
+        return 'WHERE ' + ' AND '.join(condiciones), parametros
+
+    @staticmethod
+    def _expresion(medida: Medida, tipos: Dict[str, str]) -> Tuple[str, List]:
+        """
+        Expresión SQL (y parámetros) de una medida
+        """
+        operacion = medida[0]
+        if operacion == 'filas':
+            return "COUNT(*)", []
+
+        columna = _identificador(medida[1])
+        tipo = tipos.get(medida[1], OTRO)
+        if operacion == 'suma':
+            if tipo in (ENTERO, BOOLEANO):
+                return f"CAST(COALESCE(SUM(CAST({columna} AS BIGINT)), 0) AS BIGINT)", []
+            return f"CAST(COALESCE(SUM({columna}), 0) AS DOUBLE)", []
+        if operacion == 'suma_escalada':
+            # Misma expresión que backend_archivos.escalar
+            return f"COALESCE(SUM(FLOOR(CAST({columna} AS DOUBLE) * {ESCALA_PROMEDIO} + 0.5)), 0)", []
+        if operacion == 'conteo':
+            return f"COUNT({columna})", []
+        if operacion == 'distintos':
+            return f"COUNT(DISTINCT {columna})", []
+        if operacion == 'iguales':
+            return f"COUNT(*) FILTER (WHERE {columna} = ?)", [medida[2]]
+        raise ValueError(f"Operación desconocida: {operacion}")
+
+    def _filas(self, path, predicados: Predicados) -> pd.DataFrame:
+        """
+        SELECT * con los predicados (DuckDB conserva el orden del archivo)
+        """
+        where, parametros = self._where(predicados)
+        return self._cursor().execute(f"SELECT * FROM {self.fuente(path)} {where}", parametros).df()
+
+    def _resumir(
+        self,
+        path,
+        predicados: Predicados,
+        por: Sequence[str],
+        medidas: Mapping[str, Medida],
+        tipos: Dict[str, str]
+    ) -> pd.DataFrame:
+        """
+        Evalúa las medidas con un solo SELECT ... GROUP BY sobre el archivo
+        """
+        grupos = [_identificador(c) for c in por]
+
+        expresiones, parametros = [], []
+        for nombre, medida in medidas.items():
+            expresion, valores = self._expresion(medida, tipos)
+            expresiones.append(f"{expresion} AS {_identificador(nombre)}")
+            parametros.extend(valores)
+
+        where, parametros_where = self._where(predicados)
+        sql = f"SELECT {', '.join(grupos + expresiones)} FROM {self.fuente(path)} {where}"
+        if grupos:
+            sql += f" GROUP BY {', '.join(grupos)} ORDER BY {', '.join(grupos)}"
+
+        return self._cursor().execute(sql, parametros + parametros_where).df()
+
+
+# Instancia global para usar en toda la app
+duckdb_backend = DuckDBBackend(threads=settings.DUCKDB_THREADS)
@@ -0,0 +1,128 @@
+"""
+Límites territoriales de Chile (GeoJSON local multi-resolución)
+
+Los límites regionales y comunales se guardan en data/geographic, ya
+simplificados a varios niveles de resolución con la topología preservada
+(los bordes compartidos entre vecinos se simplifican una sola vez, sin
+huecos ni traslapes) y coordenadas cuantizadas. Los genera
+scripts/construir_geojson.py a partir del GeoJSON de fcortes/Chile-GeoJSON.
+
+Archivos:
+    data/geographic/regiones_<resolucion>.geojson
+    data/geographic/comunas_<resolucion>.geojson
+    data/geographic/manifest.json     # tolerancias, tamaños y fuente
+
+La app no descarga nada en ejecución: si un archivo no existe,
+cargar_geojson levanta FileNotFoundError con la instrucción para
+generarlo. La imagen Docker los genera al construirse (ver Dockerfile).
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+GEOGRAPHIC_DIR = settings.GEOGRAPHIC_DATA_DIR
+MANIFEST_PATH = GEOGRAPHIC_DIR / 'manifest.json'
+
+# Fuente original de los límites (resolución completa), solo para scripts/construir_geojson.py
+FUENTES = {
+    'regiones': "https://raw.githubusercontent.com/fcortes/Chile-GeoJSON/master/Regional.geojson",
+    'comunas': "https://raw.githubusercontent.com/fcortes/Chile-GeoJSON/master/comunas.geojson",
+}
+
+# Resolución → (tolerancia de simplificación en grados, decimales de las coordenadas)
+RESOLUCIONES: Dict[str, Tuple[float, int]] = {
+    'alta': (0.001, 4),    # ~100 m
+    'media': (0.005, 3),   # ~500 m
+    'baja': (0.02, 3),     # ~2 km
+}
+
+RESOLUCION_POR_DEFECTO = 'media'
+
+# Propiedades que se conservan en cada feature (las que usan los mapas)
+PROPIEDADES = {
+    'regiones': ['codregion', 'Region'],
+    'comunas': ['cod_comuna', 'codregion', 'Comuna', 'Provincia', 'Region'],
+}
+
+_cache: Dict[Tuple[str, str], Dict] = {}
+_lock = threading.Lock()
+
+
+def ruta_geojson(nivel: str, resolucion: str) -> Path:
+    """
+    Archivo local de un nivel territorial ('regiones' | 'comunas') y resolución
+    """
+    return GEOGRAPHIC_DIR / f"{nivel}_{resolucion}.geojson"
+
+
+def exigir_geojson(nivel: str, resolucion: str) -> Path:
+    """
+    Ruta del archivo local, o FileNotFoundError si no se ha generado
+    """
+    path = ruta_geojson(nivel, resolucion)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No existe {path}: generar los límites locales con python scripts/construir_geojson.py "
+            f"(GEOGRAPHIC_DATA_DIR={GEOGRAPHIC_DIR})"
+        )
+    return path
+
+
+def version_geografia() -> Optional[Tuple[int, int]]:
+    """
+    Versión de los límites locales: (mtime_ns, tamaño) del manifest
+    """
+    try:
+        stat = MANIFEST_PATH.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def cargar_geojson(nivel: str, resolucion: str = RESOLUCION_POR_DEFECTO) -> Dict:
+    """
+    Retorna el GeoJSON de un nivel territorial en la resolución pedida
+
+    Se lee una vez por proceso.
+
+    Args:
+        nivel: 'regiones' o 'comunas'
+        resolucion: 'alta', 'media' o 'baja'
+
+    Raises:
+        FileNotFoundError: Si los límites locales no se han generado
+    """
+    if nivel not in FUENTES:
+        raise ValueError(f"Nivel territorial desconocido: {nivel}")
+    if resolucion not in RESOLUCIONES:
+        raise ValueError(f"Resolución desconocida: {resolucion}")
+
+    clave = (nivel, resolucion)
+    geojson = _cache.get(clave)
+    if geojson is not None:
+        return geojson
+
+    with _lock:
+        geojson = _cache.get(clave)
+        if geojson is None:
+            path = exigir_geojson(nivel, resolucion)
+            with open(path, 'r', encoding='utf-8') as f:
+                geojson = json.load(f)
+            logger.info(f"🗺️  GeoJSON {nivel} ({resolucion}) cargado desde {path.name}")
+            _cache[clave] = geojson
+    return geojson
+
+
+def limpiar_cache():
+    """
+    Olvida los GeoJSON leídos (p. ej. tras regenerar los archivos)
+    """
+    with _lock:
+        _cache.clear()
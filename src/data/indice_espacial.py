@@ -0,0 +1,363 @@
+"""
+Índice espacial de grilla uniforme: puntos y polígonos comunales
+
+Las coordenadas de los establecimientos y los polígonos de las comunas no
+se cruzaban nunca: el código de comuna se tomaba tal cual de la fuente.
+Este módulo agrega, sin dependencias geoespaciales (solo numpy):
+
+- IndicePuntos: puntos ordenados por celda de una grilla uniforme. Una
+  consulta por bbox recorre solo las celdas que cubre (un rango contiguo
+  por fila de la grilla) y filtra exacto dentro de ellas.
+- IndicePoligonos: cada polígono se registra en las celdas que cubre su
+  bbox. Para asignar puntos, cada punto toma como candidatos los polígonos
+  de su celda y la prueba punto-en-polígono (regla par-impar, con huecos y
+  multipolígonos) se evalúa vectorizada por polígono sobre sus candidatos.
+
+Las grillas se guardan en formato CSR (celdas ordenadas + desplazamientos),
+así una consulta no tiene ciclos Python por punto.
+
+Uso:
+    indice = indice_espacial_comunas()               # polígonos 'alta'
+    codigos = indice.asignar(lon, lat)                # -1 fuera de toda comuna
+    comunas = indice.en_bbox((-71, -34, -70, -33))   # códigos que cruzan el bbox
+    borde = indice.distancia_borde(lon, lat, cods)    # grados al borde de la comuna cods
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.data.geografia import cargar_geojson, version_geografia
+
+logger = logging.getLogger(__name__)
+
+# (lon_min, lat_min, lon_max, lat_max)
+BBox = Tuple[float, float, float, float]
+
+# Tamaño de celda por defecto (grados)
+CELDA_PUNTOS = 0.05
+CELDA_POLIGONOS = 0.25
+
+# Tope de elementos de la matriz punto × arista por bloque en la prueba punto-en-polígono
+MAX_ELEMENTOS_BLOQUE = 4_000_000
+
+SIN_POLIGONO = -1
+
+
+def _rangos(inicios: np.ndarray, cantidades: np.ndarray) -> np.ndarray:
+    """
+    Concatena los rangos [inicio, inicio + cantidad) sin ciclos Python
+    """
+    total = int(cantidades.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    desplazamientos = np.repeat(inicios - np.cumsum(cantidades) + cantidades, cantidades)
+    return desplazamientos + np.arange(total, dtype=np.int64)
+
+
+class _Grilla:
+    """
+    Grilla uniforme sobre una extensión: coordenadas → celda
+    """
+
+    def __init__(self, extension: BBox, tamano_celda: float):
+        lon_min, lat_min, lon_max, lat_max = extension
+        self.lon_min = lon_min
+        self.lat_min = lat_min
+        self.tamano = tamano_celda
+        self.nx = max(1, int(np.ceil((lon_max - lon_min) / tamano_celda)) + 1)
+        self.ny = max(1, int(np.ceil((lat_max - lat_min) / tamano_celda)) + 1)
+
+    def columna(self, lon) -> np.ndarray:
+        return np.clip(((np.asarray(lon) - self.lon_min) // self.tamano).astype(np.int64), 0, self.nx - 1)
+
+    def fila(self, lat) -> np.ndarray:
+        return np.clip(((np.asarray(lat) - self.lat_min) // self.tamano).astype(np.int64), 0, self.ny - 1)
+
+    def celda(self, lon, lat) -> np.ndarray:
+        return self.fila(lat) * self.nx + self.columna(lon)
+
+
+class IndicePuntos:
+    """
+    Índice de puntos para consultas por bbox
+    """
+
+    def __init__(self, lon, lat, tamano_celda: float = CELDA_PUNTOS):
+        """
+        Args:
+            lon, lat: Coordenadas de los puntos (grados)
+            tamano_celda: Lado de las celdas de la grilla (grados)
+        """
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        if len(self.lon):
+            extension = (self.lon.min(), self.lat.min(), self.lon.max(), self.lat.max())
+        else:
+            extension = (0.0, 0.0, 0.0, 0.0)
+        self.grilla = _Grilla(extension, tamano_celda)
+
+        celdas = self.grilla.celda(self.lon, self.lat)
+        self._orden = np.argsort(celdas, kind='stable')
+        self._celdas = celdas[self._orden]
+
+    def __len__(self) -> int:
+        return len(self.lon)
+
+    def consultar(self, bbox: BBox) -> np.ndarray:
+        """
+        Posiciones (en el orden original) de los puntos dentro del bbox
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        lon_min, lat_min, lon_max, lat_max = bbox
+        g = self.grilla
+        if lon_max < g.lon_min or lat_max < g.lat_min or lon_min > g.lon_min + g.nx * g.tamano or lat_min > g.lat_min + g.ny * g.tamano:
+            return np.empty(0, dtype=np.int64)
+
+        # Un rango contiguo de celdas (y por tanto de puntos ordenados) por fila
+        filas = np.arange(g.fila(lat_min), g.fila(lat_max) + 1)
+        desde = np.searchsorted(self._celdas, filas * g.nx + g.columna(lon_min), side='left')
+        hasta = np.searchsorted(self._celdas, filas * g.nx + g.columna(lon_max), side='right')
+        candidatos = self._orden[_rangos(desde, hasta - desde)]
+
+        lon = self.lon[candidatos]
+        lat = self.lat[candidatos]
+        dentro = (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+        return np.sort(candidatos[dentro])
+
+
+class IndicePoligonos:
+    """
+    Índice de polígonos (GeoJSON Polygon/MultiPolygon) para punto-en-polígono y bbox
+    """
+
+    def __init__(self, geojson: Dict, propiedad: str, tamano_celda: float = CELDA_POLIGONOS):
+        """
+        Args:
+            geojson: FeatureCollection con geometrías Polygon o MultiPolygon
+            propiedad: Propiedad entera que identifica cada polígono (p. ej. 'cod_comuna')
+            tamano_celda: Lado de las celdas de la grilla (grados)
+        """
+        codigos, propiedades, aristas, duenos, centroides = [], [], [], [], []
+        for feature in geojson.get('features', []):
+            geometria = feature.get('geometry') or {}
+            if geometria.get('type') == 'Polygon':
+                poligonos = [geometria['coordinates']]
+            elif geometria.get('type') == 'MultiPolygon':
+                poligonos = geometria['coordinates']
+            else:
+                continue
+            anillos = [np.asarray(anillo, dtype=np.float64)[:, :2] for poligono in poligonos for anillo in poligono if len(anillo) >= 3]
+            if not anillos:
+                continue
+            indice = len(codigos)
+            codigos.append(int(feature['properties'][propiedad]))
+            propiedades.append(feature['properties'])
+            area_total, momento = 0.0, np.zeros(2)
+            for poligono in poligonos:
+                for orden_anillo, anillo in enumerate(poligono):
+                    if len(anillo) < 3:
+                        continue
+                    # Cada anillo se cierra explícitamente: aristas (p_i, p_i+1)
+                    anillo = np.asarray(anillo, dtype=np.float64)[:, :2]
+                    cerrado = anillo if np.array_equal(anillo[0], anillo[-1]) else np.vstack([anillo, anillo[:1]])
+                    aristas.append(np.hstack([cerrado[:-1], cerrado[1:]]))
+                    duenos.append(np.full(len(cerrado) - 1, indice, dtype=np.int64))
+
+                    # Centroide por fórmula del polígono (shoelace); los huecos restan
+                    # área sin importar la orientación con que vengan en la fuente
+                    x0, y0, x1, y1 = cerrado[:-1, 0], cerrado[:-1, 1], cerrado[1:, 0], cerrado[1:, 1]
+                    cruz = x0 * y1 - x1 * y0
+                    area = cruz.sum() / 2
+                    if area == 0:
+                        continue
+                    signo = (1 if orden_anillo == 0 else -1) * np.sign(area)
+                    area_total += signo * area
+                    momento += signo * np.array([((x0 + x1) * cruz).sum(), ((y0 + y1) * cruz).sum()]) / 6
+            if area_total > 0:
+                centroides.append(momento / area_total)
+            else:
+                vertices = np.vstack(anillos)
+                centroides.append((vertices.min(axis=0) + vertices.max(axis=0)) / 2)
+
+        self.codigos = np.asarray(codigos, dtype=np.int64)
+        self.propiedades = propiedades
+        # Centroide (lon, lat) de cada polígono
+        self.centroides = np.asarray(centroides, dtype=np.float64).reshape(-1, 2)
+        if aristas:
+            aristas = np.vstack(aristas)
+            duenos = np.concatenate(duenos)
+        else:
+            aristas = np.empty((0, 4))
+            duenos = np.empty(0, dtype=np.int64)
+
+        # Aristas agrupadas por polígono: las de p están en [inicio[p], inicio[p + 1])
+        orden = np.argsort(duenos, kind='stable')
+        self._aristas = aristas[orden]
+        self._inicio = np.searchsorted(duenos[orden], np.arange(len(self.codigos) + 1))
+
+        # Bbox de cada polígono
+        x = np.minimum(self._aristas[:, 0], self._aristas[:, 2])
+        y = np.minimum(self._aristas[:, 1], self._aristas[:, 3])
+        X = np.maximum(self._aristas[:, 0], self._aristas[:, 2])
+        Y = np.maximum(self._aristas[:, 1], self._aristas[:, 3])
+        if len(self.codigos):
+            self.bbox = np.column_stack([
+                np.minimum.reduceat(x, self._inicio[:-1]), np.minimum.reduceat(y, self._inicio[:-1]),
+                np.maximum.reduceat(X, self._inicio[:-1]), np.maximum.reduceat(Y, self._inicio[:-1])
+            ])
+            extension = (self.bbox[:, 0].min(), self.bbox[:, 1].min(), self.bbox[:, 2].max(), self.bbox[:, 3].max())
+        else:
+            self.bbox = np.empty((0, 4))
+            extension = (0.0, 0.0, 0.0, 0.0)
+        self.grilla = _Grilla(extension, tamano_celda)
+        self._indexar()
+
+        logger.info(
+            f"🧭 Índice espacial: {len(self.codigos)} polígonos, {len(self._aristas)} aristas, "
+            f"grilla {self.grilla.nx}×{self.grilla.ny}"
+        )
+
+    def _indexar(self):
+        """
+        Registra cada polígono en las celdas que cubre su bbox (CSR celda → polígonos)
+        """
+        g = self.grilla
+        c0, c1 = g.columna(self.bbox[:, 0]), g.columna(self.bbox[:, 2])
+        f0, f1 = g.fila(self.bbox[:, 1]), g.fila(self.bbox[:, 3])
+        celdas, poligonos = [], []
+        for p in range(len(self.codigos)):
+            filas, columnas = np.mgrid[f0[p]:f1[p] + 1, c0[p]:c1[p] + 1]
+            celdas.append((filas * g.nx + columnas).ravel())
+            poligonos.append(np.full(filas.size, p, dtype=np.int64))
+        celdas = np.concatenate(celdas) if celdas else np.empty(0, dtype=np.int64)
+        poligonos = np.concatenate(poligonos) if poligonos else np.empty(0, dtype=np.int64)
+
+        orden = np.argsort(celdas, kind='stable')
+        self._poligonos_por_celda = poligonos[orden]
+        self._desplazamientos = np.searchsorted(celdas[orden], np.arange(g.nx * g.ny + 1))
+
+    def _contiene(self, p: int, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        """
+        Prueba par-impar de los puntos contra todas las aristas del polígono p
+        """
+        aristas = self._aristas[self._inicio[p]:self._inicio[p + 1]]
+        x0, y0, x1, y1 = (aristas[:, i][None, :] for i in range(4))
+        dentro = np.empty(len(lon), dtype=bool)
+        bloque = max(1, MAX_ELEMENTOS_BLOQUE // max(1, len(aristas)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for i in range(0, len(lon), bloque):
+                px = lon[i:i + bloque, None]
+                py = lat[i:i + bloque, None]
+                cruza = (y0 > py) != (y1 > py)
+                x_corte = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+                dentro[i:i + bloque] = np.count_nonzero(cruza & (px < x_corte), axis=1) % 2 == 1
+        return dentro
+
+    def asignar(self, lon, lat) -> np.ndarray:
+        """
+        Código del polígono que contiene cada punto (SIN_POLIGONO si ninguno)
+
+        Si un punto cae en más de un polígono (traslapes de la fuente) se
+        toma el primero en el orden del GeoJSON.
+        """
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        resultado = np.full(len(lon), SIN_POLIGONO, dtype=np.int64)
+        validos = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+        if not len(validos) or not len(self.codigos):
+            return resultado
+
+        # Pares (punto, polígono candidato) desde la celda de cada punto
+        celdas = self.grilla.celda(lon[validos], lat[validos])
+        desde = self._desplazamientos[celdas]
+        cantidades = self._desplazamientos[celdas + 1] - desde
+        puntos = np.repeat(validos, cantidades)
+        poligonos = self._poligonos_por_celda[_rangos(desde, cantidades)]
+
+        # Descartar candidatos cuyo bbox no contiene el punto
+        caja = self.bbox[poligonos]
+        en_caja = (
+            (lon[puntos] >= caja[:, 0]) & (lon[puntos] <= caja[:, 2])
+            & (lat[puntos] >= caja[:, 1]) & (lat[puntos] <= caja[:, 3])
+        )
+        puntos, poligonos = puntos[en_caja], poligonos[en_caja]
+
+        # Prueba exacta agrupada por polígono (en orden inverso: gana el primero)
+        orden = np.argsort(poligonos, kind='stable')
+        puntos, poligonos = puntos[orden], poligonos[orden]
+        cortes = np.flatnonzero(np.diff(poligonos)) + 1
+        for grupo_puntos, grupo_poligonos in reversed(list(zip(np.split(puntos, cortes), np.split(poligonos, cortes)))):
+            if not len(grupo_puntos):
+                continue
+            p = grupo_poligonos[0]
+            dentro = self._contiene(p, lon[grupo_puntos], lat[grupo_puntos])
+            resultado[grupo_puntos[dentro]] = self.codigos[p]
+        return resultado
+
+    def distancia_borde(self, lon, lat, codigos) -> np.ndarray:
+        """
+        Distancia (grados) de cada punto al borde del polígono de su código
+
+        Puntos sin coordenadas o con un código sin polígono reciben inf.
+        """
+        lon = np.asarray(lon, dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        codigos = np.asarray(codigos)
+        resultado = np.full(len(lon), np.inf)
+        validos = np.isfinite(lon) & np.isfinite(lat)
+        for p, codigo in enumerate(self.codigos):
+            puntos = np.flatnonzero(validos & (codigos == codigo))
+            if not len(puntos):
+                continue
+            aristas = self._aristas[self._inicio[p]:self._inicio[p + 1]]
+            x0, y0, x1, y1 = (aristas[:, i][None, :] for i in range(4))
+            dx, dy = x1 - x0, y1 - y0
+            largo = dx * dx + dy * dy
+            bloque = max(1, MAX_ELEMENTOS_BLOQUE // max(1, len(aristas)))
+            for i in range(0, len(puntos), bloque):
+                grupo = puntos[i:i + bloque]
+                px = lon[grupo, None]
+                py = lat[grupo, None]
+                # Proyección del punto sobre cada arista, acotada al segmento
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    t = np.clip(np.where(largo > 0, ((px - x0) * dx + (py - y0) * dy) / largo, 0.0), 0.0, 1.0)
+                distancia = np.hypot(px - (x0 + t * dx), py - (y0 + t * dy)).min(axis=1)
+                resultado[grupo] = np.minimum(resultado[grupo], distancia)
+        return resultado
+
+    def en_bbox(self, bbox: BBox) -> np.ndarray:
+        """
+        Códigos de los polígonos cuyo bbox intersecta el bbox dado
+        """
+        lon_min, lat_min, lon_max, lat_max = bbox
+        cruza = (
+            (self.bbox[:, 0] <= lon_max) & (self.bbox[:, 2] >= lon_min)
+            & (self.bbox[:, 1] <= lat_max) & (self.bbox[:, 3] >= lat_min)
+        )
+        return self.codigos[cruza]
+
+
+_indices: Dict[Tuple[str, Optional[Tuple[int, int]]], IndicePoligonos] = {}
+_lock = threading.Lock()
+
+
+def indice_espacial_comunas(resolucion: str = 'alta') -> IndicePoligonos:
+    """
+    Índice de los polígonos comunales (cod_comuna), construido una vez por
+    resolución y versión de los límites locales
+    """
+    clave = (resolucion, version_geografia())
+    indice = _indices.get(clave)
+    if indice is None:
+        with _lock:
+            indice = _indices.get(clave)
+            if indice is None:
+                for vieja in [k for k in _indices if k[1] != clave[1]]:
+                    del _indices[vieja]
+                indice = IndicePoligonos(cargar_geojson('comunas', resolucion), 'cod_comuna')
+                _indices[clave] = indice
+    return indice
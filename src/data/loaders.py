@@ -4,23 +4,103 @@ Los datos se actualizan semanalmente mediante scripts/actualizar_datos_semanal.p
 
 Ventajas de usar cache:
 - Velocidad: Lectura instantánea desde archivos Parquet locales
+- Memoria compartida: si existe la versión Arrow IPC (.arrow) se abre con
+  memory mapping y todos los workers comparten las páginas del page cache
+- Poda de particiones: matrícula y titulados se guardan particionados por
+  Año/CodigoRegion y una consulta por año y región solo abre esos directorios
+- Snapshots versionados: el ETL publica cada actualización completa en
+  data/processed/snapshots/<fecha>/ y cambia el enlace data/processed/current
+  de forma atómica; el loader resuelve el enlace una vez por snapshot, así un
+  request nunca mezcla archivos de dos actualizaciones
+- Recarga en caliente: un hilo vigila la metadata y las firmas de los
+  archivos; cuando la actualización semanal publica datos nuevos se prepara
+  un snapshot nuevo en segundo plano y se cambia atómicamente, sin reiniciar
+  workers ni pasar por un cache frío
 - Confiabilidad: Funciona aunque SQL Server esté caído
 - Eficiencia: No sobrecarga las bases de datos MINEDUC
 - Datos actualizados semanalmente (suficiente para datos educativos)
 """
 
+import os
+import hashlib
+import threading
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from pathlib import Path
 import json
 from datetime import datetime
 import logging
 from typing import Optional, Dict, List
 
+from config.settings import settings
+from src.data.schema import DIMENSIONES, aplicar_esquema, categorias_para, codigo_region
+from src.data.polars_backend import polars_backend, pl
+
 logger = logging.getLogger(__name__)
 
 # Directorio de cache
 CACHE_DIR = Path('data/processed')
 
+# Enlace simbólico al snapshot publicado por el ETL (ver actualizar_datos_semanal.py).
+# Si no existe se usan los archivos sueltos de CACHE_DIR (instalaciones antiguas).
+CURRENT_LINK = CACHE_DIR / 'current'
+
+# Tamaño de página usado para precargar archivos mapeados
+PAGE_SIZE = 4096
+
+
+class CacheSnapshot:
+    """
+    Versión inmutable del cache: metadata, firma y tablas Arrow ya abiertas
+    
+    Las consultas toman el snapshot vigente al comenzar y lo usan hasta el
+    final, así una recarga a mitad de request no mezcla versiones.
+    """
+    
+    def __init__(self, directorio: Path, metadata: Dict, version: str):
+        self.directorio = directorio
+        self.metadata = metadata
+        self.version = version
+        self.tablas: Dict[str, pa.Table] = {}
+    
+    def calentar(self):
+        """
+        Abre con memory mapping los archivos .arrow y trae sus páginas al page cache
+        """
+        for ipc_file in sorted(self.directorio.glob('cache_*.arrow')):
+            with pa.memory_map(str(ipc_file), 'r') as source:
+                tabla = pa.ipc.open_file(source).read_all()
+            _tocar_paginas(tabla)
+            self.tablas[ipc_file.name] = tabla
+
+
+def _tocar_paginas(tabla: pa.Table):
+    """
+    Lee un byte por página de cada buffer para que el primer request no
+    pague los page faults del archivo recién mapeado
+    """
+    for columna in tabla.columns:
+        for chunk in columna.chunks:
+            for buffer in chunk.buffers():
+                if buffer is None:
+                    continue
+                vista = memoryview(buffer)
+                for i in range(0, len(vista), PAGE_SIZE):
+                    vista[i]
+
+
+def _tipo_pandas(tipo: pa.DataType):
+    """
+    Textos de Arrow como StringDtype 'pyarrow' (sin copiar a objetos Python)
+    """
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
 class CacheDataLoader:
     """
     Gestor de carga de datos desde cache local
@@ -28,16 +108,139 @@ class CacheDataLoader:
     
     def __init__(self):
         self.cache_dir = CACHE_DIR
-        self.metadata = self.cargar_metadata()
+        self._lock = threading.Lock()
+        self._vigilante_pid = None
+        # El primer snapshot se crea en el primer acceso (ver _snapshot_actual):
+        # importar el módulo no abre ni recorre archivos, y con gunicorn cada
+        # worker mapea y calienta después del fork
+        self._snapshot: Optional[CacheSnapshot] = None
+    
+    @property
+    def metadata(self) -> Dict:
+        """Metadata del snapshot vigente"""
+        return self._snapshot_actual().metadata
+    
+    @property
+    def version(self) -> str:
+        """Identificador de la versión de datos vigente"""
+        return self._snapshot_actual().version
+    
+    def directorio_vigente(self) -> Path:
+        """
+        Retorna el directorio del snapshot publicado (destino de ``current``)
+        
+        Se resuelve el enlace una sola vez por snapshot: aunque el ETL lo
+        cambie después, las lecturas siguen apuntando al mismo directorio.
+        """
+        current = self.cache_dir / CURRENT_LINK.name
+        if current.exists():
+            return current.resolve()
+        return self.cache_dir
+    
+    def calcular_version(self, metadata: Dict, directorio: Optional[Path] = None) -> str:
+        """
+        Calcula la versión de los datos en disco
+        
+        Combina el directorio del snapshot y la fecha_actualizacion de la
+        metadata con la firma (inode, mtime, tamaño) de cada archivo cache_*,
+        por lo que cambia tanto si el ETL publica un snapshot nuevo como si
+        se reemplaza un archivo.
+        """
+        directorio = directorio or self.directorio_vigente()
+        partes = [str(directorio), str(metadata.get('fecha_actualizacion'))]
+        for path in sorted(directorio.glob('cache_*')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            partes.append(f"{path.name}:{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}")
+        return hashlib.sha1('|'.join(partes).encode('utf-8')).hexdigest()[:12]
+    
+    def _crear_snapshot(self, directorio: Optional[Path] = None) -> CacheSnapshot:
+        """
+        Construye y precalienta un snapshot con el contenido actual del disco
+        """
+        directorio = directorio or self.directorio_vigente()
+        metadata = self.cargar_metadata(directorio=directorio)
+        snapshot = CacheSnapshot(directorio, metadata, self.calcular_version(metadata, directorio))
+        try:
+            snapshot.calentar()
+        except Exception as e:
+            logger.error(f"❌ Error precargando cache Arrow: {e}")
+            snapshot.tablas = {}
+        return snapshot
+    
+    def verificar_actualizacion(self) -> bool:
+        """
+        Detecta una nueva versión de datos y cambia al nuevo snapshot
+        
+        El snapshot nuevo se construye y calienta por completo antes del
+        cambio; mientras tanto los requests siguen usando el anterior.
+        
+        Returns:
+            True si se cambió de snapshot
+        """
+        with self._lock:
+            directorio = self.directorio_vigente()
+            metadata = self.cargar_metadata(log=False, directorio=directorio)
+            anterior = self._snapshot
+            if anterior is not None and self.calcular_version(metadata, directorio) == anterior.version:
+                return False
+            
+            nuevo = self._crear_snapshot(directorio)
+            self._snapshot = nuevo  # Asignación atómica
+            
+        if anterior is not None:
+            logger.info(f"🔄 Cache recargado: versión {anterior.version} → {nuevo.version}")
+        return True
+    
+    def iniciar_vigilancia(self, intervalo: Optional[int] = None):
+        """
+        Inicia (una vez por proceso) el hilo que vigila nuevas versiones de datos
+        
+        Se llama de forma perezosa desde el primer acceso a datos, por lo que
+        cada worker de gunicorn inicia su propio hilo después del fork.
+        """
+        if self._vigilante_pid == os.getpid():
+            return
+        self._vigilante_pid = os.getpid()
+        intervalo = intervalo or settings.DATA_RELOAD_INTERVAL_SECONDS
+        
+        def vigilar():
+            while True:
+                time.sleep(intervalo)
+                try:
+                    self.verificar_actualizacion()
+                except Exception as e:
+                    logger.error(f"❌ Error verificando actualización de datos: {e}")
+        
+        hilo = threading.Thread(target=vigilar, name='cache-watcher', daemon=True)
+        hilo.start()
+        logger.info(f"👀 Vigilancia de datos iniciada (cada {intervalo}s)")
     
-    def cargar_metadata(self) -> Dict:
+    def _snapshot_actual(self) -> CacheSnapshot:
+        """
+        Retorna el snapshot vigente, iniciando la vigilancia si corresponde
+        
+        El primer llamado de cada proceso construye y calienta el snapshot.
+        """
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._crear_snapshot()
+        if settings.DATA_RELOAD_ENABLED and self._vigilante_pid != os.getpid():
+            self.iniciar_vigilancia()
+        return self._snapshot
+    
+    def cargar_metadata(self, log: bool = True, directorio: Optional[Path] = None) -> Dict:
         """
         Carga la metadata de la última actualización
         """
-        metadata_file = self.cache_dir / 'cache_metadata.json'
+        metadata_file = (directorio or self.directorio_vigente()) / 'cache_metadata.json'
         
         if not metadata_file.exists():
-            logger.warning("⚠️  No se encuentra metadata de cache")
+            if log:
+                logger.warning("⚠️  No se encuentra metadata de cache")
             return {
                 'fecha_actualizacion': None,
                 'registros_totales': 0,
@@ -48,7 +251,8 @@ class CacheDataLoader:
             with open(metadata_file, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
-            logger.info(f"📋 Cache actualizado: {metadata.get('fecha_actualizacion')}")
+            if log:
+                logger.info(f"📋 Cache actualizado: {metadata.get('fecha_actualizacion')}")
             return metadata
             
         except Exception as e:
@@ -76,7 +280,8 @@ class CacheDataLoader:
     def cargar_establecimientos(
         self, 
         region: Optional[str] = None,
-        comuna: Optional[str] = None
+        comuna: Optional[str] = None,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Carga datos de establecimientos desde cache
@@ -84,27 +289,28 @@ class CacheDataLoader:
         Args:
             region: Filtrar por región (opcional)
             comuna: Filtrar por comuna (opcional)
+            columns: Columnas a leer (opcional, por defecto todas)
             
         Returns:
             DataFrame con datos de establecimientos
         """
-        cache_file = self.cache_dir / 'cache_establecimientos.parquet'
+        snapshot = self._snapshot_actual()
+        cache_file = snapshot.directorio / 'cache_establecimientos.parquet'
         
-        if not cache_file.exists():
+        if not self._existe_cache(cache_file):
             logger.error(f"❌ No existe archivo de cache: {cache_file}")
             # Retornar desde CSV de respaldo si existe
             return self._cargar_csv_respaldo('establecimientos.csv')
         
         try:
-            df = pd.read_parquet(cache_file)
+            df = self._leer_parquet(
+                cache_file,
+                filtros={'Region': region, 'Comuna': comuna},
+                columns=columns,
+                snapshot=snapshot
+            )
             logger.info(f"✅ Establecimientos cargados: {len(df)} registros")
             
-            # Aplicar filtros
-            if region:
-                df = df[df['Region'] == region]
-            if comuna:
-                df = df[df['Comuna'] == comuna]
-            
             return df
             
         except Exception as e:
@@ -115,7 +321,8 @@ class CacheDataLoader:
         self,
         region: Optional[str] = None,
         año: Optional[int] = None,
-        agregado: bool = False
+        agregado: bool = False,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Carga datos de matrícula desde cache
@@ -124,29 +331,30 @@ class CacheDataLoader:
             region: Filtrar por región (opcional)
             año: Filtrar por año (opcional)
             agregado: Si True, carga datos agregados (más rápido para dashboards)
+            columns: Columnas a leer (opcional, por defecto todas)
             
         Returns:
             DataFrame con datos de matrícula
         """
+        snapshot = self._snapshot_actual()
         if agregado:
-            cache_file = self.cache_dir / 'cache_matricula_agregado.parquet'
+            cache_file = snapshot.directorio / 'cache_matricula_agregado.parquet'
         else:
-            cache_file = self.cache_dir / 'cache_matricula.parquet'
+            cache_file = snapshot.directorio / 'cache_matricula.parquet'
         
-        if not cache_file.exists():
+        if not self._existe_cache(cache_file):
             logger.error(f"❌ No existe archivo de cache: {cache_file}")
             return self._cargar_csv_respaldo('matricula_region.csv')
         
         try:
-            df = pd.read_parquet(cache_file)
+            df = self._leer_parquet(
+                cache_file,
+                filtros={'Region': region, 'Año': año},
+                columns=columns,
+                snapshot=snapshot
+            )
             logger.info(f"✅ Matrícula cargada: {len(df)} registros {'(agregado)' if agregado else ''}")
             
-            # Aplicar filtros
-            if region:
-                df = df[df['Region'] == region]
-            if año:
-                df = df[df['Año'] == año]
-            
             return df
             
         except Exception as e:
@@ -156,7 +364,8 @@ class CacheDataLoader:
     def cargar_docentes(
         self,
         region: Optional[str] = None,
-        especialidad: Optional[str] = None
+        especialidad: Optional[str] = None,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Carga datos de docentes desde cache
@@ -164,26 +373,27 @@ class CacheDataLoader:
         Args:
             region: Filtrar por región (opcional)
             especialidad: Filtrar por especialidad (opcional)
+            columns: Columnas a leer (opcional, por defecto todas)
             
         Returns:
             DataFrame con datos de docentes
         """
-        cache_file = self.cache_dir / 'cache_docentes.parquet'
+        snapshot = self._snapshot_actual()
+        cache_file = snapshot.directorio / 'cache_docentes.parquet'
         
-        if not cache_file.exists():
+        if not self._existe_cache(cache_file):
             logger.error(f"❌ No existe archivo de cache: {cache_file}")
             return self._cargar_csv_respaldo('docentes_especialidad.csv')
         
         try:
-            df = pd.read_parquet(cache_file)
+            df = self._leer_parquet(
+                cache_file,
+                filtros={'Region': region, 'Especialidad': especialidad},
+                columns=columns,
+                snapshot=snapshot
+            )
             logger.info(f"✅ Docentes cargados: {len(df)} registros")
             
-            # Aplicar filtros
-            if region:
-                df = df[df['Region'] == region]
-            if especialidad:
-                df = df[df['Especialidad'] == especialidad]
-            
             return df
             
         except Exception as e:
@@ -193,7 +403,8 @@ class CacheDataLoader:
     def cargar_titulados(
         self,
         region: Optional[str] = None,
-        año: Optional[int] = None
+        año: Optional[int] = None,
+        columns: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Carga datos de titulados desde cache
@@ -201,32 +412,201 @@ class CacheDataLoader:
         Args:
             region: Filtrar por región (opcional)
             año: Filtrar por año (opcional)
+            columns: Columnas a leer (opcional, por defecto todas)
             
         Returns:
             DataFrame con datos de titulados
         """
-        cache_file = self.cache_dir / 'cache_titulados.parquet'
+        snapshot = self._snapshot_actual()
+        cache_file = snapshot.directorio / 'cache_titulados.parquet'
         
-        if not cache_file.exists():
+        if not self._existe_cache(cache_file):
             logger.error(f"❌ No existe archivo de cache: {cache_file}")
             return self._cargar_csv_respaldo('titulados_2023.csv')
         
         try:
-            df = pd.read_parquet(cache_file)
+            df = self._leer_parquet(
+                cache_file,
+                filtros={'Region': region, 'Año': año},
+                columns=columns,
+                snapshot=snapshot
+            )
             logger.info(f"✅ Titulados cargados: {len(df)} registros")
             
-            # Aplicar filtros
-            if region:
-                df = df[df['Region'] == region]
-            if año:
-                df = df[df['Año'] == año]
-            
             return df
             
         except Exception as e:
             logger.error(f"❌ Error cargando titulados: {e}")
             return pd.DataFrame()
     
+    def _existe_cache(self, cache_file: Path) -> bool:
+        """
+        Indica si el dataset existe en alguno de sus formatos de cache
+        (Parquet, directorio particionado o Arrow IPC)
+        """
+        return (
+            cache_file.exists()
+            or cache_file.with_suffix('').is_dir()
+            or cache_file.with_suffix('.arrow').exists()
+        )
+    
+    def _leer_parquet(
+        self,
+        cache_file: Path,
+        filtros: Dict,
+        columns: Optional[List[str]] = None,
+        snapshot: Optional[CacheSnapshot] = None
+    ) -> pd.DataFrame:
+        """
+        Lee un dataset de cache empujando filtros y proyección de columnas a pyarrow
+        
+        Si hay filtros y existe la versión particionada (directorio
+        cache_<nombre>/ con particiones Año=/CodigoRegion=), solo se abren las
+        particiones que coinciden. Si junto al Parquet existe su versión Arrow
+        IPC (mismo nombre, .arrow) se lee esa con memory mapping. Si no, los filtros se evalúan contra las
+        estadísticas de cada row group del Parquet, por lo que los grupos que
+        no pueden coincidir no se leen. En ambos casos solo se decodifican las
+        columnas solicitadas y el resultado se entrega con el esquema compacto
+        aplicado (ver src/data/schema.py).
+        
+        Con ANALYTICS_BACKEND=polars las lecturas Parquet (particionadas o no)
+        se hacen con un LazyFrame de Polars (ver _leer_polars).
+        
+        Args:
+            cache_file: Archivo Parquet a leer
+            filtros: {columna: valor}; los valores None se ignoran
+            columns: Columnas a leer (opcional, por defecto todas)
+            snapshot: Snapshot del que tomar las tablas Arrow ya abiertas
+        """
+        predicados = [
+            (columna, '==', valor)
+            for columna, valor in filtros.items()
+            if valor
+        ]
+        
+        ipc_file = cache_file.with_suffix('.arrow')
+        tabla = snapshot.tablas.get(ipc_file.name) if snapshot else None
+        particionado = cache_file.with_suffix('')
+        usar_polars = settings.ANALYTICS_BACKEND == 'polars' and polars_backend.disponible()
+        if particionado.is_dir() and (predicados or not (tabla or ipc_file.exists())):
+            if usar_polars:
+                df = self._leer_polars(particionado, predicados, columns)
+            else:
+                df = self._leer_particionado(particionado, predicados, columns)
+        elif tabla is not None or ipc_file.exists():
+            df = self._leer_ipc(ipc_file, predicados, columns, tabla=tabla)
+        elif usar_polars:
+            df = self._leer_polars(cache_file, predicados, columns)
+        else:
+            df = pd.read_parquet(
+                cache_file,
+                columns=columns,
+                filters=predicados or None
+            )
+        return aplicar_esquema(df, cache_file.stem)
+    
+    def _leer_particionado(
+        self,
+        directorio: Path,
+        predicados: List,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Lee un dataset Parquet particionado estilo Hive (Año=/CodigoRegion=)
+        
+        El filtro por región se traduce a CodigoRegion para que pyarrow descarte
+        directorios completos sin abrir sus archivos.
+        """
+        dataset = ds.dataset(str(directorio), format='parquet', partitioning='hive')
+        
+        filtro = None
+        for columna, _, valor in predicados:
+            if columna == 'Region' and codigo_region(valor) is not None:
+                columna, valor = 'CodigoRegion', codigo_region(valor)
+            expr = ds.field(columna) == valor
+            filtro = expr if filtro is None else filtro & expr
+        
+        return dataset.to_table(columns=columns, filter=filtro).to_pandas()
+    
+    def _leer_polars(
+        self,
+        origen: Path,
+        predicados: List,
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Lee un Parquet (o directorio particionado) con un LazyFrame de Polars
+        
+        Polars empuja el filtro y la proyección al lector (salta particiones y
+        row groups que no coinciden) y decodifica en paralelo; el resultado se
+        convierte a pandas solo al final. En el directorio particionado el
+        filtro por región se traduce a CodigoRegion como en _leer_particionado.
+        """
+        lazy = polars_backend.escanear(origen)
+        for columna, _, valor in predicados:
+            if origen.is_dir() and columna == 'Region' and codigo_region(valor) is not None:
+                columna, valor = 'CodigoRegion', codigo_region(valor)
+            lazy = lazy.filter(pl.col(columna) == valor)
+        if columns:
+            lazy = lazy.select(columns)
+        return lazy.collect().to_pandas()
+    
+    def _leer_ipc(
+        self,
+        ipc_file: Path,
+        predicados: List,
+        columns: Optional[List[str]] = None,
+        tabla: Optional[pa.Table] = None
+    ) -> pd.DataFrame:
+        """
+        Abre un archivo Arrow IPC con memory mapping (o usa la tabla ya
+        mapeada por el snapshot vigente)
+        
+        La tabla apunta directamente a las páginas del archivo mapeado (sin
+        copia); la proyección de columnas es gratuita y el filtro solo
+        materializa las filas seleccionadas. Sin filtros, las columnas
+        numéricas sin nulos pasan a pandas también sin copia.
+        
+        Las dimensiones se entregan como Categorical desde columnas
+        diccionario de Arrow (el ETL ya las escribe así): pandas solo copia
+        los códigos y el diccionario, nunca los strings de cada fila. El
+        resto de los textos queda en pandas respaldado por el mismo buffer
+        Arrow (StringDtype 'pyarrow'), sin convertirlos a objetos Python.
+        """
+        if tabla is None:
+            with pa.memory_map(str(ipc_file), 'r') as source:
+                tabla = pa.ipc.open_file(source).read_all()
+        
+        if predicados:
+            # Proyectar antes de filtrar para materializar solo las columnas
+            # pedidas más las usadas por el filtro
+            if columns:
+                usadas = list(dict.fromkeys(columns + [p[0] for p in predicados]))
+                tabla = tabla.select(usadas)
+            filtro = None
+            for columna, _, valor in predicados:
+                expr = pc.field(columna) == valor
+                filtro = expr if filtro is None else filtro & expr
+            tabla = tabla.filter(filtro)
+        
+        if columns:
+            tabla = tabla.select(columns)
+        
+        # Archivos escritos sin el esquema compacto: codificar las dimensiones
+        # en Arrow antes de pasar a pandas
+        codificadas = []
+        for i, campo in enumerate(tabla.schema):
+            if campo.name in DIMENSIONES and (pa.types.is_string(campo.type) or pa.types.is_large_string(campo.type)):
+                tabla = tabla.set_column(i, campo.name, pc.dictionary_encode(tabla.column(i)))
+                codificadas.append(campo.name)
+        
+        df = tabla.to_pandas(split_blocks=True, types_mapper=_tipo_pandas)
+        for columna in codificadas:
+            # Mismo orden de categorías que aplicar_esquema (el de dictionary_encode es el de aparición)
+            categorias = pd.Series(df[columna].cat.categories)
+            df[columna] = df[columna].cat.set_categories(categorias_para(columna, categorias))
+        return df
+    
     def _cargar_csv_respaldo(self, filename: str) -> pd.DataFrame:
         """
         Carga datos desde CSV de respaldo si el cache no está disponible
@@ -235,7 +615,7 @@ class CacheDataLoader:
         
         if csv_path.exists():
             logger.warning(f"⚠️  Cargando desde CSV de respaldo: {filename}")
-            return pd.read_csv(csv_path)
+            return aplicar_esquema(pd.read_csv(csv_path), csv_path.stem)
         else:
             logger.error(f"❌ No se encuentra archivo de respaldo: {csv_path}")
             return pd.DataFrame()
@@ -249,6 +629,7 @@ class CacheDataLoader:
             'dias_desde_actualizacion': self.get_dias_desde_actualizacion(),
             'registros_totales': self.metadata.get('registros_totales', 0),
             'fuentes_disponibles': len(self.metadata.get('fuentes_actualizadas', [])),
+            'version': self.version,
             'estado': 'actualizado' if self.get_dias_desde_actualizacion() and self.get_dias_desde_actualizacion() <= 7 else 'desactualizado'
         }
 
@@ -258,24 +639,24 @@ data_loader = CacheDataLoader()
 
 
 # Funciones de conveniencia para importar directamente
-def get_establecimientos(region=None, comuna=None):
+def get_establecimientos(region=None, comuna=None, columns=None):
     """Carga establecimientos desde cache"""
-    return data_loader.cargar_establecimientos(region, comuna)
+    return data_loader.cargar_establecimientos(region, comuna, columns=columns)
 
 
-def get_matricula(region=None, año=None, agregado=False):
+def get_matricula(region=None, año=None, agregado=False, columns=None):
     """Carga matrícula desde cache"""
-    return data_loader.cargar_matricula(region, año, agregado)
+    return data_loader.cargar_matricula(region, año, agregado, columns=columns)
 
 
-def get_docentes(region=None, especialidad=None):
+def get_docentes(region=None, especialidad=None, columns=None):
     """Carga docentes desde cache"""
-    return data_loader.cargar_docentes(region, especialidad)
+    return data_loader.cargar_docentes(region, especialidad, columns=columns)
 
 
-def get_titulados(region=None, año=None):
+def get_titulados(region=None, año=None, columns=None):
     """Carga titulados desde cache"""
-    return data_loader.cargar_titulados(region, año)
+    return data_loader.cargar_titulados(region, año, columns=columns)
 
 
 def get_cache_stats():
@@ -0,0 +1,166 @@
+"""
+Backend analítico opcional con Polars (LazyFrame)
+
+Los filtros y agregaciones de las secciones se arman como un plan lazy sobre
+el archivo (scan_csv / scan_parquet): Polars proyecta solo las columnas
+usadas, empuja los predicados al lector y agrupa en paralelo en todos los
+núcleos. A pandas solo llegan los grupos ya agregados, en el borde con
+Plotly; las medidas de cada KPI, gráfico y tabla se declaran en
+src/data/backend_archivos.py.
+
+Se activa con ANALYTICS_BACKEND=polars (ver config/settings.py). Si el
+paquete polars no está instalado la app sigue con el backend pandas.
+
+La paridad con el backend pandas se verifica con
+scripts/verificar_paridad_backends.py.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence
+
+import pandas as pd
+
+from src.data.backend_archivos import (
+    BOOLEANO, DECIMAL, ENTERO, ESCALA_PROMEDIO, OTRO, BackendArchivos, Medida, Predicados
+)
+
+try:
+    import polars as pl
+except ImportError:  # Dependencia opcional
+    pl = None
+
+logger = logging.getLogger(__name__)
+
+
+class PolarsBackend(BackendArchivos):
+    """
+    Consultas lazy de Polars sobre archivos de datos
+    """
+
+    nombre = 'polars'
+
+    @staticmethod
+    def disponible() -> bool:
+        """True si el paquete polars está instalado"""
+        return pl is not None
+
+    @staticmethod
+    def escanear(path) -> "pl.LazyFrame":
+        """
+        LazyFrame que lee el archivo (o directorio Parquet particionado)
+
+        Las columnas que el Parquet guarda como diccionario (categóricas de
+        pandas) se leen como texto: así los filtros, el orden de los grupos y
+        el vocabulario de categorías que arma aplicar_esquema son los mismos
+        que en el backend pandas.
+        """
+        path = Path(path)
+        if path.is_dir():
+            lazy = pl.scan_parquet(path / '**' / '*.parquet', hive_partitioning=True)
+        elif path.suffix == '.parquet':
+            lazy = pl.scan_parquet(path)
+        else:
+            return pl.scan_csv(path)
+        return lazy.with_columns(pl.col(pl.Categorical).cast(pl.String))
+
+    def _escribir_parquet(self, csv: Path, destino: Path):
+        self.escanear(csv).sink_parquet(destino)
+
+    def _leer_tipos(self, path) -> Dict[str, str]:
+        tipos = {}
+        for columna, dtype in self.escanear(path).collect_schema().items():
+            if dtype.is_integer():
+                tipos[columna] = ENTERO
+            elif dtype.is_float():
+                tipos[columna] = DECIMAL
+            elif dtype == pl.Boolean:
+                tipos[columna] = BOOLEANO
+            else:
+                tipos[columna] = OTRO
+        return tipos
+
+    def _tiene_filas(self, path) -> bool:
+        return self.escanear(path).head(1).collect().height > 0
+
+    @staticmethod
+    def condicion(predicados: Predicados) -> Optional["pl.Expr"]:
+        """
+        Expresión de filtro para los predicados del dashboard (None: sin filtro)
+        """
+        years, values = predicados
+        condiciones = []
+        if years is not None:
+            condiciones.append(pl.col('año').is_between(years[0], years[1], closed='both'))
+        for columna, aceptados in values.items():
+            condiciones.append(pl.col(columna).is_in(aceptados))
+
+        if not condiciones:
+            return None
+        expr = condiciones[0]
+        for c in condiciones[1:]:
+            expr = expr & c
+        return expr
+
+    def plan(self, path, predicados: Predicados) -> "pl.LazyFrame":
+        """
+        LazyFrame del archivo con los predicados aplicados (sin ejecutar)
+        """
+        lazy = self.escanear(path)
+        expr = self.condicion(predicados)
+        return lazy if expr is None else lazy.filter(expr)
+
+    @staticmethod
+    def _expresion(medida: Medida, tipos: Dict[str, str]) -> "pl.Expr":
+        """
+        Expresión de agregación de una medida
+        """
+        operacion = medida[0]
+        if operacion == 'filas':
+            return pl.len().cast(pl.Int64)
+
+        columna = pl.col(medida[1])
+        if operacion == 'suma':
+            if tipos.get(medida[1], OTRO) in (ENTERO, BOOLEANO):
+                return columna.cast(pl.Int64).sum()
+            return columna.cast(pl.Float64).sum()
+        if operacion == 'suma_escalada':
+            # Misma expresión que backend_archivos.escalar
+            return (columna.cast(pl.Float64) * ESCALA_PROMEDIO + 0.5).floor().sum()
+        if operacion == 'conteo':
+            return columna.count().cast(pl.Int64)
+        if operacion == 'distintos':
+            return columna.drop_nulls().n_unique().cast(pl.Int64)
+        if operacion == 'iguales':
+            return (columna == medida[2]).sum().cast(pl.Int64)
+        raise ValueError(f"Operación desconocida: {operacion}")
+
+    def _filas(self, path, predicados: Predicados) -> pd.DataFrame:
+        """
+        LazyFrame filtrado, materializado y convertido a pandas
+        """
+        return self.plan(path, predicados).collect().to_pandas()
+
+    def _resumir(
+        self,
+        path,
+        predicados: Predicados,
+        por: Sequence[str],
+        medidas: Mapping[str, Medida],
+        tipos: Dict[str, str]
+    ) -> pd.DataFrame:
+        """
+        Evalúa las medidas con un group_by del LazyFrame sobre el archivo
+        """
+        expresiones = [self._expresion(medida, tipos).alias(nombre) for nombre, medida in medidas.items()]
+
+        lazy = self.plan(path, predicados)
+        if por:
+            lazy = lazy.group_by(list(por)).agg(expresiones).sort(list(por))
+        else:
+            lazy = lazy.select(expresiones)
+        return lazy.collect().to_pandas()
+
+
+# Instancia global para usar en toda la app
+polars_backend = PolarsBackend()
@@ -0,0 +1,148 @@
+"""
+Registro de datasets compartido por todo el proceso
+
+Cada archivo se lee una sola vez y queda en memoria identificado por su ruta
+junto con la firma (mtime, tamaño) del archivo en disco. Mientras la firma no
+cambie, las llamadas siguientes reutilizan el DataFrame ya cargado; cuando el
+archivo se reescribe (p. ej. tras regenerar los datos simulados) se vuelve a
+leer automáticamente en la siguiente solicitud.
+
+Los DataFrames entregados son copias superficiales del original: comparten
+los buffers de datos (sin costo de copia), pero asignar o eliminar columnas
+en la copia no afecta a la versión compartida. Los consumidores NO deben
+modificar valores in-place (``df.loc[...] = ...``); los filtros y groupby
+habituales generan objetos nuevos y son seguros.
+"""
+
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Firma de un archivo en disco: (mtime en nanosegundos, tamaño en bytes)
+Firma = Tuple[int, int]
+
+
+class DatasetRegistry:
+    """
+    Cache en memoria de datasets leídos desde disco, invalidada por firma de archivo
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _firma(path: str) -> Optional[Firma]:
+        """
+        Retorna (mtime_ns, tamaño) del archivo, o None si no existe
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _lock_para(self, key: str) -> threading.Lock:
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get(
+        self,
+        path,
+        reader: Callable[[str], pd.DataFrame] = pd.read_csv
+    ) -> Optional[pd.DataFrame]:
+        """
+        Retorna el dataset de ``path``, leyéndolo solo si cambió en disco
+
+        Args:
+            path: Ruta del archivo
+            reader: Función que recibe la ruta y retorna un DataFrame
+
+        Returns:
+            Copia superficial del DataFrame cacheado, o None si el archivo no existe
+        """
+        key = str(Path(path).resolve())
+        firma = self._firma(key)
+
+        if firma is None:
+            self.invalidate(key)
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None or entry['firma'] != firma:
+            # Un lock por archivo: evita que varios hilos parseen el mismo
+            # archivo a la vez sin bloquear la lectura de los demás
+            with self._lock_para(key):
+                entry = self._entries.get(key)
+                if entry is None or entry['firma'] != firma:
+                    df = reader(key)
+                    entry = {'firma': firma, 'df': df}
+                    self._entries[key] = entry
+                    logger.info(f"📥 Dataset cargado en registro: {Path(key).name} ({len(df)} registros)")
+
+        return entry['df'].copy(deep=False)
+
+    def derivado(
+        self,
+        path,
+        clave: str,
+        builder: Callable[[pd.DataFrame], Any],
+        df: Optional[pd.DataFrame] = None
+    ) -> Any:
+        """
+        Retorna un objeto derivado del dataset (índice, cubo, ...) calculado
+        una sola vez por versión cargada
+        
+        Se guarda junto a la entrada del registro, por lo que se descarta
+        automáticamente cuando el archivo cambia y se vuelve a leer.
+        
+        Args:
+            path: Ruta del archivo (ya cargado con get)
+            clave: Nombre del derivado
+            builder: Función que recibe el DataFrame compartido y retorna el derivado
+            df: Copia entregada por get; si el archivo se recargó desde entonces
+                el derivado ya no le corresponde y se retorna None
+        
+        Returns:
+            El derivado, o None si el dataset no está cargado o cambió
+        """
+        key = str(Path(path).resolve())
+        entry = self._entries.get(key)
+        if entry is None or (df is not None and df.index is not entry['df'].index):
+            return None
+        
+        derivados = entry.setdefault('derivados', {})
+        if clave not in derivados:
+            with self._lock_para(key):
+                if clave not in derivados:
+                    derivados[clave] = builder(entry['df'])
+        return derivados[clave]
+    
+    def firma(self, path) -> Optional[Firma]:
+        """
+        Retorna la firma con que está cacheado ``path`` (None si no está cargado)
+        """
+        entry = self._entries.get(str(Path(path).resolve()))
+        return entry['firma'] if entry else None
+
+    def invalidate(self, path=None):
+        """
+        Descarta un dataset del registro (o todos si no se indica ruta)
+        """
+        if path is None:
+            self._entries.clear()
+            return
+        self._entries.pop(str(Path(path).resolve()), None)
+
+
+# Instancia global para usar en toda la app
+dataset_registry = DatasetRegistry()
@@ -0,0 +1,252 @@
+"""
+Esquema compacto en memoria para los datasets EMTP
+
+Declara los tipos con que se mantienen los datasets una vez cargados:
+- Dimensiones (región, comuna, especialidad, dependencia, género, zona, ...)
+  como pandas Categorical en orden alfabético (ver categorias_para)
+- Conteos como int32 (el año como int16)
+- Tasas y porcentajes en float64. NUMERICOS las declara float32, pero solo
+  se reducen si cada valor es exacto en float32 (p. ej. enteros guardados
+  como decimales). Las tasas del CSV (0.535, ...) no lo son: en float32 los
+  promedios y redondeos de las tarjetas cambiarían y los backends DuckDB y
+  Polars, que leen float64, dejarían de coincidir con pandas. Se renuncia
+  a ese ahorro a propósito; el grueso de la reducción viene de categóricas
+  y conteos.
+
+Las comparaciones de igualdad y los groupby sobre categóricas operan sobre
+códigos enteros en lugar de strings, y la huella en memoria se reduce varias
+veces, lo que permite correr más workers de gunicorn por servidor.
+
+Uso:
+    df = aplicar_esquema(pd.read_csv(path), 'matricula')
+    reporte_memoria()  # bytes antes/después por dataset
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Códigos y nombres territoriales: fuente única en dimension_territorial
+from src.data.dimension_territorial import CATEGORIAS_PROVINCIA, CODIGOS_REGION, codigo_de_region
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# VOCABULARIOS DE DIMENSIONES
+# ============================================================================
+REGIONES = [
+    "Arica y Parinacota", "Tarapacá", "Antofagasta", "Atacama", "Coquimbo",
+    "Valparaíso", "Metropolitana", "O'Higgins", "Maule", "Ñuble", "Biobío",
+    "La Araucanía", "Los Ríos", "Los Lagos", "Aysén", "Magallanes"
+]
+
+ESPECIALIDADES = [
+    "Administración", "Electricidad", "Mecánica Industrial", "Construcción",
+    "Gastronomía", "Contabilidad", "Enfermería", "Programación",
+    "Telecomunicaciones", "Soldadura", "Turismo", "Párvulos", "Agropecuaria",
+    "Forestal", "Acuicultura", "Minería", "Química Industrial"
+]
+
+DEPENDENCIAS = [
+    "Municipal", "SLEP", "Particular Subvencionado", "Particular Pagado",
+    "Particular", "Administración Delegada"
+]
+
+GENEROS = ["Masculino", "Femenino"]
+
+ZONAS = ["Urbana", "Rural"]
+
+# Columna → vocabulario declarado. None: las categorías se toman de los datos.
+# Nombres en minúscula: datos simulados; capitalizados: cache Parquet MINEDUC.
+DIMENSIONES: Dict[str, Optional[List[str]]] = {
+    'region': REGIONES,
+    'Region': REGIONES,
+    'comuna': None,
+    'Comuna': None,
+    'provincia': CATEGORIAS_PROVINCIA,
+    'Provincia': CATEGORIAS_PROVINCIA,
+    'especialidad': ESPECIALIDADES,
+    'Especialidad': ESPECIALIDADES,
+    'dependencia': DEPENDENCIAS,
+    'Dependencia': DEPENDENCIAS,
+    'genero': GENEROS,
+    'zona': ZONAS,
+    'RuralUrbano': ZONAS,
+    'tipo_proyecto': None,
+    'estado': None,
+    'Sector': None,
+    'SectorEconomico': None,
+    'Grado': None,
+}
+
+# ============================================================================
+# TIPOS NUMÉRICOS
+# ============================================================================
+NUMERICOS: Dict[str, str] = {
+    # Años
+    'año': 'int16',
+    'Año': 'int16',
+    # Conteos
+    'matricula_total': 'int32',
+    'matricula_hombres': 'int32',
+    'matricula_mujeres': 'int32',
+    'matricula_especialidad': 'int32',
+    'egresados_total': 'int32',
+    'transicion_esup': 'int32',
+    'a_universidades': 'int32',
+    'a_institutos': 'int32',
+    'titulados': 'int32',
+    'establecimientos_beneficiados': 'int32',
+    'establecimiento_id': 'int32',
+    'docente_id': 'int32',
+    'edad': 'int32',
+    'experiencia_años': 'int32',
+    'cod_comuna': 'int32',
+    'RBD': 'int32',
+    'CodigoRegion': 'int32',
+    'CodigoProvincia': 'int32',
+    'codregion': 'int32',
+    'codprovincia': 'int32',
+    'CodigoComuna': 'int32',
+    'TotalMatricula': 'int32',
+    'MatriculaEMTP': 'int32',
+    'Hombres': 'int32',
+    'Mujeres': 'int32',
+    'CantidadEstablecimientos': 'int32',
+    'CantidadDocentes': 'int32',
+    'DocentesTitulados': 'int32',
+    'DocentesContrato': 'int32',
+    'DocentesPlanta': 'int32',
+    'CantidadTitulados': 'int32',
+    # Tasas y porcentajes
+    'tasa_retencion': 'float32',
+    'tasa_transicion': 'float32',
+    'tasa_titulacion': 'float32',
+    'tiempo_titulacion_meses': 'float32',
+    'pct_ejecucion': 'float32',
+    'PromedioExperiencia': 'float32',
+    'PromedioNotas': 'float32',
+    'TasaAprobacion': 'float32',
+}
+
+# Reporte de memoria por dataset: {nombre: {'antes': bytes, 'despues': bytes, ...}}
+_reportes: Dict[str, Dict] = {}
+
+
+def categorias_para(columna: str, valores: pd.Series) -> List[str]:
+    """
+    Retorna las categorías de una dimensión para los valores dados
+
+    El vocabulario declarado se une con los valores observados (para no perder
+    datos no previstos) y se ordena alfabéticamente, el mismo orden que usa
+    groupby sobre strings, de modo que las salidas agregadas no cambian.
+    Como dependen de los valores observados, los códigos de un mismo valor
+    pueden variar entre versiones de los datos o particiones: los valores se
+    comparan por etiqueta, nunca por código.
+    """
+    observados = valores.dropna().astype(str).unique().tolist()
+    declarados = DIMENSIONES.get(columna) or []
+    return sorted(set(declarados) | set(observados))
+
+
+def codigo_region(region) -> Optional[int]:
+    """
+    Retorna el código numérico de una región (acepta nombre o código)
+    """
+    return codigo_de_region(region)
+
+
+def _convertir_numerico(serie: pd.Series, dtype: str) -> pd.Series:
+    """
+    Convierte una serie numérica al dtype compacto si no pierde información
+    """
+    if pd.api.types.is_bool_dtype(serie) or serie.dtype == dtype:
+        return serie
+
+    if dtype.startswith('int'):
+        if not pd.api.types.is_integer_dtype(serie) or serie.hasnans:
+            return serie  # Contiene nulos (NaN o Int nullable) o decimales: se mantiene
+        info = np.iinfo(dtype)
+        if len(serie) and (serie.min() < info.min or serie.max() > info.max):
+            return serie
+        return serie.astype(dtype)
+
+    if pd.api.types.is_float_dtype(serie):
+        # Solo si cada valor sobrevive la ida y vuelta: las tasas leídas del CSV
+        # (0.535, ...) no son exactas en float32 y se redondearían distinto al mostrarlas
+        compacta = serie.astype(dtype)
+        if np.array_equal(compacta.to_numpy(np.float64), serie.to_numpy(np.float64), equal_nan=True):
+            return compacta
+    return serie
+
+
+def _como_texto(serie: pd.Series) -> pd.Series:
+    """
+    Valores no nulos de una dimensión como str (las categorías son str)
+    """
+    if pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+        return serie
+    return serie.where(serie.isna(), serie.astype(str))
+
+
+def aplicar_esquema(df: pd.DataFrame, nombre: Optional[str] = None) -> pd.DataFrame:
+    """
+    Aplica el esquema compacto a un DataFrame
+
+    Args:
+        df: DataFrame recién cargado
+        nombre: Nombre del dataset para el reporte de memoria (opcional)
+
+    Returns:
+        Nuevo DataFrame con dimensiones categóricas y numéricos reducidos
+    """
+    if df.empty:
+        return df
+
+    antes = int(df.memory_usage(deep=True).sum())
+    columnas = {}
+    cambios = False
+
+    for columna in df.columns:
+        serie = df[columna]
+        if columna in DIMENSIONES and not isinstance(serie.dtype, pd.CategoricalDtype):
+            if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+                # Dimensión numérica (p. ej. Grado desde SQL Server): se mantiene su tipo
+                columnas[columna] = serie
+                continue
+            valores = _como_texto(serie)
+            columnas[columna] = pd.Categorical(
+                valores, categories=categorias_para(columna, valores)
+            )
+        elif columna in NUMERICOS:
+            columnas[columna] = _convertir_numerico(serie, NUMERICOS[columna])
+        else:
+            columnas[columna] = serie
+        cambios = cambios or columnas[columna] is not serie
+
+    # Si ya viene compacto (p. ej. desde Arrow IPC mapeado) no se copia nada
+    compacto = pd.DataFrame(columnas, index=df.index, copy=False) if cambios else df
+
+    if nombre:
+        despues = int(compacto.memory_usage(deep=True).sum())
+        _reportes[nombre] = {
+            'registros': len(compacto),
+            'antes': antes,
+            'despues': despues,
+            'ahorro': antes - despues,
+            'ahorro_pct': round((1 - despues / antes) * 100, 1) if antes else 0.0
+        }
+        logger.info(
+            f"🗜️  Esquema compacto {nombre}: {antes / 1e6:.1f} MB → {despues / 1e6:.1f} MB"
+        )
+
+    return compacto
+
+
+def reporte_memoria() -> Dict[str, Dict]:
+    """
+    Retorna los bytes ahorrados por dataset desde que se aplicó el esquema
+    """
+    return {nombre: dict(datos) for nombre, datos in _reportes.items()}
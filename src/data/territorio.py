@@ -0,0 +1,181 @@
+"""
+Índice territorial precalculado: región → comunas
+
+Las opciones del filtro de comuna se derivaban leyendo completo
+matricula_comunal_simulada.csv en cada cambio de región. Este índice se
+construye una vez por versión de datos (firma mtime/tamaño del CSV), se
+persiste como un JSON pequeño junto a los datos y se sirve desde memoria,
+por lo que cambiar de región cuesta microsegundos.
+
+Las comunas se agrupan por código de región (derivado del código de comuna,
+ver src/data/dimension_territorial.py), así que la región seleccionada se
+resuelve por nombre, alias ('Araucanía') o código.
+"""
+
+import os
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.data.dimension_territorial import codigo_de_region, region_de_comuna
+from src.data.registry import dataset_registry
+from src.data.schema import aplicar_esquema
+
+logger = logging.getLogger(__name__)
+
+COMUNAL_DATA_PATH = Path('data/processed/matricula_comunal_simulada.csv')
+INDICE_COMUNAS_PATH = Path('data/processed/indice_comunas.json')
+
+TODAS_LAS_REGIONES = 'Todas las regiones'
+TODAS_LAS_COMUNAS = 'Todas las comunas'
+
+# Formato del artefacto persistido (parte de su versión: cambiarlo lo reconstruye)
+FORMATO_INDICE = 2
+
+
+def cargar_matricula_comunal() -> Optional[pd.DataFrame]:
+    """
+    Retorna la matrícula comunal simulada desde el registro de datasets
+    (None si el archivo no existe)
+    """
+    return dataset_registry.get(
+        COMUNAL_DATA_PATH,
+        reader=lambda path: aplicar_esquema(pd.read_csv(path), 'matricula_comunal')
+    )
+
+
+class IndiceComunas:
+    """
+    Índice en memoria de comunas por región, con persistencia en JSON
+    """
+
+    def __init__(self, data_path: Path = COMUNAL_DATA_PATH, index_path: Path = INDICE_COMUNAS_PATH):
+        self.data_path = Path(data_path)
+        self.index_path = Path(index_path)
+        self._version = None
+        self._opciones: Dict[Optional[int], List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _version_datos(self) -> Optional[List[int]]:
+        """
+        Versión de los datos de origen: [mtime_ns, tamaño] del CSV y formato del índice
+        """
+        try:
+            stat = os.stat(self.data_path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size, FORMATO_INDICE]
+
+    def _construir(self) -> Dict:
+        """
+        Calcula el índice desde el CSV comunal
+        """
+        df = cargar_matricula_comunal()
+        pares = df[['cod_comuna', 'comuna']].drop_duplicates()
+        pares = pares.assign(codregion=region_de_comuna(pares['cod_comuna']))
+        por_region = {
+            str(codigo): sorted(str(c) for c in grupo['comuna'].unique())
+            for codigo, grupo in pares.groupby('codregion')
+        }
+        return {
+            'nacional': sorted(str(c) for c in pares['comuna'].unique()),
+            'por_region': por_region
+        }
+
+    def _leer_artefacto(self, version: List[int]) -> Optional[Dict]:
+        """
+        Lee el índice persistido si corresponde a la versión actual de los datos
+        """
+        if not self.index_path.exists():
+            return None
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Índice de comunas ilegible, se reconstruye: {e}")
+            return None
+        return indice if indice.get('version') == version else None
+
+    def _guardar_artefacto(self, indice: Dict):
+        """
+        Persiste el índice junto a los datos (escritura atómica)
+        """
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(indice, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar el índice de comunas: {e}")
+
+    def _asegurar_vigente(self) -> bool:
+        """
+        Recarga el índice si cambió la versión de los datos
+
+        Returns:
+            False si no hay datos de origen
+        """
+        version = self._version_datos()
+        if version is None:
+            return False
+        if version == self._version:
+            return True
+
+        with self._lock:
+            if version == self._version:
+                return True
+
+            indice = self._leer_artefacto(version)
+            if indice is None:
+                indice = self._construir()
+                indice['version'] = version
+                self._guardar_artefacto(indice)
+                logger.info(f"🗺️  Índice de comunas construido: {len(indice['nacional'])} comunas")
+
+            self._opciones = {
+                int(codigo): self._a_opciones(comunas)
+                for codigo, comunas in indice['por_region'].items()
+            }
+            self._opciones[None] = self._a_opciones(indice['nacional'])
+            self._version = version
+        return True
+
+    @staticmethod
+    def _a_opciones(comunas: List[str]) -> List[Dict]:
+        opciones = [{'label': TODAS_LAS_COMUNAS, 'value': TODAS_LAS_COMUNAS}]
+        opciones.extend({'label': comuna, 'value': comuna} for comuna in comunas)
+        return opciones
+
+    def get_opciones(self, region: Optional[str] = None) -> List[Dict]:
+        """
+        Retorna las opciones del dropdown de comunas para una región
+
+        Args:
+            region: Región seleccionada: nombre, alias o código (None o
+                'Todas las regiones' para el listado nacional)
+
+        Returns:
+            Lista de opciones {'label', 'value'} encabezada por 'Todas las comunas'
+        """
+        if not self._asegurar_vigente():
+            return self._a_opciones([])
+        if not region or region == TODAS_LAS_REGIONES:
+            return self._opciones[None]
+        codigo = codigo_de_region(region)
+        if codigo is None:
+            return self._a_opciones([])
+        return self._opciones.get(codigo, self._a_opciones([]))
+
+    def get_comunas(self, region: Optional[str] = None) -> List[str]:
+        """
+        Retorna los nombres de comuna para una región (sin la opción 'Todas')
+        """
+        return [opcion['value'] for opcion in self.get_opciones(region)[1:]]
+
+
+# Instancia global para usar en toda la app
+indice_comunas = IndiceComunas()
@@ -3,21 +3,42 @@
 LAYOUT DE MAPA DE CHILE - MATRÍCULA Y ESTABLECIMIENTOS
 ============================================================================
 Visualización geográfica de la distribución de matrícula y establecimientos EMTP
-Usa choroplethmapbox con GeoJSON de fcortes/Chile-GeoJSON
-Soporta visualización a nivel regional y comunal
+Usa choroplethmapbox con GeoJSON de fcortes/Chile-GeoJSON, simplificado a
+varias resoluciones y guardado en data/geographic (ver src/data/geografia.py)
+Soporta visualización a nivel regional, provincial y comunal
+Las figuras referencian los límites por URL (/geo/, ver src/utils/geo_assets.py):
+el navegador descarga la geometría una vez y cada figura lleva solo los valores.
+Las figuras se guardan ya serializadas en el cache de figuras
+(src/utils/figure_cache.py), con la versión del CSV y de los límites en la clave
+MapasBundle reúne, por versión de datos, las figuras y tablas de todas las
+granularidades; al cambiar de granularidad sobre la misma geometría
+(provincial ↔ comunal) el callback envía solo los valores con un Patch
+El mapa de puntos de establecimientos recibe solo los marcadores del viewport,
+agrupados en el servidor según el zoom (src/data/cluster_establecimientos.py)
+La pestaña Cercanía busca establecimientos alrededor de una comuna con el
+árbol KD de src/data/busqueda_cercania.py
 """
 
+import os
 import json
-import urllib.request
-from functools import lru_cache
-import pandas as pd
+import hashlib
+import threading
+import numpy as np
 import plotly.express as px
-from dash import dcc, html
+import plotly.graph_objects as go
+from dash import Patch, dcc, html, no_update
 import dash_bootstrap_components as dbc
 
-# URLs de GeoJSON
-REGIONAL_GEOJSON_URL = "https://raw.githubusercontent.com/fcortes/Chile-GeoJSON/master/Regional.geojson"
-COMUNAL_GEOJSON_URL = "https://raw.githubusercontent.com/fcortes/Chile-GeoJSON/master/comunas.geojson"
+from src.data.agregacion_geografica import agregacion_geografica, estimar_establecimientos
+from src.data.cluster_establecimientos import cluster_establecimientos
+from src.data.geografia import exigir_geojson, version_geografia
+from src.utils.figure_cache import figure_cache
+from src.utils.geo_assets import geojson_assets
+
+# Resolución de los límites por granularidad ('alta', 'media' o 'baja')
+RESOLUCION_REGIONAL = 'media'
+RESOLUCION_COMUNAL = 'media'
+
 DATA_PATH = "data/processed/matricula_comunal_simulada.csv"
 
 # Escalas de colores personalizadas del proyecto
@@ -40,49 +61,55 @@ COLOR_SCALE_ESTABLECIMIENTOS = [
     [1.0, '#8B3A3A']    # Rojo oscuro (muchos establecimientos)
 ]
 
-@lru_cache(maxsize=2)
-def get_chile_geojson():
+def version_datos():
+    """
+    Versión de los datos de los mapas: firma (mtime_ns, tamaño) del CSV y
+    de los límites locales
+    """
+    try:
+        stat = os.stat(DATA_PATH)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, version_geografia())
+
+def get_chile_geojson(resolucion=RESOLUCION_REGIONAL):
+    """
+    Retorna el GeoJSON de Chile por regiones para una figura: la URL del
+    asset con huella (FileNotFoundError si no se ha generado el archivo local)
+    """
+    exigir_geojson('regiones', resolucion)
+    return geojson_assets.url('regiones', resolucion)
+
+def comunas_con_provincia():
     """
-    Carga el GeoJSON de Chile por regiones desde GitHub.
+    Comunas con los totales de su provincia (el mapa provincial colorea los
+    polígonos comunales con el total de la provincia)
     """
-    with urllib.request.urlopen(REGIONAL_GEOJSON_URL) as response:
-        return json.loads(response.read().decode('utf-8'))
+    comunas = agregacion_geografica.get('comunas')
+    provincias = agregacion_geografica.get('provincias').set_index('codprovincia')
+    return comunas[['cod_comuna', 'codprovincia']].join(provincias, on='codprovincia')
 
-@lru_cache(maxsize=2)
-def get_comunas_geojson():
+def get_comunas_geojson(resolucion=RESOLUCION_COMUNAL):
     """
-    Carga el GeoJSON de comunas desde GitHub.
+    Retorna el GeoJSON de comunas para una figura: la URL del asset con
+    huella (FileNotFoundError si no se ha generado el archivo local)
     """
-    with urllib.request.urlopen(COMUNAL_GEOJSON_URL) as response:
-        return json.loads(response.read().decode('utf-8'))
+    exigir_geojson('comunas', resolucion)
+    return geojson_assets.url('comunas', resolucion)
 
-def create_chile_map():
+@figure_cache.memoize('mapa_matricula_regional', version=version_datos)
+def create_chile_map(resolucion=RESOLUCION_REGIONAL):
     """
     Crea el mapa de Chile por regiones con matrícula.
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
     """
     # Cargar GeoJSON
-    geojson = get_chile_geojson()
-    
-    # Cargar datos de matrícula
-    df = pd.read_csv(DATA_PATH)
-    
-    # Extraer código de región correctamente del cod_comuna
-    # Si el código es >= 10000, la región son los primeros 2 dígitos
-    # Si es < 10000, la región es el primer dígito
-    def get_region_code(cod_comuna):
-        cod_str = str(cod_comuna)
-        if len(cod_str) == 5:  # códigos como 15201
-            return int(cod_str[:2])
-        else:  # códigos como 2302
-            return int(cod_str[0])
+    geojson = get_chile_geojson(resolucion)
     
-    df['codregion'] = df['cod_comuna'].apply(get_region_code)
-    
-    # Agrupar por región
-    df_regiones = df.groupby('codregion').agg({
-        'matricula_total': 'sum',
-        'region': 'first'
-    }).reset_index()
+    # Matrícula por región (agregación geográfica compartida)
+    df_regiones = agregacion_geografica.get('regiones')
     
     # Crear mapa
     fig = px.choropleth_mapbox(
@@ -112,23 +139,19 @@ def create_chile_map():
     
     return fig
 
-def create_chile_comunas_map():
+@figure_cache.memoize('mapa_matricula_comunal', version=version_datos)
+def create_chile_comunas_map(resolucion=RESOLUCION_COMUNAL):
     """
     Crea el mapa de Chile por comunas con matrícula.
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
     """
     # Cargar GeoJSON
-    geojson = get_comunas_geojson()
+    geojson = get_comunas_geojson(resolucion)
     
-    # Cargar datos de matrícula
-    df_raw = pd.read_csv(DATA_PATH)
-    
-    # Agrupar por comuna
-    df = df_raw.groupby(['cod_comuna', 'comuna', 'region']).agg({
-        'matricula_total': 'sum'
-    }).reset_index()
-    
-    # Asegurar que cod_comuna es int (para hacer match con el GeoJSON)
-    df['cod_comuna'] = df['cod_comuna'].astype(int)
+    # Matrícula por comuna (agregación geográfica compartida)
+    df = agregacion_geografica.get('comunas')
     
     # Crear figura de choropleth
     fig = px.choropleth_mapbox(
@@ -162,34 +185,22 @@ def create_chile_comunas_map():
     
     return fig
 
-def create_establecimientos_map():
+@figure_cache.memoize('mapa_establecimientos_regional', version=version_datos)
+def create_establecimientos_map(resolucion=RESOLUCION_REGIONAL):
     """
     Crea el mapa de establecimientos EMTP (choropleth por comuna).
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
     """
     # Cargar GeoJSON
-    geojson = get_chile_geojson()
+    geojson = get_chile_geojson(resolucion)
     
-    # Cargar datos
-    df = pd.read_csv(DATA_PATH)
+    # Matrícula por región (agregación geográfica compartida)
+    df_regiones = agregacion_geografica.get('regiones')
     
-    # Extraer código de región
-    def get_region_code(cod_comuna):
-        cod_str = str(cod_comuna)
-        if len(cod_str) == 5:
-            return int(cod_str[:2])
-        else:
-            return int(cod_str[0])
-    
-    df['codregion'] = df['cod_comuna'].apply(get_region_code)
-    
-    # Agrupar por región y estimar establecimientos
-    df_regiones = df.groupby('codregion').agg({
-        'region': 'first',
-        'matricula_total': 'sum'
-    }).reset_index()
-    
-    # Estimar número de establecimientos (aproximadamente 1 por cada 100 estudiantes)
-    df_regiones['establecimientos'] = (df_regiones['matricula_total'] / 100).apply(lambda x: max(1, int(x)))
+    # Estimar número de establecimientos sobre el total regional (aprox. 1 por cada 100 estudiantes)
+    df_regiones = df_regiones.assign(establecimientos=estimar_establecimientos(df_regiones['matricula_total']))
     
     # Crear mapa choropleth
     fig = px.choropleth_mapbox(
@@ -223,26 +234,119 @@ def create_establecimientos_map():
     
     return fig
 
-def create_establecimientos_comunas_map():
+@figure_cache.memoize('mapa_establecimientos_comunal', version=version_datos)
+def create_establecimientos_comunas_map(resolucion=RESOLUCION_COMUNAL):
     """
     Crea el mapa de establecimientos por comuna.
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
+    """
+    # Cargar GeoJSON
+    geojson = get_comunas_geojson(resolucion)
+    
+    # Matrícula y establecimientos estimados por comuna (agregación geográfica compartida)
+    df = agregacion_geografica.get('comunas')
+    
+    # Crear mapa choropleth
+    fig = px.choropleth_mapbox(
+        df,
+        geojson=geojson,
+        locations='cod_comuna',
+        featureidkey="properties.cod_comuna",
+        color='establecimientos',
+        color_continuous_scale=COLOR_SCALE_ESTABLECIMIENTOS,
+        range_color=[df['establecimientos'].min(), df['establecimientos'].max()],
+        hover_name='comuna',
+        hover_data={
+            'cod_comuna': False,
+            'region': True,
+            'establecimientos': True,
+            'matricula_total': ':,'
+        },
+        labels={
+            'establecimientos': 'N° Establecimientos',
+            'matricula_total': 'Matrícula Total',
+            'region': 'Región'
+        },
+        zoom=3.5,
+        center={"lat": -35, "lon": -71},
+        mapbox_style='open-street-map',
+        opacity=0.7
+    )
+    
+    fig.update_layout(
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=600
+    )
+    
+    return fig
+
+@figure_cache.memoize('mapa_matricula_provincial', version=version_datos)
+def create_chile_provincias_map(resolucion=RESOLUCION_COMUNAL):
+    """
+    Crea el mapa de Chile por provincias con matrícula (sobre los límites comunales).
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
     """
     # Cargar GeoJSON
-    geojson = get_comunas_geojson()
+    geojson = get_comunas_geojson(resolucion)
     
-    # Cargar datos
-    df_raw = pd.read_csv(DATA_PATH)
+    # Comunas con la matrícula de su provincia (agregación geográfica compartida)
+    df = comunas_con_provincia()
     
-    # Agrupar por comuna
-    df = df_raw.groupby(['cod_comuna', 'comuna', 'region']).agg({
-        'matricula_total': 'sum'
-    }).reset_index()
+    # Crear mapa
+    fig = px.choropleth_mapbox(
+        df,
+        geojson=geojson,
+        locations='cod_comuna',
+        featureidkey="properties.cod_comuna",
+        color='matricula_total',
+        color_continuous_scale=COLOR_SCALE_MATRICULA,
+        range_color=[df['matricula_total'].min(), df['matricula_total'].max()],
+        hover_name='provincia',
+        hover_data={
+            'cod_comuna': False,
+            'region': True,
+            'comunas': True,
+            'matricula_total': ':,'
+        },
+        labels={
+            'matricula_total': 'Matrícula Total',
+            'region': 'Región',
+            'comunas': 'N° Comunas'
+        },
+        zoom=3.5,
+        center={"lat": -35, "lon": -71},
+        mapbox_style='open-street-map',
+        opacity=0.7
+    )
     
-    # Asegurar que cod_comuna es int
-    df['cod_comuna'] = df['cod_comuna'].astype(int)
+    fig.update_traces(marker_line_width=0)
+    fig.update_layout(
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=600
+    )
     
-    # Estimar establecimientos
-    df['establecimientos'] = (df['matricula_total'] / 100).apply(lambda x: max(1, int(x)))
+    return fig
+
+@figure_cache.memoize('mapa_establecimientos_provincial', version=version_datos)
+def create_establecimientos_provincias_map(resolucion=RESOLUCION_COMUNAL):
+    """
+    Crea el mapa de establecimientos por provincia (sobre los límites comunales).
+    
+    Args:
+        resolucion: Resolución de los límites ('alta', 'media' o 'baja')
+    """
+    # Cargar GeoJSON
+    geojson = get_comunas_geojson(resolucion)
+    
+    # Comunas con la matrícula de su provincia (agregación geográfica compartida)
+    df = comunas_con_provincia()
+    
+    # Estimar establecimientos sobre el total provincial
+    df['establecimientos'] = estimar_establecimientos(df['matricula_total'])
     
     # Crear mapa choropleth
     fig = px.choropleth_mapbox(
@@ -253,7 +357,7 @@ def create_establecimientos_comunas_map():
         color='establecimientos',
         color_continuous_scale=COLOR_SCALE_ESTABLECIMIENTOS,
         range_color=[df['establecimientos'].min(), df['establecimientos'].max()],
-        hover_name='comuna',
+        hover_name='provincia',
         hover_data={
             'cod_comuna': False,
             'region': True,
@@ -271,6 +375,7 @@ def create_establecimientos_comunas_map():
         opacity=0.7
     )
     
+    fig.update_traces(marker_line_width=0)
     fig.update_layout(
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
         height=600
@@ -283,24 +388,26 @@ def create_tabla_resumen_matricula(granularidad='regional'):
     Crea tabla resumen de matrícula por territorio.
     
     Args:
-        granularidad: 'regional' o 'comunal'
+        granularidad: 'regional', 'provincial' o 'comunal'
     """
-    df = pd.read_csv(DATA_PATH)
-    
     if granularidad == 'regional':
         # Resumen por región
-        df_resumen = df.groupby('region').agg({
-            'matricula_total': 'sum',
-            'comuna': 'nunique'
-        }).reset_index()
+        df_resumen = agregacion_geografica.get('regiones').sort_values('region')
+        df_resumen = df_resumen[['region', 'matricula_total', 'comunas']]
         df_resumen.columns = ['Región', 'Matrícula Total', 'N° Comunas']
         df_resumen = df_resumen.sort_values('Matrícula Total', ascending=False)
         
+    elif granularidad == 'provincial':
+        # Resumen por provincia
+        df_resumen = agregacion_geografica.get('provincias')
+        df_resumen = df_resumen[['region', 'provincia', 'matricula_total', 'comunas']]
+        df_resumen.columns = ['Región', 'Provincia', 'Matrícula Total', 'N° Comunas']
+        df_resumen = df_resumen.sort_values('Matrícula Total', ascending=False)
+        
     else:  # comunal
         # Resumen por comuna (top 20)
-        df_resumen = df.groupby(['region', 'comuna']).agg({
-            'matricula_total': 'sum'
-        }).reset_index()
+        df_resumen = agregacion_geografica.get('comunas').sort_values(['region', 'comuna'])
+        df_resumen = df_resumen[['region', 'comuna', 'matricula_total']]
         df_resumen.columns = ['Región', 'Comuna', 'Matrícula Total']
         df_resumen = df_resumen.sort_values('Matrícula Total', ascending=False).head(20)
     
@@ -326,24 +433,15 @@ def create_tabla_resumen_establecimientos(granularidad='regional'):
     Crea tabla resumen de establecimientos por territorio.
     
     Args:
-        granularidad: 'regional' o 'comunal'
+        granularidad: 'regional', 'provincial' o 'comunal'
     """
-    df = pd.read_csv(DATA_PATH)
-    
-    # Estimar establecimientos (1 por cada 100 estudiantes aprox)
-    df_est = df.groupby(['region', 'comuna', 'cod_comuna']).agg({
-        'matricula_total': 'sum'
-    }).reset_index()
-    df_est['establecimientos'] = (df_est['matricula_total'] / 100).apply(lambda x: max(1, int(x)))
-    
+    # Establecimientos estimados por comuna (1 por cada 100 estudiantes aprox),
+    # sumados por territorio en la agregación geográfica compartida
     if granularidad == 'regional':
         # Resumen por región
-        df_resumen = df_est.groupby('region').agg({
-            'establecimientos': 'sum',
-            'matricula_total': 'sum',
-            'comuna': 'nunique'
-        }).reset_index()
-        df_resumen['promedio'] = (df_resumen['matricula_total'] / df_resumen['establecimientos']).astype(int)
+        df_resumen = agregacion_geografica.get('regiones').sort_values('region')
+        df_resumen = df_resumen[['region', 'establecimientos', 'matricula_total', 'comunas']]
+        df_resumen = df_resumen.assign(promedio=(df_resumen['matricula_total'] / df_resumen['establecimientos']).astype(int))
         df_resumen = df_resumen.sort_values('establecimientos', ascending=False)
         
         # Formatear
@@ -351,12 +449,22 @@ def create_tabla_resumen_establecimientos(granularidad='regional'):
         for col in ['N° Establecimientos', 'Matrícula Total', 'N° Comunas', 'Promedio Mat./Estab.']:
             df_resumen[col] = df_resumen[col].apply(lambda x: f"{int(x):,}")
         
+    elif granularidad == 'provincial':
+        # Resumen por provincia
+        df_resumen = agregacion_geografica.get('provincias')
+        df_resumen = df_resumen[['region', 'provincia', 'establecimientos', 'matricula_total', 'comunas']]
+        df_resumen = df_resumen.assign(promedio=(df_resumen['matricula_total'] / df_resumen['establecimientos']).astype(int))
+        df_resumen = df_resumen.sort_values('establecimientos', ascending=False)
+        
+        # Formatear
+        df_resumen.columns = ['Región', 'Provincia', 'N° Establecimientos', 'Matrícula Total', 'N° Comunas', 'Promedio Mat./Estab.']
+        for col in ['N° Establecimientos', 'Matrícula Total', 'N° Comunas', 'Promedio Mat./Estab.']:
+            df_resumen[col] = df_resumen[col].apply(lambda x: f"{int(x):,}")
+        
     else:  # comunal
         # Resumen por comuna (top 20)
-        df_resumen = df_est.groupby(['region', 'comuna']).agg({
-            'establecimientos': 'sum',
-            'matricula_total': 'sum'
-        }).reset_index()
+        df_resumen = agregacion_geografica.get('comunas').sort_values(['region', 'comuna'])
+        df_resumen = df_resumen[['region', 'comuna', 'establecimientos', 'matricula_total']]
         df_resumen = df_resumen.sort_values('establecimientos', ascending=False).head(20)
         
         # Formatear
@@ -376,6 +484,294 @@ def create_tabla_resumen_establecimientos(granularidad='regional'):
     
     return tabla
 
+# Vista inicial del mapa de puntos de establecimientos
+ZOOM_INICIAL_PUNTOS = 3.5
+CENTRO_INICIAL_PUNTOS = {"lat": -35, "lon": -71}
+
+def viewport_desde_relayout(relayout):
+    """
+    Zoom y bbox (lon_min, lat_min, lon_max, lat_max) del viewport a partir
+    del relayoutData de un mapa mapbox; None si el evento no movió el mapa.
+
+    Plotly informa las esquinas visibles en mapbox._derived; si no vienen,
+    se usa el zoom sin recortar por viewport.
+    """
+    if not relayout or 'mapbox.zoom' not in relayout:
+        return None
+    zoom = float(relayout['mapbox.zoom'])
+    esquinas = (relayout.get('mapbox._derived') or {}).get('coordinates')
+    if not esquinas:
+        return zoom, None
+    lons = [esquina[0] for esquina in esquinas]
+    lats = [esquina[1] for esquina in esquinas]
+    return zoom, (min(lons), min(lats), max(lons), max(lats))
+
+def traza_establecimientos(zoom=ZOOM_INICIAL_PUNTOS, bbox=None):
+    """
+    Traza Scattermapbox con los marcadores del viewport: grupos de
+    establecimientos (tamaño según cantidad) o establecimientos individuales
+    al acercarse.
+    """
+    marcadores = cluster_establecimientos.marcadores(zoom, bbox)
+    n = marcadores['n'].to_numpy()
+    grupo = n > 1
+
+    hover = np.where(
+        grupo,
+        n.astype(str) + " establecimientos",
+        marcadores['nombre'].to_numpy(dtype=object) + "<br>" + marcadores['comuna'].to_numpy(dtype=object)
+    )
+    hover = hover + "<br>Matrícula EMTP: " + np.char.mod('%d', marcadores['matricula'].to_numpy())
+
+    return go.Scattermapbox(
+        lat=marcadores['lat'].round(5),
+        lon=marcadores['lon'].round(5),
+        mode='markers',
+        marker={
+            'size': np.where(grupo, 10 + 5 * np.log2(np.maximum(n, 1)), 8).round(1),
+            'color': np.where(grupo, COLOR_SCALE_ESTABLECIMIENTOS[3][1], COLOR_SCALE_MATRICULA[2][1]),
+            'opacity': 0.8
+        },
+        hovertext=hover,
+        hoverinfo='text',
+        name='Establecimientos'
+    )
+
+def create_establecimientos_puntos_map():
+    """
+    Crea el mapa de puntos de establecimientos EMTP en la vista inicial.
+    
+    Las actualizaciones por zoom/desplazamiento reemplazan solo la traza
+    (uirevision conserva la vista del usuario).
+    """
+    fig = go.Figure(traza_establecimientos())
+    fig.update_layout(
+        mapbox={
+            'style': 'open-street-map',
+            'zoom': ZOOM_INICIAL_PUNTOS,
+            'center': CENTRO_INICIAL_PUNTOS
+        },
+        uirevision='mapa-establecimientos-puntos',
+        showlegend=False,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=600
+    )
+    return fig
+
+def zoom_para_radio(lat, radio_km, alto_px=500):
+    """
+    Zoom de mapbox con el que un círculo de radio_km cabe en alto_px
+    """
+    km_por_tesela = 40075.0 * np.cos(np.radians(lat))
+    zoom = np.log2(km_por_tesela * (alto_px * 0.8) / (256 * 2 * max(radio_km, 0.5)))
+    return float(np.clip(zoom, 3, 14))
+
+def create_cercania_map(origen=None, resultados=None, radio_km=None):
+    """
+    Crea el mapa de la búsqueda por cercanía: la comuna de origen y los
+    establecimientos encontrados.
+    
+    Args:
+        origen: dict con Comuna, lat y lon del centroide (None: vista nacional)
+        resultados: DataFrame de busqueda_cercania (con distancia_km)
+        radio_km: Radio de búsqueda (para ajustar el zoom)
+    """
+    fig = go.Figure()
+    if origen is None:
+        fig.update_layout(mapbox={'style': 'open-street-map', 'zoom': 3.5, 'center': {"lat": -35, "lon": -71}})
+    else:
+        if resultados is not None and not resultados.empty:
+            fig.add_trace(go.Scattermapbox(
+                lat=resultados['Latitud'],
+                lon=resultados['Longitud'],
+                mode='markers',
+                marker={'size': 10, 'color': COLOR_SCALE_ESTABLECIMIENTOS[3][1], 'opacity': 0.85},
+                hovertext=(
+                    resultados['NombreEstablecimiento'].astype(str) + "<br>" + resultados['Comuna'].astype(str)
+                    + "<br>" + resultados['distancia_km'].map(lambda d: f"{d:,.1f} km")
+                ),
+                hoverinfo='text',
+                name='Establecimientos'
+            ))
+        fig.add_trace(go.Scattermapbox(
+            lat=[origen['lat']],
+            lon=[origen['lon']],
+            mode='markers',
+            marker={'size': 16, 'color': COLOR_SCALE_MATRICULA[2][1]},
+            hovertext=[f"Centro de {origen['Comuna']}"],
+            hoverinfo='text',
+            name='Origen'
+        ))
+        alcance = radio_km or (resultados['distancia_km'].max() if resultados is not None and not resultados.empty else 20)
+        fig.update_layout(mapbox={
+            'style': 'open-street-map',
+            'zoom': zoom_para_radio(origen['lat'], alcance),
+            'center': {"lat": origen['lat'], "lon": origen['lon']}
+        })
+    fig.update_layout(
+        showlegend=False,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=500
+    )
+    return fig
+
+def create_tabla_cercania(resultados):
+    """
+    Crea la tabla de establecimientos encontrados, del más cercano al más lejano.
+    """
+    if resultados is None or resultados.empty:
+        return html.P("Sin establecimientos para los criterios seleccionados.", className="text-gray-dark mb-0")
+    
+    df_resumen = resultados[['RBD', 'NombreEstablecimiento', 'Comuna', 'Dependencia', 'MatriculaEMTP', 'distancia_km']].copy()
+    df_resumen.columns = ['RBD', 'Establecimiento', 'Comuna', 'Dependencia', 'Matrícula EMTP', 'Distancia (km)']
+    df_resumen['Matrícula EMTP'] = df_resumen['Matrícula EMTP'].apply(lambda x: f"{int(x):,}")
+    df_resumen['Distancia (km)'] = df_resumen['Distancia (km)'].apply(lambda x: f"{x:,.1f}")
+    
+    return dbc.Table.from_dataframe(
+        df_resumen,
+        striped=True,
+        bordered=True,
+        hover=True,
+        responsive=True,
+        className="mb-0"
+    )
+
+# Granularidad → constructores de los mapas, KPI de territorios y geometría del mapa
+GRANULARIDADES = {
+    'regional': (create_chile_map, create_establecimientos_map, "16", "Regiones"),
+    'provincial': (create_chile_provincias_map, create_establecimientos_provincias_map, "56", "Provincias"),
+    'comunal': (create_chile_comunas_map, create_establecimientos_comunas_map, "345", "Comunas"),
+}
+
+def parche_figura(anterior, nueva):
+    """
+    Patch que transforma la figura ``anterior`` en ``nueva`` si comparten la
+    geometría (mismo GeoJSON y número de trazas); None si hay que enviarla completa.
+
+    Solo se incluyen las propiedades de traza y de layout que cambian
+    (valores, textos de hover, rango de colores); sin cambios retorna no_update.
+    """
+    trazas_anteriores, trazas_nuevas = anterior['data'], nueva['data']
+    if len(trazas_anteriores) != len(trazas_nuevas):
+        return None
+
+    parche = Patch()
+    cambios = 0
+    for i, (traza_anterior, traza_nueva) in enumerate(zip(trazas_anteriores, trazas_nuevas)):
+        if traza_anterior.get('geojson') != traza_nueva.get('geojson'):
+            return None
+        for clave in traza_anterior.keys() - traza_nueva.keys():
+            del parche['data'][i][clave]
+            cambios += 1
+        for clave, valor in traza_nueva.items():
+            if traza_anterior.get(clave) != valor:
+                parche['data'][i][clave] = valor
+                cambios += 1
+
+    layout_anterior, layout_nuevo = anterior['layout'], nueva['layout']
+    for clave in layout_anterior.keys() - layout_nuevo.keys():
+        del parche['layout'][clave]
+        cambios += 1
+    for clave, valor in layout_nuevo.items():
+        if layout_anterior.get(clave) != valor:
+            parche['layout'][clave] = valor
+            cambios += 1
+    return parche if cambios else no_update
+
+def _como_dict(figura):
+    """
+    Figura como dict JSON (el cache de figuras desactivado entrega go.Figure)
+    """
+    if isinstance(figura, dict):
+        return figura
+    return json.loads(figure_cache.serialize(figura))
+
+class MapasBundle:
+    """
+    Figuras, tablas y KPI de los mapas para todas las granularidades,
+    calculados una vez por versión de datos y servidos desde memoria
+    """
+
+    def __init__(self):
+        self._version = None
+        self._huella = None
+        self._paquetes = {}
+        self._lock = threading.Lock()
+
+    def _asegurar_vigente(self):
+        """
+        Recalcula el bundle completo si cambió la versión de los datos
+        """
+        version = version_datos()
+        if version == self._version and self._paquetes:
+            return
+
+        with self._lock:
+            if version == self._version and self._paquetes:
+                return
+
+            paquetes = {}
+            for granularidad, (mapa_matricula, mapa_establecimientos, num, label) in GRANULARIDADES.items():
+                paquetes[granularidad] = {
+                    'figura_matricula': _como_dict(mapa_matricula()),
+                    'figura_establecimientos': _como_dict(mapa_establecimientos()),
+                    'num_territorios': num,
+                    'label_territorios': label,
+                    'tabla_matricula': create_tabla_resumen_matricula(granularidad),
+                    'tabla_establecimientos': create_tabla_resumen_establecimientos(granularidad),
+                }
+            self._paquetes = paquetes
+            self._version = version
+            self._huella = hashlib.sha1(repr(version).encode('utf-8')).hexdigest()[:12]
+
+    def get(self, granularidad):
+        """
+        Paquete de una granularidad ('regional', 'provincial' o 'comunal')
+        """
+        self._asegurar_vigente()
+        return self._paquetes.get(granularidad, self._paquetes['regional'])
+
+    def actualizacion(self, granularidad, estado=None):
+        """
+        Salidas del callback de mapas para pasar del estado del cliente a la granularidad pedida
+
+        Args:
+            granularidad: Granularidad seleccionada
+            estado: Lo que muestra el cliente ({'granularidad', 'version'} de
+                mapa-estado; None en la primera carga)
+
+        Returns:
+            tuple: (fig_matricula, fig_establecimientos, num_territorios,
+                label_territorios, tabla_mat, tabla_est, nuevo_estado); las
+                figuras son Patch cuando el cliente ya tiene la misma geometría
+        """
+        paquete = self.get(granularidad)
+        if granularidad not in self._paquetes:
+            granularidad = 'regional'
+
+        fig_matricula = paquete['figura_matricula']
+        fig_establecimientos = paquete['figura_establecimientos']
+
+        anterior = None
+        if estado and estado.get('version') == self._huella:
+            anterior = self._paquetes.get(estado.get('granularidad'))
+        if anterior is not None:
+            fig_matricula = parche_figura(anterior['figura_matricula'], fig_matricula) or fig_matricula
+            fig_establecimientos = parche_figura(anterior['figura_establecimientos'], fig_establecimientos) or fig_establecimientos
+
+        return (
+            fig_matricula,
+            fig_establecimientos,
+            paquete['num_territorios'],
+            paquete['label_territorios'],
+            paquete['tabla_matricula'],
+            paquete['tabla_establecimientos'],
+            {'granularidad': granularidad, 'version': self._huella}
+        )
+
+# Instancia global para usar en toda la app
+mapas_bundle = MapasBundle()
+
 def create_mapas_layout():
     """
     Crea el layout completo de la sección de mapas con subpestañas.
@@ -445,12 +841,15 @@ def create_mapas_layout():
                                 id='mapa-granularidad',
                                 options=[
                                     {'label': ' Regional (16 regiones)', 'value': 'regional'},
+                                    {'label': ' Provincial (56 provincias)', 'value': 'provincial'},
                                     {'label': ' Comunal (345 comunas)', 'value': 'comunal'}
                                 ],
                                 value='regional',
                                 inline=True,
                                 className="custom-radio-items"
-                            )
+                            ),
+                            # Granularidad y versión de datos que muestra el cliente (para Patch)
+                            dcc.Store(id='mapa-estado')
                         ])
                     ])
                 ], className="border-accent-custom shadow-sm")
@@ -525,6 +924,24 @@ def create_mapas_layout():
                         ], className="border-accent-custom shadow-sm mb-4")
                     ], width=12)
                 ]),
+                dbc.Row([
+                    dbc.Col([
+                        # Mapa de puntos de Establecimientos (agrupados según zoom)
+                        dbc.Card([
+                            dbc.CardHeader([
+                                html.I(className="bi bi-pin-map me-2"),
+                                "Establecimientos Georreferenciados"
+                            ], className="bg-light-custom border-0 fw-bold"),
+                            dbc.CardBody([
+                                dcc.Graph(
+                                    id='mapa-establecimientos-puntos',
+                                    figure={},
+                                    config={'displayModeBar': False, 'scrollZoom': True}
+                                )
+                            ], className="p-0")
+                        ], className="border-accent-custom shadow-sm mb-4")
+                    ], width=12)
+                ]),
                 dbc.Row([
                     dbc.Col([
                         # Tabla resumen de Establecimientos
@@ -540,6 +957,100 @@ def create_mapas_layout():
                     ], width=12)
                 ])
             ], label="Establecimientos", tab_id="tab-establecimientos",
+               label_style={"color": "#5A6E79"}, 
+               active_label_style={"color": "#34536A", "font-weight": "bold"}),
+            
+            # Tab 3: Búsqueda por cercanía
+            dbc.Tab([
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardBody([
+                                dbc.Row([
+                                    dbc.Col([
+                                        html.Label("Comuna de origen", className="fw-bold text-gray-dark mb-2"),
+                                        dcc.Dropdown(
+                                            id='cercania-comuna',
+                                            placeholder="Selecciona una comuna...",
+                                            style={'borderColor': '#A8B7C7'}
+                                        )
+                                    ], md=3, className="mb-2"),
+                                    dbc.Col([
+                                        html.Label("Especialidad", className="fw-bold text-gray-dark mb-2"),
+                                        dcc.Dropdown(
+                                            id='cercania-especialidad',
+                                            placeholder="Todas las especialidades",
+                                            style={'borderColor': '#A8B7C7'}
+                                        )
+                                    ], md=3, className="mb-2"),
+                                    dbc.Col([
+                                        html.Label("Dependencia", className="fw-bold text-gray-dark mb-2"),
+                                        dcc.Dropdown(
+                                            id='cercania-dependencia',
+                                            placeholder="Todas las dependencias",
+                                            style={'borderColor': '#A8B7C7'}
+                                        )
+                                    ], md=2, className="mb-2"),
+                                    dbc.Col([
+                                        html.Label("Radio (km)", className="fw-bold text-gray-dark mb-2"),
+                                        dbc.Input(id='cercania-radio', type="number", min=1, max=500, value=20,
+                                                  placeholder="Sin radio")
+                                    ], md=2, className="mb-2"),
+                                    dbc.Col([
+                                        html.Label("Máx. resultados", className="fw-bold text-gray-dark mb-2"),
+                                        dbc.Input(id='cercania-k', type="number", min=1, max=200, value=20)
+                                    ], md=1, className="mb-2"),
+                                    dbc.Col([
+                                        dbc.Button(
+                                            [html.I(className="bi bi-search me-2"), "Buscar"],
+                                            id='cercania-buscar',
+                                            className="btn-primary-custom mt-4 w-100"
+                                        )
+                                    ], md=1, className="mb-2")
+                                ]),
+                                html.Small(
+                                    "Sin radio se listan los establecimientos más cercanos hasta el máximo de resultados.",
+                                    className="text-gray-dark"
+                                )
+                            ])
+                        ], className="border-accent-custom shadow-sm mb-4")
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader([
+                                html.I(className="bi bi-bullseye me-2"),
+                                html.Span(id='cercania-resumen', children="Establecimientos cercanos")
+                            ], className="bg-light-custom border-0 fw-bold"),
+                            dbc.CardBody([
+                                dcc.Loading(
+                                    id="loading-mapa-cercania",
+                                    type="default",
+                                    children=dcc.Graph(
+                                        id='mapa-cercania',
+                                        figure={},
+                                        config={'displayModeBar': False, 'scrollZoom': True}
+                                    )
+                                )
+                            ], className="p-0")
+                        ], className="border-accent-custom shadow-sm mb-4")
+                    ], width=12)
+                ]),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Card([
+                            dbc.CardHeader([
+                                html.I(className="bi bi-table me-2"),
+                                "Resultados"
+                            ], className="bg-light-custom border-0 fw-bold"),
+                            dbc.CardBody([
+                                html.Div(id='tabla-cercania', className="table-responsive")
+                            ])
+                        ], className="border-accent-custom shadow-sm")
+                    ], width=12)
+                ])
+            ], label="Cercanía", tab_id="tab-cercania",
                label_style={"color": "#5A6E79"}, 
                active_label_style={"color": "#34536A", "font-weight": "bold"})
         ], id="tabs-mapas", active_tab="tab-matricula", className="mb-3")
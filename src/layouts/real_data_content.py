@@ -11,27 +11,133 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 import os
+import logging
 from src.utils.helpers import format_chilean
+from src.data.registry import dataset_registry
+from src.data.schema import aplicar_esquema
+from src.data.cubo import cubo_matricula
+from src.data.bitmap import BitmapIndex
+from src.data.crecimiento import matriz_anual, total_anual, cagr, resumen_crecimiento
+from src.data.backend_archivos import resumir_pandas
+from src.data.duckdb_backend import duckdb_backend
+from src.data.polars_backend import polars_backend
+from src.utils.result_cache import result_cache
+from src.utils.figure_cache import figure_cache
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SIMULATED_DATA_DIR = "data/processed"
+
+SIMULATED_FILES = {
+    'matricula': 'matricula_simulada.csv',
+    'egresados': 'egresados_simulados.csv',
+    'titulacion': 'titulacion_simulada.csv',
+    'establecimientos': 'establecimientos_simulados.csv',
+    'docentes': 'docentes_simulados.csv',
+    'proyectos': 'proyectos_simulados.csv'
+}
+
+# Valor de cada filtro que equivale a no filtrar
+FILTER_DEFAULTS = {
+    'region': 'Todas las regiones',
+    'especialidad': 'Todas las especialidades',
+    'dependencia': 'todas',
+    'genero': 'ambos',
+    'zona': 'ambas'
+}
+
+# Medidas de las tarjetas KPI de cada dataset: {nombre: (operación, columna[, valor])}
+# (operaciones en src/data/backend_archivos.py). Matrícula sale del cubo.
+KPI_MEASURES = {
+    'egresados': {
+        'egresados_total': ('suma', 'egresados_total'),
+        'tasa_transicion': ('promedio', 'tasa_transicion'),
+        'a_universidades': ('suma', 'a_universidades'),
+        'a_institutos': ('suma', 'a_institutos'),
+        'transicion_esup': ('suma', 'transicion_esup'),
+        'registros': ('filas', None),
+    },
+    'titulacion': {
+        'titulados': ('suma', 'titulados'),
+        'tasa_titulacion': ('promedio', 'tasa_titulacion'),
+        'tiempo_titulacion_meses': ('promedio', 'tiempo_titulacion_meses'),
+        'titulacion_oportuna': ('suma', 'titulacion_oportuna'),
+        'registros': ('filas', None),
+    },
+    'establecimientos': {
+        'establecimientos': ('distintos', 'establecimiento_id'),
+        'especialidades': ('distintos', 'especialidad'),
+        'municipal': ('iguales', 'dependencia', 'Municipal'),
+        'urbana': ('iguales', 'zona', 'Urbana'),
+        'registros': ('filas', None),
+    },
+    'docentes': {
+        'edad': ('promedio', 'edad'),
+        'mujeres': ('iguales', 'genero', 'Femenino'),
+        'titulo_pedagogico': ('iguales', 'titulo_pedagogico', True),
+        'registros': ('filas', None),
+    },
+    'proyectos': {
+        'monto_asignado': ('suma', 'monto_asignado'),
+        'en_ejecucion': ('iguales', 'estado', 'En ejecución'),
+        'monto_ejecutado': ('suma', 'monto_ejecutado'),
+        'establecimientos_beneficiados': ('suma', 'establecimientos_beneficiados'),
+    },
+}
+
+# Gráficos (dataset, tipo) fuera de matrícula: (agrupación, medidas)
+CHART_MEASURES = {
+    ('egresados', 'line'): (['año'], {'tasa_transicion': ('promedio', 'tasa_transicion')}),
+    ('establecimientos', 'bar'): (['region'], {'establecimiento_id': ('distintos', 'establecimiento_id')}),
+    ('docentes', 'pie'): (['genero'], {'count': ('filas', None)}),
+}
+
+# Tablas resumen fuera de matrícula: (agrupación, medidas)
+TABLE_MEASURES = {
+    'egresados': (['especialidad'], {
+        'egresados_total': ('suma', 'egresados_total'),
+        'tasa_transicion': ('promedio', 'tasa_transicion'),
+        'a_universidades': ('suma', 'a_universidades'),
+        'a_institutos': ('suma', 'a_institutos'),
+    }),
+    'establecimientos': (['region', 'dependencia'], {
+        'establecimiento_id': ('distintos', 'establecimiento_id'),
+        'matricula_especialidad': ('suma', 'matricula_especialidad'),
+    }),
+    'docentes': (['especialidad'], {
+        'docente_id': ('conteo', 'docente_id'),
+        'edad': ('promedio', 'edad'),
+        'experiencia_años': ('promedio', 'experiencia_años'),
+        'titulo_pedagogico': ('iguales', 'titulo_pedagogico', True),
+        'registros': ('filas', None),
+    }),
+    'proyectos': (['region', 'tipo_proyecto'], {
+        'monto_asignado': ('suma', 'monto_asignado'),
+        'pct_ejecucion': ('promedio', 'pct_ejecucion'),
+        'establecimientos_beneficiados': ('suma', 'establecimientos_beneficiados'),
+    }),
+}
 
 
 def load_simulated_data():
-    """Carga los datos simulados generados"""
-    data_dir = "data/processed"
-    datasets = {}
+    """
+    Carga los datos simulados generados
     
-    files = {
-        'matricula': 'matricula_simulada.csv',
-        'egresados': 'egresados_simulados.csv',
-        'titulacion': 'titulacion_simulada.csv',
-        'establecimientos': 'establecimientos_simulados.csv',
-        'docentes': 'docentes_simulados.csv',
-        'proyectos': 'proyectos_simulados.csv'
-    }
+    Los CSV se leen una sola vez por proceso a través del registro de datasets
+    y solo se vuelven a leer si el archivo cambia en disco. Al cargarse se les
+    aplica el esquema compacto (dimensiones categóricas, numéricos reducidos).
+    """
+    datasets = {}
     
-    for name, filename in files.items():
-        filepath = os.path.join(data_dir, filename)
-        if os.path.exists(filepath):
-            datasets[name] = pd.read_csv(filepath)
+    for name in SIMULATED_FILES:
+        filepath = dataset_path(name)
+        df = dataset_registry.get(
+            filepath,
+            reader=lambda path, name=name: aplicar_esquema(pd.read_csv(path), name)
+        )
+        if df is not None:
+            datasets[name] = df
         else:
             print(f"⚠️ Archivo no encontrado: {filepath}")
             datasets[name] = pd.DataFrame()  # DataFrame vacío como fallback
@@ -39,27 +145,303 @@ def load_simulated_data():
     return datasets
 
 
-def create_real_kpi_cards(dataset_name, filters=None):
-    """Crea tarjetas KPI basadas en datos reales"""
-    datasets = load_simulated_data()
-    df = datasets.get(dataset_name, pd.DataFrame())
+def data_version(dataset_name):
+    """
+    Versión en disco de un dataset simulado: (mtime_ns, tamaño) del CSV
+    """
+    if dataset_name not in SIMULATED_FILES:
+        return None
+    try:
+        stat = os.stat(dataset_path(dataset_name))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def dataset_path(dataset_name):
+    """Ruta del archivo de un dataset simulado"""
+    return os.path.join(SIMULATED_DATA_DIR, SIMULATED_FILES[dataset_name])
+
+
+def dataset_index(dataset_name, df):
+    """
+    Índice bitmap de un dataset simulado, construido una vez por versión cargada
+    
+    Retorna None si el dataset se recargó después de obtener ``df``.
+    """
+    return dataset_registry.derivado(dataset_path(dataset_name), 'bitmap', BitmapIndex, df)
+
+
+def result_key(dataset_name, widget, filters, *extra):
+    """
+    Clave del cache de resultados para un widget
+    
+    Los filtros con su valor por defecto ('Todas las regiones', 'ambos', ...)
+    no cambian el resultado y se omiten, así la vista sin filtros y la vista
+    con filtros "vacíos" comparten la misma entrada.
+    """
+    activos = {
+        clave: valor for clave, valor in (filters or {}).items()
+        if valor is not None and FILTER_DEFAULTS.get(clave) != valor
+    }
+    return (
+        dataset_name, widget, *extra,
+        result_cache.normalize_filters(activos),
+        data_version(dataset_name)
+    )
+
+
+class QueryContext:
+    """
+    Contexto de consulta de un render de página
+    
+    Todos los widgets de una sección (KPIs, gráficos, tabla) comparten los
+    mismos filtros. El contexto filtra cada dataset una sola vez, al primer
+    uso, y entrega la misma vista filtrada a los demás widgets; lo mismo con
+    los cortes del cubo de matrícula. Cada widget pide sus medidas con
+    summary(); cada resumen se calcula una vez por render. Si todos los
+    widgets salen del cache de resultados no se filtra nada.
+    
+    Las vistas entregadas se comparten entre widgets y no deben modificarse.
+    """
+    
+    def __init__(self, filters=None):
+        self.filters = filters
+        self._datasets = None
+        self._filtered = {}
+        self._cube_slice = None
+        self._window_slice = None
+        self._rollups = {}
+        self._annual = {}
+        self._summaries = {}
+    
+    def dataset(self, dataset_name):
+        """Dataset completo, sin filtrar (DataFrame vacío si no existe)"""
+        if self._datasets is None:
+            self._datasets = load_simulated_data()
+        return self._datasets.get(dataset_name, pd.DataFrame())
+    
+    def has_data(self, dataset_name):
+        """True si el dataset existe y tiene filas"""
+        return not self.dataset(dataset_name).empty
+    
+    def columns(self, dataset_name):
+        """Columnas del dataset"""
+        return self.dataset(dataset_name).columns
+    
+    def filtered(self, dataset_name):
+        """Dataset con los filtros del render aplicados (calculado una vez)"""
+        if dataset_name not in self._filtered:
+            df = self.dataset(dataset_name)
+            if self.filters and not df.empty:
+                df = apply_filters(df, self.filters, dataset_index(dataset_name, df))
+            self._filtered[dataset_name] = df
+        return self._filtered[dataset_name]
+    
+    def summary(self, dataset_name, by, measures):
+        """
+        Medidas del dataset filtrado agrupadas por ``by`` (vacío: una fila)
+        
+        Args:
+            by: Columnas de agrupación
+            measures: {nombre: (operación, columna[, valor])}, ver src/data/backend_archivos.py
+        """
+        key = (dataset_name, tuple(by), tuple(measures.items()))
+        if key not in self._summaries:
+            self._summaries[key] = self._summarize(dataset_name, tuple(by), measures)
+        return self._summaries[key]
+    
+    def _summarize(self, dataset_name, by, measures):
+        return resumir_pandas(self.filtered(dataset_name), by, measures)
+    
+    def matricula(self, by=()):
+        """
+        Consulta el cubo agregado de matrícula
+        
+        Filtra las celdas del cubo una vez por render y suma agrupando por
+        ``by`` (vacío: una fila con los totales); cada agrupación se calcula
+        una sola vez.
+        
+        Las agrupaciones sin año (totales KPI, barras, torta, tabla) parten de
+        la ventana de años del cubo, calculada con sumas prefijo: mover el
+        slider de años cuesta lo mismo sin importar cuántos años abarque.
+        """
+        by = tuple(by)
+        if by not in self._rollups:
+            self._rollups[by] = cubo_matricula.rollup(self._matricula_slice('año' in by), by)
+        return self._rollups[by]
+    
+    def _matricula_slice(self, by_year):
+        """Celdas del cubo filtradas (por año) o ventana de años filtrada (sin año)"""
+        if by_year:
+            if self._cube_slice is None:
+                cubo = cubo_matricula.get()
+                self._cube_slice = apply_filters(cubo, self.filters) if self.filters else cubo
+            return self._cube_slice
+        
+        if self._window_slice is None:
+            filters = dict(self.filters or {})
+            years = filters.pop('years', None) or (None, None)
+            window = cubo_matricula.ventana(*years)
+            self._window_slice = apply_filters(window, filters)
+        return self._window_slice
+    
+    def matricula_annual(self, group):
+        """
+        Matriz año × ``group`` de matrícula total (motor de crecimiento)
+        
+        La tabla la usa por fila y la tarjeta KPI suma sus columnas, así
+        ambos widgets comparten una sola agregación por render.
+        """
+        if group not in self._annual:
+            self._annual[group] = matriz_anual(
+                self.matricula(by=['año', group]), 'matricula_total', grupo=group
+            )
+        return self._annual[group]
+
+
+# Dimensiones de la agregación de matrícula que los backends de archivos
+# calculan una vez por render (ver FileQueryContext.matricula)
+MATRICULA_BASE_BY = ('año', 'especialidad', 'dependencia')
+
+
+class FileQueryContext(QueryContext):
+    """
+    Contexto de consulta que resuelve filtros y agregaciones en un backend
+    que lee directamente los archivos (DuckDB o Polars)
+    
+    Los filtros y las medidas de cada widget se traducen al backend y se
+    ejecutan sobre los archivos de datos (GROUP BY en DuckDB, group_by lazy en
+    Polars); matrícula se agrega con las mismas medidas del cubo. Los
+    datasets nunca se cargan en pandas: solo llegan los grupos agregados.
+    """
+    
+    backend = None
+    
+    def _path(self, dataset_name):
+        return dataset_path(dataset_name)
+    
+    def _predicates(self, dataset_name):
+        return filter_predicates(self.filters or {}, self.columns(dataset_name))
+    
+    def has_data(self, dataset_name):
+        """True si el archivo del dataset existe y tiene filas"""
+        if dataset_name not in SIMULATED_FILES:
+            return False
+        return self.backend.tiene_datos(self._path(dataset_name))
+    
+    def columns(self, dataset_name):
+        """Columnas del archivo del dataset"""
+        return self.backend.columnas(self._path(dataset_name))
+    
+    def filtered(self, dataset_name):
+        """
+        Filas filtradas materializadas por el backend (calculado una vez)
+        
+        Los widgets no lo usan (piden summary); queda para quien necesite
+        los registros, con el mismo esquema compacto que el backend pandas.
+        """
+        if dataset_name not in self._filtered:
+            if self.has_data(dataset_name):
+                df = aplicar_esquema(self.backend.filas(self._path(dataset_name), self._predicates(dataset_name)))
+            else:
+                df = pd.DataFrame()
+            self._filtered[dataset_name] = df
+        return self._filtered[dataset_name]
+    
+    def _summarize(self, dataset_name, by, measures):
+        """Medidas calculadas por el backend sobre el archivo"""
+        return self.backend.resumir(
+            self._path(dataset_name), self._predicates(dataset_name), by, measures
+        )
     
-    if df.empty:
+    def matricula(self, by=()):
+        """
+        Agregación de matrícula calculada por el backend (medidas del cubo)
+        
+        Las agrupaciones de los widgets (total, año, especialidad, dependencia,
+        año × especialidad) se suman desde una sola agregación por
+        MATRICULA_BASE_BY, así el archivo se recorre una vez por render.
+        """
+        by = tuple(by)
+        if by not in self._rollups:
+            if set(by) <= set(MATRICULA_BASE_BY):
+                self._rollups[by] = cubo_matricula.rollup(self._matricula_base(), by)
+            else:
+                self._rollups[by] = cubo_matricula.con_promedios(self._matricula_query(by))
+        return self._rollups[by]
+    
+    def _matricula_base(self):
+        if self._cube_slice is None:
+            self._cube_slice = self._matricula_query(MATRICULA_BASE_BY)
+        return self._cube_slice
+    
+    def _matricula_query(self, by):
+        return self.backend.agregar(
+            self._path('matricula'), self._predicates('matricula'), by,
+            sumas=cubo_matricula.sumas, promedios=cubo_matricula.promedios
+        )
+
+
+class DuckDBQueryContext(FileQueryContext):
+    """Contexto de consulta sobre DuckDB (SQL con pushdown y agregación en streaming)"""
+    backend = duckdb_backend
+
+
+class PolarsQueryContext(FileQueryContext):
+    """Contexto de consulta sobre Polars (LazyFrame con pushdown y group-by multihilo)"""
+    backend = polars_backend
+
+
+# Backends alternativos seleccionables con ANALYTICS_BACKEND
+QUERY_CONTEXTS = {
+    'duckdb': DuckDBQueryContext,
+    'polars': PolarsQueryContext,
+}
+
+
+def query_context(filters=None):
+    """
+    Crea el contexto de consulta del backend configurado (ANALYTICS_BACKEND)
+    """
+    context_class = QUERY_CONTEXTS.get(settings.ANALYTICS_BACKEND)
+    if context_class is not None:
+        if context_class.backend.disponible():
+            return context_class(filters)
+        logger.warning(
+            f"⚠️  ANALYTICS_BACKEND={settings.ANALYTICS_BACKEND} pero el paquete no está instalado; se usa pandas"
+        )
+    return QueryContext(filters)
+
+
+def create_real_kpi_cards(dataset_name, filters=None, context=None):
+    """Crea tarjetas KPI basadas en datos reales (memoizadas por filtros y versión de datos)"""
+    context = context or query_context(filters)
+    return result_cache.get_or_compute(
+        result_key(dataset_name, 'kpi', filters),
+        lambda: build_real_kpi_cards(dataset_name, context)
+    )
+
+
+def build_real_kpi_cards(dataset_name, context):
+    """Construye las tarjetas KPI de un dataset"""
+    if not context.has_data(dataset_name):
         return create_fallback_kpis(dataset_name)
     
-    # Aplicar filtros si existen
-    if filters:
-        df = apply_filters(df, filters)
+    # Matrícula se consulta desde el cubo agregado; el resto con las medidas KPI
+    if dataset_name in KPI_MEASURES:
+        k = first_row(context.summary(dataset_name, (), KPI_MEASURES[dataset_name]))
     
     cards = []
     colors = ['primary-custom', 'green', 'orange', 'purple']
     
     if dataset_name == 'matricula':
         # KPIs de matrícula
-        total_matricula = df['matricula_total'].sum()
-        crecimiento = calculate_growth(df, 'matricula_total', 'año')
-        pct_mujeres = (df['matricula_mujeres'].sum() / total_matricula * 100) if total_matricula > 0 else 0
-        tasa_retencion = df['tasa_retencion'].mean() * 100 if len(df) > 0 else 0
+        totales = context.matricula().iloc[0]
+        total_matricula = totales['matricula_total']
+        crecimiento = cagr(total_anual(context.matricula_annual('especialidad')))['total']
+        pct_mujeres = (totales['matricula_mujeres'] / total_matricula * 100) if total_matricula > 0 else 0
+        tasa_retencion = totales['tasa_retencion'] * 100 if totales['registros'] > 0 else 0
         
         metrics = {
             "Total Estudiantes": format_chilean(total_matricula),
@@ -69,10 +451,10 @@ def create_real_kpi_cards(dataset_name, filters=None):
         }
     
     elif dataset_name == 'egresados':
-        total_egresados = df['egresados_total'].sum()
-        tasa_transicion = df['tasa_transicion'].mean() * 100 if len(df) > 0 else 0
-        pct_universidades = (df['a_universidades'].sum() / df['transicion_esup'].sum() * 100) if df['transicion_esup'].sum() > 0 else 0
-        pct_institutos = (df['a_institutos'].sum() / df['transicion_esup'].sum() * 100) if df['transicion_esup'].sum() > 0 else 0
+        total_egresados = k['egresados_total']
+        tasa_transicion = k['tasa_transicion'] * 100 if k['registros'] > 0 else 0
+        pct_universidades = (k['a_universidades'] / k['transicion_esup'] * 100) if k['transicion_esup'] > 0 else 0
+        pct_institutos = (k['a_institutos'] / k['transicion_esup'] * 100) if k['transicion_esup'] > 0 else 0
         
         metrics = {
             "Total Egresados": format_chilean(total_egresados),
@@ -82,10 +464,10 @@ def create_real_kpi_cards(dataset_name, filters=None):
         }
     
     elif dataset_name == 'titulacion':
-        total_titulados = df['titulados'].sum()
-        tasa_titulacion = df['tasa_titulacion'].mean() * 100 if len(df) > 0 else 0
-        tiempo_promedio = df['tiempo_titulacion_meses'].mean() if len(df) > 0 else 0
-        pct_oportuna = (df['titulacion_oportuna'].sum() / len(df) * 100) if len(df) > 0 else 0
+        total_titulados = k['titulados']
+        tasa_titulacion = k['tasa_titulacion'] * 100 if k['registros'] > 0 else 0
+        tiempo_promedio = k['tiempo_titulacion_meses'] if k['registros'] > 0 else 0
+        pct_oportuna = (k['titulacion_oportuna'] / k['registros'] * 100) if k['registros'] > 0 else 0
         
         metrics = {
             "Titulados": format_chilean(total_titulados),
@@ -95,10 +477,10 @@ def create_real_kpi_cards(dataset_name, filters=None):
         }
     
     elif dataset_name == 'establecimientos':
-        total_establecimientos = df['establecimiento_id'].nunique()
-        total_especialidades = df['especialidad'].nunique()
-        pct_municipal = (len(df[df['dependencia'] == 'Municipal']) / len(df) * 100) if len(df) > 0 else 0
-        pct_urbano = (len(df[df['zona'] == 'Urbana']) / len(df) * 100) if len(df) > 0 else 0
+        total_establecimientos = k['establecimientos']
+        total_especialidades = k['especialidades']
+        pct_municipal = (k['municipal'] / k['registros'] * 100) if k['registros'] > 0 else 0
+        pct_urbano = (k['urbana'] / k['registros'] * 100) if k['registros'] > 0 else 0
         
         metrics = {
             "Establecimientos": format_chilean(total_establecimientos),
@@ -108,10 +490,10 @@ def create_real_kpi_cards(dataset_name, filters=None):
         }
     
     elif dataset_name == 'docentes':
-        total_docentes = len(df)
-        edad_promedio = df['edad'].mean() if len(df) > 0 else 0
-        pct_mujeres = (len(df[df['genero'] == 'Femenino']) / len(df) * 100) if len(df) > 0 else 0
-        pct_titulo_ped = (len(df[df['titulo_pedagogico'] == True]) / len(df) * 100) if len(df) > 0 else 0
+        total_docentes = k['registros']
+        edad_promedio = k['edad'] if k['registros'] > 0 else 0
+        pct_mujeres = (k['mujeres'] / k['registros'] * 100) if k['registros'] > 0 else 0
+        pct_titulo_ped = (k['titulo_pedagogico'] / k['registros'] * 100) if k['registros'] > 0 else 0
         
         metrics = {
             "Total Docentes": format_chilean(total_docentes),
@@ -121,10 +503,10 @@ def create_real_kpi_cards(dataset_name, filters=None):
         }
     
     elif dataset_name == 'proyectos':
-        inversion_total = df['monto_asignado'].sum() / 1_000_000  # Millones
-        proyectos_activos = len(df[df['estado'] == 'En ejecución'])
-        pct_ejecucion = (df['monto_ejecutado'].sum() / df['monto_asignado'].sum() * 100) if df['monto_asignado'].sum() > 0 else 0
-        establecimientos_beneficiados = df['establecimientos_beneficiados'].sum()
+        inversion_total = k['monto_asignado'] / 1_000_000  # Millones
+        proyectos_activos = k['en_ejecucion']
+        pct_ejecucion = (k['monto_ejecutado'] / k['monto_asignado'] * 100) if k['monto_asignado'] > 0 else 0
+        establecimientos_beneficiados = k['establecimientos_beneficiados']
         
         metrics = {
             "Inversión": f"${format_chilean(inversion_total)}M",
@@ -151,66 +533,88 @@ def create_real_kpi_cards(dataset_name, filters=None):
     return dbc.Row(cards)
 
 
-def create_real_chart(dataset_name, chart_type="line", title="Gráfico", filters=None):
-    """Crea gráficos basados en datos reales"""
-    datasets = load_simulated_data()
-    df = datasets.get(dataset_name, pd.DataFrame())
-    
-    if df.empty:
-        return create_fallback_chart(title)
+def create_real_chart(dataset_name, chart_type="line", title="Gráfico", filters=None, context=None):
+    """Crea gráficos basados en datos reales (memoizados por filtros y versión de datos)"""
+    context = context or query_context(filters)
+    return result_cache.get_or_compute(
+        result_key(dataset_name, 'chart', filters, chart_type, title),
+        lambda: build_real_chart(dataset_name, chart_type, title, context)
+    )
+
+
+def build_real_chart(dataset_name, chart_type, title, context):
+    """
+    Construye el gráfico de un dataset a partir de su figura serializada
+    
+    La figura se comparte entre procesos y usuarios a través del cache de
+    figuras, con la misma clave (filtros activos, versión de datos) que el
+    cache de resultados.
+    """
+    figure = figure_cache.get_or_build(
+        'real_chart',
+        result_key(dataset_name, 'chart', context.filters, chart_type, title),
+        lambda: build_real_figure(dataset_name, chart_type, title, context)
+    )
+    return dcc.Graph(figure=figure, className="mb-4")
+
+
+def build_real_figure(dataset_name, chart_type, title, context):
+    """Construye la figura Plotly del gráfico de un dataset"""
+    if not context.has_data(dataset_name):
+        return create_fallback_figure(title)
     
-    # Aplicar filtros
-    if filters:
-        df = apply_filters(df, filters)
+    # Matrícula se consulta desde el cubo agregado; el resto con las medidas del gráfico
+    def grouped(by, measures):
+        return context.summary(dataset_name, by, measures)
     
     # Colores de la paleta oficial (basada en app Shiny original)
     color_palette = ['#34536A', '#5A6E79', '#B35A5A', '#C2A869', '#6E5F80']
     
     try:
-        if chart_type == "line" and 'año' in df.columns:
+        if chart_type == "line" and 'año' in context.columns(dataset_name):
             # Gráfico de línea temporal
             if dataset_name == 'matricula':
-                df_grouped = df.groupby('año')['matricula_total'].sum().reset_index()
+                df_grouped = context.matricula(by=['año'])
                 fig = px.line(df_grouped, x='año', y='matricula_total', 
                              title=title, color_discrete_sequence=[color_palette[0]])
             elif dataset_name == 'egresados':
-                df_grouped = df.groupby('año')['tasa_transicion'].mean().reset_index()
+                df_grouped = to_display_floats(grouped(*CHART_MEASURES[('egresados', 'line')]))
                 fig = px.line(df_grouped, x='año', y='tasa_transicion', 
                              title=title, color_discrete_sequence=[color_palette[1]])
             else:
                 # Fallback genérico
-                return create_fallback_chart(title)
+                return create_fallback_figure(title)
         
         elif chart_type == "bar":
             # Gráfico de barras
             if dataset_name == 'matricula':
-                df_grouped = df.groupby('especialidad')['matricula_total'].sum().head(10).reset_index()
+                df_grouped = context.matricula(by=['especialidad']).head(10)
                 fig = px.bar(df_grouped, x='especialidad', y='matricula_total', 
                             title=title, color_discrete_sequence=[color_palette[0]])
                 fig.update_xaxes(tickangle=45)
             elif dataset_name == 'establecimientos':
-                df_grouped = df.groupby('region')['establecimiento_id'].nunique().reset_index()
+                df_grouped = grouped(*CHART_MEASURES[('establecimientos', 'bar')])
                 fig = px.bar(df_grouped, x='region', y='establecimiento_id', 
                             title=title, color_discrete_sequence=[color_palette[2]])
                 fig.update_xaxes(tickangle=45)
             else:
-                return create_fallback_chart(title)
+                return create_fallback_figure(title)
         
         elif chart_type == "pie":
             # Gráfico circular
             if dataset_name == 'matricula':
-                df_grouped = df.groupby('dependencia')['matricula_total'].sum().reset_index()
+                df_grouped = context.matricula(by=['dependencia'])
                 fig = px.pie(df_grouped, values='matricula_total', names='dependencia', 
                             title=title, color_discrete_sequence=color_palette)
             elif dataset_name == 'docentes':
-                df_grouped = df.groupby('genero').size().reset_index(name='count')
+                df_grouped = grouped(*CHART_MEASURES[('docentes', 'pie')])
                 fig = px.pie(df_grouped, values='count', names='genero', 
                             title=title, color_discrete_sequence=color_palette)
             else:
-                return create_fallback_chart(title)
+                return create_fallback_figure(title)
         
         else:
-            return create_fallback_chart(title)
+            return create_fallback_figure(title)
     
         # Configurar el layout del gráfico
         fig.update_layout(
@@ -223,77 +627,72 @@ def create_real_chart(dataset_name, chart_type="line", title="Gráfico", filters
             margin=dict(l=50, r=50, t=50, b=50)
         )
         
-        return dcc.Graph(figure=fig, className="mb-4")
+        return fig
     
     except Exception as e:
         print(f"⚠️ Error creando gráfico {chart_type} para {dataset_name}: {e}")
-        return create_fallback_chart(title)
+        return create_fallback_figure(title)
 
 
-def create_real_table(dataset_name, filters=None):
-    """Crea tablas basadas en datos reales"""
-    datasets = load_simulated_data()
-    df = datasets.get(dataset_name, pd.DataFrame())
-    
-    if df.empty:
+def create_real_table(dataset_name, filters=None, context=None):
+    """Crea tablas basadas en datos reales (memoizadas por filtros y versión de datos)"""
+    context = context or query_context(filters)
+    return result_cache.get_or_compute(
+        result_key(dataset_name, 'table', filters),
+        lambda: build_real_table(dataset_name, context)
+    )
+
+
+def build_real_table(dataset_name, context):
+    """Construye la tabla resumen de un dataset"""
+    if not context.has_data(dataset_name):
         return create_fallback_table()
     
-    # Aplicar filtros
-    if filters:
-        df = apply_filters(df, filters)
+    # Matrícula se consulta desde el cubo agregado; el resto con las medidas de la tabla
+    if dataset_name in TABLE_MEASURES:
+        grouped = context.summary(dataset_name, *TABLE_MEASURES[dataset_name])
     
     # Preparar tabla según el dataset
     try:
         if dataset_name == 'matricula':
-            # Tabla resumen por especialidad
-            table_data = df.groupby('especialidad').agg({
-                'matricula_total': 'sum',
-                'matricula_hombres': 'sum',
-                'matricula_mujeres': 'sum',
-                'tasa_retencion': 'mean'
-            }).round(2).reset_index()
+            # Tabla resumen por especialidad, con el crecimiento de cada fila
+            table_data = context.matricula(by=['especialidad'])[[
+                'especialidad', 'matricula_total', 'matricula_hombres',
+                'matricula_mujeres', 'tasa_retencion'
+            ]]
+            growth = resumen_crecimiento(context.matricula_annual('especialidad'))
+            growth = growth.reindex(table_data['especialidad'])
+            table_data = table_data.assign(
+                cagr=growth['cagr'].to_numpy(),
+                variacion_anual=growth['variacion_anual'].to_numpy()
+            ).round(2)
             
-            table_data.columns = ['Especialidad', 'Matrícula Total', 'Hombres', 'Mujeres', 'Tasa Retención']
+            table_data.columns = ['Especialidad', 'Matrícula Total', 'Hombres', 'Mujeres', 'Tasa Retención',
+                                  'Crec. Anual (%)', 'Var. Último Año (%)']
             table_data = table_data.head(10)  # Top 10
         
         elif dataset_name == 'egresados':
-            table_data = df.groupby('especialidad').agg({
-                'egresados_total': 'sum',
-                'tasa_transicion': 'mean',
-                'a_universidades': 'sum',
-                'a_institutos': 'sum'
-            }).round(2).reset_index()
+            table_data = grouped.round(2)
             
             table_data.columns = ['Especialidad', 'Egresados', 'Tasa Transición', 'A Universidades', 'A Institutos']
             table_data = table_data.head(10)
         
         elif dataset_name == 'establecimientos':
-            table_data = df.groupby(['region', 'dependencia']).agg({
-                'establecimiento_id': 'nunique',
-                'matricula_especialidad': 'sum'
-            }).reset_index()
+            table_data = grouped
             
             table_data.columns = ['Región', 'Dependencia', 'N° Establecimientos', 'Matrícula']
             table_data = table_data.head(15)
         
         elif dataset_name == 'docentes':
-            table_data = df.groupby('especialidad').agg({
-                'docente_id': 'count',
-                'edad': 'mean',
-                'experiencia_años': 'mean',
-                'titulo_pedagogico': lambda x: (x == True).sum() / len(x) * 100
-            }).round(2).reset_index()
+            table_data = grouped.assign(
+                titulo_pedagogico=grouped['titulo_pedagogico'] / grouped['registros'] * 100
+            ).drop(columns='registros').round(2)
             
             table_data.columns = ['Especialidad', 'N° Docentes', 'Edad Promedio', 'Experiencia', '% Título Ped.']
             table_data = table_data.head(10)
         
         elif dataset_name == 'proyectos':
-            table_data = df.groupby(['region', 'tipo_proyecto']).agg({
-                'monto_asignado': 'sum',
-                'pct_ejecucion': 'mean',
-                'establecimientos_beneficiados': 'sum'
-            }).reset_index()
-            
+            table_data = grouped.copy()
             table_data['monto_asignado'] = table_data['monto_asignado'] / 1_000_000  # Millones
             table_data.columns = ['Región', 'Tipo Proyecto', 'Monto (M$)', '% Ejecución', 'Establecimientos']
             table_data = table_data.head(15)
@@ -302,7 +701,7 @@ def create_real_table(dataset_name, filters=None):
             return create_fallback_table()
         
         return dbc.Table.from_dataframe(
-            table_data, 
+            to_display_floats(table_data), 
             striped=True, 
             bordered=True, 
             hover=True,
@@ -315,67 +714,78 @@ def create_real_table(dataset_name, filters=None):
         return create_fallback_table()
 
 
-def apply_filters(df, filters):
-    """Aplica filtros a un DataFrame"""
+def first_row(df):
+    """Primera fila como dict, conservando el tipo de cada columna (int o float)"""
+    return {column: df[column].iloc[0] for column in df.columns}
+
+
+def to_display_floats(df):
+    """
+    Convierte columnas float32 (esquema compacto) a float64 para mostrarlas
+    
+    Se pasa por la representación corta de float32 para que 0.84 se serialice
+    como 0.84 y no como 0.8399999737739563 en tablas y gráficos.
+    """
+    columnas = df.select_dtypes(include='float32').columns
+    if len(columnas) == 0:
+        return df
+    df = df.copy()
+    for col in columnas:
+        df[col] = df[col].astype(str).astype('float64')
+    return df
+
+
+def filter_predicates(filters, columns):
+    """
+    Traduce el dict de filtros a predicados sobre las columnas disponibles
+    
+    Returns:
+        (rango de años (mín, máx) o None, {columna: valores aceptados})
+    """
+    years = None
+    if 'years' in filters and 'año' in columns:
+        year_min, year_max = filters['years']
+        years = (year_min, year_max)
+    
+    values = {}
+    for column, default in FILTER_DEFAULTS.items():
+        if column in filters and column in columns and filters[column] != default:
+            value = filters[column]
+            values[column] = list(value) if isinstance(value, list) else [value]
+    
+    return years, values
+
+
+def apply_filters(df, filters, index=None):
+    """
+    Aplica filtros a un DataFrame
+    
+    Con un índice bitmap del dataset (src.data.bitmap) los filtros se
+    resuelven como operaciones sobre bitsets y un solo take; sin él se arma
+    una única máscara booleana.
+    """
     if not filters:
         return df
     
-    # Filtro por año
-    if 'years' in filters and 'año' in df.columns:
-        year_min, year_max = filters['years']
-        df = df[df['año'].between(year_min, year_max)]
-    
-    # Filtro por región
-    if 'region' in filters and 'region' in df.columns:
-        if filters['region'] != 'Todas las regiones':
-            df = df[df['region'] == filters['region']]
-    
-    # Filtro por especialidad
-    if 'especialidad' in filters and 'especialidad' in df.columns:
-        if filters['especialidad'] != 'Todas las especialidades':
-            if isinstance(filters['especialidad'], list):
-                df = df[df['especialidad'].isin(filters['especialidad'])]
-            else:
-                df = df[df['especialidad'] == filters['especialidad']]
+    years, values = filter_predicates(filters, df.columns)
+    if years is None and not values:
+        return df
     
-    # Filtro por dependencia
-    if 'dependencia' in filters and 'dependencia' in df.columns:
-        if filters['dependencia'] != 'todas':
-            df = df[df['dependencia'] == filters['dependencia']]
+    if index is not None and set(values) <= set(index.columnas()):
+        rango = ('año', *years) if years is not None else None
+        return df.take(index.seleccionar(values, rango))
     
-    # Filtro por género
-    if 'genero' in filters and 'genero' in df.columns:
-        if filters['genero'] != 'ambos':
-            df = df[df['genero'] == filters['genero']]
+    mask = np.ones(len(df), dtype=bool)
     
-    # Filtro por zona
-    if 'zona' in filters and 'zona' in df.columns:
-        if filters['zona'] != 'ambas':
-            df = df[df['zona'] == filters['zona']]
+    # Filtro por año
+    if years is not None:
+        mask &= df['año'].between(*years).to_numpy()
     
-    return df
-
-
-def calculate_growth(df, value_col, year_col):
-    """Calcula la tasa de crecimiento anual"""
-    if len(df) < 2 or year_col not in df.columns or value_col not in df.columns:
-        return 0
+    # Filtros por región, especialidad, dependencia, género y zona
+    for column, accepted in values.items():
+        mask &= df[column].isin(accepted).to_numpy()
     
-    try:
-        df_yearly = df.groupby(year_col)[value_col].sum().sort_index()
-        if len(df_yearly) < 2:
-            return 0
-        
-        first_year = df_yearly.iloc[0]
-        last_year = df_yearly.iloc[-1]
-        years_diff = df_yearly.index[-1] - df_yearly.index[0]
-        
-        if first_year > 0 and years_diff > 0:
-            growth = ((last_year / first_year) ** (1/years_diff) - 1) * 100
-            return growth
-        return 0
-    except:
-        return 0
+    return df[mask]
 
 
 def create_fallback_kpis(dataset_name):
@@ -407,6 +817,11 @@ def create_fallback_kpis(dataset_name):
 
 def create_fallback_chart(title):
     """Crea un gráfico de fallback"""
+    return dcc.Graph(figure=create_fallback_figure(title), className="mb-4")
+
+
+def create_fallback_figure(title):
+    """Crea la figura del gráfico de fallback"""
     fig = go.Figure()
     fig.add_annotation(
         text="Datos no disponibles<br>Verifique la generación de datos simulados",
@@ -421,7 +836,7 @@ def create_fallback_chart(title):
         height=400,
         showlegend=False
     )
-    return dcc.Graph(figure=fig, className="mb-4")
+    return fig
 
 
 def create_fallback_table():
@@ -7,24 +7,19 @@ Layout mejorado con navegación lateral y filtros completos
 
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-import pandas as pd
-import os
+from src.data.territorio import indice_comunas
 
 
 def create_advanced_filters():
     """Crea filtros avanzados para el sistema EMTP"""
     
-    # Cargar comunas desde el CSV
-    data_path = "data/processed/matricula_comunal_simulada.csv"
+    # Cargar comunas desde el índice territorial precalculado
     comunas_list = ["Todas las comunas"]
     
-    if os.path.exists(data_path):
-        try:
-            df = pd.read_csv(data_path)
-            comunas_unicas = sorted(df['comuna'].unique())
-            comunas_list.extend(comunas_unicas)
-        except Exception as e:
-            print(f"⚠️ Error cargando comunas: {e}")
+    try:
+        comunas_list.extend(indice_comunas.get_comunas())
+    except Exception as e:
+        print(f"⚠️ Error cargando comunas: {e}")
     
     # Opciones de filtros basadas en datos reales
     regiones = [
@@ -0,0 +1,347 @@
+"""
+============================================================================
+CACHE DE FIGURAS PLOTLY SERIALIZADAS
+============================================================================
+Guarda el JSON ya serializado de las figuras, con clave (constructor,
+parámetros, tema, versión de datos). Construir y serializar una figura
+(sobre todo los choropleth con el GeoJSON comunal) es lo más caro que hace
+la app y el resultado es el mismo para todos los usuarios, así que se
+calcula una vez y se comparte.
+
+Almacenamientos intercambiables (FIGURE_CACHE_BACKEND):
+- memory: LRU en memoria del proceso, acotado por bytes
+- filesystem: un archivo JSON por figura en un directorio (compartido entre
+  los workers de un mismo servidor)
+- redis: servidor Redis de la configuración REDIS_* (compartido entre
+  servidores); acepta cualquier cliente con get/setex/delete/scan_iter,
+  p. ej. fakeredis o el sustituto en memoria de
+  scripts/verificar_cache_figuras.py
+
+La figura se entrega como dict (el mismo JSON que recibiría el navegador),
+que dcc.Graph acepta directamente. Los dicts entregados no deben modificarse.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import plotly
+import plotly.utils
+from dash import no_update
+from loguru import logger
+
+from config.settings import settings
+
+try:
+    import redis
+except ImportError:  # Dependencia opcional
+    redis = None
+
+# Tema por defecto de las figuras (template de Plotly)
+TEMA_POR_DEFECTO = 'plotly_white'
+
+# Subir al cambiar la forma de construir las figuras: invalida los cachés
+# persistentes (filesystem / redis) de versiones anteriores de la app
+VERSION_FIGURAS = 1
+
+_NO_UPDATE = type(no_update)
+
+
+def figure_key(
+    builder: str,
+    params: Hashable = None,
+    theme: str = TEMA_POR_DEFECTO,
+    version: Hashable = None
+) -> str:
+    """
+    Clave estable de una figura (válida entre procesos y servidores)
+
+    Args:
+        builder: Nombre del constructor de la figura
+        params: Parámetros del constructor (filtros normalizados, granularidad, ...)
+        theme: Template de Plotly con que se construye
+        version: Versión de los datos de origen (firma de archivo, snapshot, ...)
+    """
+    firma = repr((VERSION_FIGURAS, plotly.__version__, builder, params, theme, version))
+    return f"{builder}:{hashlib.sha1(firma.encode('utf-8')).hexdigest()}"
+
+
+class MemoryFigureStore:
+    """
+    LRU en memoria de JSON de figuras, acotado por bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires = entry
+            if expires <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str, ttl_seconds: int):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, time.monotonic() + ttl_seconds)
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        payload, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class FileFigureStore:
+    """
+    Un archivo <clave>.json por figura; el mtime del archivo guarda su expiración
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key.replace(':', '_')}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if path.stat().st_mtime <= time.time():
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def set(self, key: str, payload: str, ttl_seconds: int):
+        path = self._path(key)
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        expires = time.time() + ttl_seconds
+        try:
+            tmp.write_text(payload, encoding='utf-8')
+            os.utime(tmp, (expires, expires))
+            os.replace(tmp, path)  # Los lectores nunca ven un archivo a medio escribir
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar la figura {key}: {e}")
+            tmp.unlink(missing_ok=True)
+
+    def clear(self):
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+
+class RedisFigureStore:
+    """
+    JSON de figuras en Redis con expiración nativa (SETEX)
+    """
+
+    def __init__(self, client, prefix: str = 'figura:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        payload = self.client.get(self.prefix + key)
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
+        return payload
+
+    def set(self, key: str, payload: str, ttl_seconds: int):
+        self.client.setex(self.prefix + key, ttl_seconds, payload)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class FigureCache:
+    """
+    Cache de figuras serializadas sobre un almacenamiento intercambiable
+
+    Uso:
+        figura = figure_cache.get_or_build(
+            'mapa_comunal', params={'granularidad': 'comunal'},
+            build=lambda: construir_mapa(), version=version_datos
+        )
+        dcc.Graph(figure=figura)
+    """
+
+    def __init__(self, store, ttl_seconds: int, enabled: bool = True):
+        """
+        Args:
+            store: Almacenamiento (MemoryFigureStore, FileFigureStore, RedisFigureStore)
+            ttl_seconds: Vida máxima de cada figura
+            enabled: Si es False, siempre se construye la figura
+        """
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def serialize(value: Any) -> str:
+        """
+        JSON de una figura (o de una lista de salidas de callback con figuras)
+        """
+        return json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder)
+
+    @staticmethod
+    def _cacheable(value: Any) -> bool:
+        """
+        Las salidas con no_update no se cachean (dependen del estado del cliente)
+        """
+        if isinstance(value, (list, tuple)):
+            return not any(isinstance(v, _NO_UPDATE) for v in value)
+        return not isinstance(value, _NO_UPDATE)
+
+    def get_or_build(
+        self,
+        builder: str,
+        params: Hashable,
+        build: Callable[[], Any],
+        theme: str = TEMA_POR_DEFECTO,
+        version: Hashable = None
+    ) -> Any:
+        """
+        Retorna la figura cacheada como dict o la construye, serializa y guarda
+
+        Un error del almacenamiento (p. ej. Redis caído) no rompe la página:
+        se registra y la figura se construye igual.
+        """
+        if not self.enabled:
+            return build()
+
+        key = figure_key(builder, params, theme, version)
+        try:
+            payload = self.store.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️  Cache de figuras no disponible ({e}); se construye {builder}")
+            payload = None
+
+        if payload is not None:
+            self.hits += 1
+            return json.loads(payload)
+
+        self.misses += 1
+        value = build()
+        if not self._cacheable(value):
+            return value
+
+        payload = self.serialize(value)
+        try:
+            self.store.set(key, payload, self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️  No se pudo guardar {builder} en el cache de figuras: {e}")
+        return json.loads(payload)
+
+    def memoize(
+        self,
+        builder: str,
+        theme: str = TEMA_POR_DEFECTO,
+        version: Optional[Callable[[], Hashable]] = None
+    ):
+        """
+        Decorador: cachea el resultado de un constructor según sus argumentos
+
+        Args:
+            builder: Nombre del constructor en la clave
+            theme: Template de Plotly de las figuras
+            version: Función que retorna la versión actual de los datos
+        """
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                return self.get_or_build(
+                    builder,
+                    (args, tuple(sorted(kwargs.items()))),
+                    lambda: funcion(*args, **kwargs),
+                    theme=theme,
+                    version=version() if version else None
+                )
+            return envoltura
+        return decorador
+
+    def clear(self):
+        """
+        Vacía el almacenamiento (los contadores se mantienen)
+        """
+        self.store.clear()
+        logger.info("🧹 Cache de figuras vaciado")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores del cache
+        """
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'backend': type(self.store).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+            'errors': self.errors
+        }
+
+
+def crear_store(backend: str):
+    """
+    Crea el almacenamiento configurado; si Redis no está disponible se usa memoria
+    """
+    if backend == 'filesystem':
+        return FileFigureStore(settings.FIGURE_CACHE_DIR)
+
+    if backend == 'redis':
+        if redis is None:
+            logger.warning("⚠️  FIGURE_CACHE_BACKEND=redis pero el paquete redis no está instalado; se usa memoria")
+        else:
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                password=settings.REDIS_PASSWORD or None,
+                db=settings.REDIS_DB,
+                socket_timeout=2
+            )
+            try:
+                client.ping()
+                logger.info(f"🗄️  Cache de figuras en Redis {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+                return RedisFigureStore(client)
+            except Exception as e:
+                logger.warning(f"⚠️  Redis no disponible para el cache de figuras ({e}); se usa memoria")
+
+    return MemoryFigureStore(settings.FIGURE_CACHE_MAX_MB * 1024 * 1024)
+
+
+# Instancia global para usar en toda la app
+figure_cache = FigureCache(
+    store=crear_store(settings.FIGURE_CACHE_BACKEND),
+    ttl_seconds=settings.FIGURE_CACHE_TTL_SECONDS,
+    enabled=settings.FIGURE_CACHE_ENABLED
+)
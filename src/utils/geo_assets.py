@@ -0,0 +1,142 @@
+"""
+============================================================================
+GEOJSON COMO ASSETS ESTÁTICOS CON HUELLA
+============================================================================
+Publica los límites de data/geographic en URLs con huella de contenido
+(/geo/comunas_media.3f9a1c2b7d4e.geojson) y cabeceras de cache de un año.
+Los mapas referencian la URL en lugar de incrustar el GeoJSON: Plotly.js
+descarga la geometría una vez (y la reutiliza entre figuras de la página),
+el navegador la guarda en su cache HTTP y cada respuesta de un callback de
+mapas lleva solo los arrays de locations/valores.
+
+Al regenerar los archivos (scripts/construir_geojson.py) cambia la huella y
+con ella la URL, así que nunca se sirve una geometría vieja desde el cache.
+
+Uso (app_v2.py):
+    register_geojson_routes(app.server)
+"""
+
+import gzip
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+import dash
+from flask import Response, abort, request
+from loguru import logger
+
+from src.data.geografia import FUENTES, RESOLUCIONES, ruta_geojson
+
+RUTA_BASE = '/geo/'
+MAX_AGE_SEGUNDOS = 365 * 24 * 3600
+
+
+class GeoJSONAssets:
+    """
+    Huellas y contenido (plano y gzip) de los GeoJSON locales, por firma de archivo
+    """
+
+    def __init__(self):
+        self._entradas: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def _entrada(self, nivel: str, resolucion: str) -> Optional[Dict]:
+        """
+        Contenido del archivo con su huella; se relee solo si cambia la firma
+        """
+        path = ruta_geojson(nivel, resolucion)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        firma = (stat.st_mtime_ns, stat.st_size)
+
+        clave = (nivel, resolucion)
+        entrada = self._entradas.get(clave)
+        if entrada is None or entrada['firma'] != firma:
+            with self._lock:
+                entrada = self._entradas.get(clave)
+                if entrada is None or entrada['firma'] != firma:
+                    contenido = path.read_bytes()
+                    entrada = {
+                        'firma': firma,
+                        'huella': hashlib.sha256(contenido).hexdigest()[:12],
+                        'contenido': contenido,
+                        'gzip': gzip.compress(contenido, compresslevel=9)
+                    }
+                    self._entradas[clave] = entrada
+                    logger.info(
+                        f"🗺️  {path.name} publicado ({len(contenido) / 1e6:.2f} MB, "
+                        f"{len(entrada['gzip']) / 1e6:.2f} MB gzip)"
+                    )
+        return entrada
+
+    def nombre(self, nivel: str, resolucion: str) -> Optional[str]:
+        """
+        Nombre con huella del archivo (None si no se ha generado)
+        """
+        entrada = self._entrada(nivel, resolucion)
+        if entrada is None:
+            return None
+        return f"{nivel}_{resolucion}.{entrada['huella']}.geojson"
+
+    def url(self, nivel: str, resolucion: str) -> Optional[str]:
+        """
+        URL pública del GeoJSON con huella (None si no se ha generado)
+        """
+        nombre = self.nombre(nivel, resolucion)
+        if nombre is None:
+            return None
+        return dash.get_relative_path(RUTA_BASE + nombre)
+
+    def servir(self, nombre: str) -> Response:
+        """
+        Respuesta HTTP para /geo/<nivel>_<resolucion>.<huella>.geojson
+        """
+        try:
+            base, huella, extension = nombre.rsplit('.', 2)
+            nivel, resolucion = base.rsplit('_', 1)
+        except ValueError:
+            abort(404)
+        # Solo niveles y resoluciones conocidos: el nombre nunca arma una ruta arbitraria
+        if extension != 'geojson' or nivel not in FUENTES or resolucion not in RESOLUCIONES:
+            abort(404)
+
+        entrada = self._entrada(nivel, resolucion)
+        if entrada is None:
+            abort(404)
+
+        if huella == entrada['huella']:
+            cache_control = f"public, max-age={MAX_AGE_SEGUNDOS}, immutable"
+        else:
+            # Página abierta antes de regenerar los archivos: se sirve la versión
+            # actual, pero sin cachearla bajo la URL vieja
+            cache_control = "no-cache"
+
+        if request.if_none_match.contains(entrada['huella']):
+            return Response(status=304, headers={'Cache-Control': cache_control, 'ETag': f'"{entrada["huella"]}"'})
+
+        usar_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        cuerpo = entrada['gzip'] if usar_gzip else entrada['contenido']
+        respuesta = Response(cuerpo, mimetype='application/geo+json')
+        respuesta.headers['Cache-Control'] = cache_control
+        respuesta.headers['ETag'] = f'"{entrada["huella"]}"'
+        respuesta.headers['Vary'] = 'Accept-Encoding'
+        if usar_gzip:
+            respuesta.headers['Content-Encoding'] = 'gzip'
+        return respuesta
+
+
+# Instancia global para usar en toda la app
+geojson_assets = GeoJSONAssets()
+
+
+def register_geojson_routes(server):
+    """
+    Registra la ruta /geo/<archivo> en el servidor Flask de Dash
+    """
+    server.add_url_rule(
+        RUTA_BASE + '<string:nombre>',
+        endpoint='geojson_asset',
+        view_func=geojson_assets.servir
+    )
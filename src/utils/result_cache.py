@@ -0,0 +1,195 @@
+"""
+============================================================================
+CACHE DE RESULTADOS - KPIs, GRÁFICOS Y TABLAS
+============================================================================
+Memoiza los componentes ya construidos por clave (dataset, widget, tipo de
+gráfico, filtros normalizados, versión de datos). La mayor parte del tráfico
+son usuarios mirando las mismas vistas por defecto, así que volver a una
+sección con los mismos filtros se sirve desde memoria.
+
+- LRU acotado por memoria (tamaño del JSON que Dash envía al navegador, o
+  del pickle si no es JSON; lo que no se puede medir no se cachea)
+- TTL por entrada
+- Contadores de aciertos/fallos para monitoreo
+
+Los componentes cacheados se comparten entre requests: no deben
+modificarse después de construirse.
+"""
+
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import plotly.utils
+from loguru import logger
+
+from config.settings import settings
+
+
+class ResultCache:
+    """
+    Cache LRU + TTL de resultados, acotado por bytes
+
+    Uso:
+        cache = ResultCache(max_bytes=64 * 1024 * 1024, ttl_seconds=900)
+        card = cache.get_or_compute(('matricula', 'kpi', filtros, version),
+                                    lambda: construir_kpis(...))
+        cache.stats()  # {'hits': ..., 'misses': ..., 'hit_rate': ...}
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: int, enabled: bool = True):
+        """
+        Inicializa el cache
+
+        Args:
+            max_bytes: Memoria máxima estimada de las entradas
+            ttl_seconds: Vida máxima de cada entrada
+            enabled: Si es False, get_or_compute siempre calcula
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def normalize_filters(filters: Optional[Dict]) -> tuple:
+        """
+        Convierte un dict de filtros en una tupla ordenada y hasheable
+
+        Las listas de selección múltiple se ordenan (el orden no cambia el
+        resultado); el rango de años se mantiene como (mín, máx).
+        """
+        if not filters:
+            return ()
+        normalizado = []
+        for clave in sorted(filters):
+            valor = filters[clave]
+            if isinstance(valor, (list, tuple)):
+                valor = tuple(valor) if clave == 'years' else tuple(sorted(map(str, valor)))
+            elif isinstance(valor, dict):
+                valor = ResultCache.normalize_filters(valor)
+            normalizado.append((clave, valor))
+        return tuple(normalizado)
+
+    @staticmethod
+    def _estimate_size(value: Any) -> Optional[int]:
+        """
+        Estima el tamaño de un resultado como el largo de su JSON serializado
+
+        Si no es serializable a JSON (p. ej. un DataFrame) se usa el largo de
+        su pickle; None si tampoco se puede medir.
+        """
+        try:
+            return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+        except (TypeError, ValueError):
+            pass
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return None
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Retorna el resultado cacheado o None (cuenta acierto/fallo)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Guarda un resultado, desalojando los menos usados si se excede la memoria
+        """
+        size = self._estimate_size(value)
+        if size is None:
+            # Sin tamaño no se puede respetar el tope de memoria: no se cachea
+            logger.debug(f"Resultado no medible, no se cachea: {type(value).__name__}")
+            return
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                'value': value,
+                'size': size,
+                'expires': time.monotonic() + self.ttl_seconds
+            }
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Retorna el resultado de ``key`` o lo calcula con ``compute`` y lo guarda
+        """
+        if not self.enabled:
+            return compute()
+
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """
+        Vacía el cache (los contadores se mantienen)
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        logger.info("🧹 Cache de resultados vaciado")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna contadores y ocupación del cache
+        """
+        total = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+
+# Instancia global para usar en toda la app
+result_cache = ResultCache(
+    max_bytes=settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    enabled=settings.RESULT_CACHE_ENABLED
+)